@@ -146,6 +146,14 @@ class PariArgument(object):
         """
         return ""
 
+    def cache_key_code(self):
+        """
+        Return an expression for the value of this argument which
+        identifies it in the key of the disk cache. It is evaluated
+        after ``convert_code``, outside of ``sig_on()``.
+        """
+        return self.name
+
     def call_code(self):
         """
         Return code to put this argument in a PARI function call.
@@ -244,6 +252,24 @@ class PariArgumentGEN(PariArgumentObject):
     def call_code(self):
         return self.tmpname
 
+class PariArgumentClosure(PariArgumentGEN):
+    """
+    Closure called by PARI with the value of the preceding loop
+    variable (prototype code ``J``), as in ``parvector`` or ``parsum``.
+    Python callables are converted to closures by ``objtogen``.
+    """
+    def _typerepr(self):
+        return "closure"
+    def convert_code(self):
+        s = PariArgumentGEN.convert_code(self)
+        if not self.default:
+            # required argument
+            s += "        if typ((<Gen>{name}).g) != t_CLOSURE:\n"
+        else:
+            s += "        if _have_{name} and typ((<Gen>{name}).g) != t_CLOSURE:\n"
+        s += "            raise TypeError(\"{name} must be a closure\")\n"
+        return s.format(name=self.name)
+
 class PariArgumentString(PariArgumentObject):
     def _typerepr(self):
         return "str"
@@ -307,6 +333,8 @@ class PariArgumentPrec(PariArgumentClass):
         return "0"
     def get_argument_name(self, namesiter):
         return "precision"
+    def cache_key_code(self):
+        return "({name} or default_bitprec())".format(name=self.name)
     def c_convert_code(self):
         s = "        {name} = prec_bits_to_words({name})\n"
         return s.format(name=self.name)
@@ -320,6 +348,8 @@ class PariArgumentBitprec(PariArgumentClass):
         return "0"
     def get_argument_name(self, namesiter):
         return "precision"
+    def cache_key_code(self):
+        return "({name} or default_bitprec())".format(name=self.name)
     def c_convert_code(self):
         s  = "        if not {name}:\n"
         s += "            {name} = default_bitprec()\n"
@@ -334,6 +364,8 @@ class PariArgumentSeriesPrec(PariArgumentClass):
         return "-1"
     def get_argument_name(self, namesiter):
         return "serprec"
+    def cache_key_code(self):
+        return "({name} if {name} >= 0 else precdl)".format(name=self.name)
     def c_convert_code(self):
         s  = "        if {name} < 0:\n"
         s += "            {name} = precdl  # Global PARI series precision\n"
@@ -351,13 +383,15 @@ pari_arg_types = {
         'p': PariArgumentPrec,
         'b': PariArgumentBitprec,
         'P': PariArgumentSeriesPrec,
+        'J': PariArgumentClosure,
+
+    # Loop variable, handled by parse_prototype()
+        'V': None,
 
     # Codes which are known but not actually supported yet
         '&': None,
-        'V': None,
         'I': None,
         'E': None,
-        'J': None,
         'C': None,
         '*': None,
         '=': None}
@@ -16,7 +16,7 @@ Auto-generate methods for PARI functions.
 from __future__ import absolute_import, print_function, unicode_literals
 import os, re, sys, io
 
-from .args import PariArgumentGEN, PariInstanceArgument
+from .args import PariArgumentGEN, PariArgumentClosure, PariInstanceArgument
 from .parser import read_pari_desc, parse_prototype
 from .doc import get_rest_doc
 
@@ -53,7 +53,7 @@ cdef class Pari_auto:
 decl_banner = autogen_top + '''
 from .types cimport *
 
-cdef extern from *:
+cdef extern from * nogil:
 '''
 
 
@@ -86,8 +86,48 @@ class PariFunctionGenerator(object):
     # components do not get deleted by gunclone, leading to memory
     # leaks.  They must be handled differently when the Gen object
     # managing the GEN is dealloc'ed.
-    
-    _lazy = ['ellinit']
+    #
+    # PARI builds these structures with obj_init() or obj_reinit(),
+    # which pari.desc does not record, so this table must be kept up
+    # to date by hand when upgrading PARI.  A missing entry leaks
+    # memory.  An extra entry is harmless: new_dynamic_gen() only
+    # treats a GEN as lazy if it has the shape of such a structure,
+    # and __call__ warns about entries which are not in pari.desc.
+
+    _lazy = {
+        # elliptic curves
+        'ellinit', 'ellchangecurve', 'ellminimalmodel',
+        # number fields and their extensions
+        'nfinit', 'bnfinit', 'bnrinit', 'rnfinit',
+        # L-functions
+        'lfuncreate', 'lfuninit',
+        # modular forms and modular symbols
+        'mfinit', 'msinit',
+        }
+
+    # Functions whose results can be stored in the disk cache (see
+    # Pari.cache_dir). Their results must only depend on their
+    # arguments and the precision, and be expensive enough to be
+    # worth reading from disk.
+    _cached = {
+        'nfinit', 'bnfinit', 'ellinit', 'lfuninit', 'mfinit',
+        'galoisinit', 'znstar',
+        }
+
+    # Functions which keep the GIL in threaded mode (see
+    # Pari.set_threaded), because they parse GP code or use PARI state
+    # which is shared by all threads: the table of variables, the
+    # defaults in GP_DATA and the real precision.  Calls which keep the
+    # GIL cannot run at the same time as each other, and neither can
+    # the conversion of strings by objtogen(), which may create
+    # variables.  The functions of the section "programming/specific"
+    # and the functions taking a closure (prototype code J) keep the
+    # GIL too.
+    _global_state = {
+        'default', 'eval', 'read', 'readvec', 'readstr', 'install',
+        'kill', 'variable', 'variables', 'varhigher', 'varlower',
+        'localprec', 'localbitprec', 'getlocalprec', 'getlocalbitprec',
+        }
 
     def __init__(self):
         self.gen_filename = os.path.join('cypari', 'auto_gen.pxi')
@@ -154,14 +194,35 @@ class PariFunctionGenerator(object):
                     cdef bint _have_tech = (tech is not None)
                     if _have_tech:
                         tech = objtogen(tech)
+                    cdef DiskCache _cache = disk_cache
+                    _key = None
+                    if _cache is not None:
+                        _key = _cache.key('bnfinit', (P, flag, tech, (precision or default_bitprec()), ))
+                        _result = _cache.load(_key)
+                        if _result is not None:
+                            return _result
+                    if profiling:
+                        profile_start('bnfinit')
                     sig_on()
                     cdef GEN _P = (<Gen>P).g
                     cdef GEN _tech = NULL
                     if _have_tech:
                         _tech = (<Gen>tech).g
                     precision = prec_bits_to_words(precision)
-                    cdef GEN _ret = bnfinit0(_P, flag, _tech, precision)
-                    return new_gen(_ret)
+                    cdef GEN _ret
+                    if release_gil and sig_on_count == 1:
+                        sig_off()
+                        with nogil:
+                            if sig_on_nogil():
+                                _ret = bnfinit0(_P, flag, _tech, precision)
+                                sig_off()
+                        sig_on_after_nogil()
+                    else:
+                        _ret = bnfinit0(_P, flag, _tech, precision)
+                    _result = new_dynamic_gen(_ret)
+                    if _key is not None:
+                        _cache.store(_key, _result)
+                    return _result
             <BLANKLINE>
                 ...
             >>> G.handle_pari_function("ellmodulareqn",
@@ -177,8 +238,19 @@ class PariFunctionGenerator(object):
                     cdef long _y = -1
                     if y is not None:
                         _y = get_var(y)
+                    if profiling:
+                        profile_start('ellmodulareqn')
                     sig_on()
-                    cdef GEN _ret = ellmodulareqn(N, _x, _y)
+                    cdef GEN _ret
+                    if release_gil and sig_on_count == 1:
+                        sig_off()
+                        with nogil:
+                            if sig_on_nogil():
+                                _ret = ellmodulareqn(N, _x, _y)
+                                sig_off()
+                        sig_on_after_nogil()
+                    else:
+                        _ret = ellmodulareqn(N, _x, _y)
                     return new_gen(_ret)
             <BLANKLINE>
             >>> G.handle_pari_function("setrand",
@@ -191,6 +263,8 @@ class PariFunctionGenerator(object):
                     r'''
                     Reseeds the random number generator...
                     '''
+                    if profiling:
+                        profile_start('setrand')
                     sig_on()
                     cdef GEN _n = (<Gen>n).g
                     setrand(_n)
@@ -201,6 +275,8 @@ class PariFunctionGenerator(object):
                     Reseeds the random number generator...
                     '''
                     n = objtogen(n)
+                    if profiling:
+                        profile_start('setrand')
                     sig_on()
                     cdef GEN _n = (<Gen>n).g
                     setrand(_n)
@@ -218,9 +294,20 @@ class PariFunctionGenerator(object):
                     '''
                     from warnings import warn
                     warn('the PARI/GP function polredord is obsolete (2008-07-20)', DeprecationWarning)
+                    if profiling:
+                        profile_start('polredord')
                     sig_on()
                     cdef GEN _x = (<Gen>x).g
-                    cdef GEN _ret = polredord(_x)
+                    cdef GEN _ret
+                    if release_gil and sig_on_count == 1:
+                        sig_off()
+                        with nogil:
+                            if sig_on_nogil():
+                                _ret = polredord(_x)
+                                sig_off()
+                        sig_on_after_nogil()
+                    else:
+                        _ret = polredord(_x)
                     return new_gen(_ret)
             <BLANKLINE>
                 def polredord(self, x):
@@ -230,9 +317,20 @@ class PariFunctionGenerator(object):
                     from warnings import warn
                     warn('the PARI/GP function polredord is obsolete (2008-07-20)', DeprecationWarning)
                     x = objtogen(x)
+                    if profiling:
+                        profile_start('polredord')
                     sig_on()
                     cdef GEN _x = (<Gen>x).g
-                    cdef GEN _ret = polredord(_x)
+                    cdef GEN _ret
+                    if release_gil and sig_on_count == 1:
+                        sig_off()
+                        with nogil:
+                            if sig_on_nogil():
+                                _ret = polredord(_x)
+                                sig_off()
+                        sig_on_after_nogil()
+                    else:
+                        _ret = polredord(_x)
                     return new_gen(_ret)
             <BLANKLINE>
         """
@@ -241,6 +339,10 @@ class PariFunctionGenerator(object):
         except NotImplementedError:
             return  # Skip unsupported prototype codes
 
+        nogil = not (function in self._global_state or
+                     kwds.get("section") == "programming/specific" or
+                     any(isinstance(a, PariArgumentClosure) for a in args))
+
         doc = get_rest_doc(function)
 
         self.write_declaration(cname, args, ret, self.decl_file)
@@ -249,13 +351,13 @@ class PariFunctionGenerator(object):
             # If the first argument is a GEN, write a method of the
             # Gen class.
             self.write_method(function, cname, args, ret, args,
-                    self.gen_file, doc, obsolete)
+                    self.gen_file, doc, obsolete, nogil)
 
         # In any case, write a method of the Pari class.
         # Parse again with an extra "self" argument.
         args, ret = parse_prototype(prototype, help, [PariInstanceArgument()])
         self.write_method(function, cname, args, ret, args[1:],
-                self.instance_file, doc, obsolete)
+                self.instance_file, doc, obsolete, nogil)
 
     def write_declaration(self, cname, args, ret, file):
         """
@@ -274,7 +376,7 @@ class PariFunctionGenerator(object):
         s = '    {ret} {function}({args})'.format(ret=ret.ctype(), function=cname, args=args)
         print(s, file=file)
 
-    def write_method(self, function, cname, args, ret, cargs, file, doc, obsolete):
+    def write_method(self, function, cname, args, ret, cargs, file, doc, obsolete, nogil=True):
         """
         Write Cython code with a method to call one PARI function.
 
@@ -295,6 +397,9 @@ class PariFunctionGenerator(object):
 
         - ``obsolete`` -- if ``True``, a deprecation warning will be
           given whenever this method is called
+
+        - ``nogil`` -- (default: ``True``) whether the GIL is released
+          during the call in threaded mode
         """
         doc = doc.replace("\n", "\n        ")  # Indent doc
 
@@ -315,11 +420,26 @@ class PariFunctionGenerator(object):
             s += a.deprecation_warning_code(function)
         for a in args:
             s += a.convert_code()
+        cached = function in self._cached and ret.ctype() == "GEN"
+        if cached:
+            keyargs = "".join(a.cache_key_code() + ", " for a in cargs)
+            s += "        cdef DiskCache _cache = disk_cache\n"
+            s += "        _key = None\n"
+            s += "        if _cache is not None:\n"
+            s += "            _key = _cache.key('{function}', (%s))\n" % keyargs
+            s += "            _result = _cache.load(_key)\n"
+            s += "            if _result is not None:\n"
+            s += "                return _result\n"
+        s += "        if profiling:\n"
+        s += "            profile_start('{function}')\n"
         s += "        sig_on()\n"
         for a in args:
             s += a.c_convert_code()
-        s += ret.assign_code("{cname}({callargs})")
-        s += ret.return_code(dynamic=(function in self._lazy))
+        s += ret.assign_code("{cname}({callargs})", nogil)
+        if cached:
+            s += ret.return_code(dynamic=(function in self._lazy), cached=True)
+        else:
+            s += ret.return_code(dynamic=(function in self._lazy))
         s = s.format(function=function, protoargs=protoargs, cname=cname, callargs=callargs, doc=doc, obsolete=obsolete)
         print(s, file=file)
 
@@ -328,6 +448,18 @@ class PariFunctionGenerator(object):
         Top-level function to generate the auto-generated files.
         """
         D = read_pari_desc()
+        missing = self._lazy.difference(D)
+        if missing:
+            print("Warning: unknown lazy PARI functions: {}".format(
+                ", ".join(sorted(missing))))
+        missing = self._cached.difference(D)
+        if missing:
+            print("Warning: unknown cached PARI functions: {}".format(
+                ", ".join(sorted(missing))))
+        missing = self._global_state.difference(D)
+        if missing:
+            print("Warning: unknown PARI functions using global state: {}".format(
+                ", ".join(sorted(missing))))
         D = sorted(D.values(), key=lambda d: d['function'])
         sys.stdout.write("Generating PARI functions:")
 
@@ -14,7 +14,7 @@ Read and parse the file pari.desc
 
 from __future__ import absolute_import, unicode_literals
 
-import os, re, io
+import os, re, io, itertools
 
 from .args import pari_arg_types
 from .ret import pari_ret_types
@@ -22,6 +22,7 @@ from .paths import pari_share
 
 paren_re = re.compile(r"[(](.*)[)]")
 argname_re = re.compile(r"[ {]*([A-Za-z_][A-Za-z0-9_]*)")
+varinit_re = re.compile(r"[ {]*([A-Za-z_][A-Za-z0-9_]*) *= *([A-Za-z_][A-Za-z0-9_]*)")
 
 def read_pari_desc():
     """
@@ -103,16 +104,33 @@ def parse_prototype(proto, help, initial_args=[]):
         ([GEN x, long flag=0, GEN d=NULL, GEN isd=NULL, GEN sd=NULL], GEN)
         >>> parse_prototype("lp", "foo()", [str("TEST")])
         (['TEST', prec precision=0], long)
+
+    A loop variable ``V`` is not an argument: the closure given for
+    the following ``J`` argument is called with its value::
+
+        >>> parse_prototype("LVJ", "parvector(N,i,expr)")
+        ([long N, closure expr], GEN)
+        >>> parse_prototype("V=GGJ", "parsum(i=a,b,expr)")
+        ([GEN a, GEN b, closure expr], GEN)
+        >>> parse_prototype("vV=GDGJDVDI", "parfor(i=a,{b},expr1,{r},{expr2})")
+        Traceback (most recent call last):
+        ...
+        NotImplementedError: unsupported prototype character 'V'
     """
     # Use the help string just for the argument names.
     # "names" should be an iterator over the argument names.
     m = paren_re.search(help)
+    inits = {}  # Initial values of loop variables, like "a" in "i=a"
     if m is None:
         names = iter([])
     else:
         s = m.groups()[0]
         matches = [argname_re.match(x) for x in s.split(",")]
         names = (m.groups()[0] for m in matches if m is not None)
+        for x in s.split(","):
+            m = varinit_re.match(x)
+            if m is not None:
+                inits[m.groups()[0]] = m.groups()[1]
 
     # First, handle the return type
     try:
@@ -143,6 +161,19 @@ def parse_prototype(proto, help, initial_args=[]):
         else:
             default = None
 
+        if c == "V" and "J" in proto[n:]:
+            # A loop variable is not passed to the C function: the
+            # closure given for the "J" argument takes its value as
+            # argument.
+            var = next(names, None)
+            if proto[n:n+1] == "=":
+                # "V=G": the next argument is the initial value of the
+                # variable, named after the "=" in the help string
+                n += 1
+                if var in inits:
+                    names = itertools.chain([inits[var]], names)
+            continue
+
         try:
             t = pari_arg_types[c]
             if t is None:
@@ -166,11 +197,11 @@ def parse_prototype(proto, help, initial_args=[]):
             #
             # A small number of GP functions (nfroots() for example)
             # wants to do this anyway. Luckily, this seems to occur only
-            # for arguments of type GEN (prototype code "G")
+            # for arguments of type GEN (prototype codes "G" and "J")
             #
             # To work around this, we add a "fake" default value and
             # then raise an error if it was not given...
-            if c != "G":
+            if c not in "GJ":
                 raise NotImplementedError("non-default argument after default argument is only implemented for GEN arguments")
             arg.default = False
         args.append(arg)
@@ -30,12 +30,33 @@ class PariReturn(object):
         """
         raise NotImplementedError
 
-    def assign_code(self, value):
+    def assign_code(self, value, nogil=True):
         """
         Return code to assign the result of the PARI call in ``value``
         to the variable named ``self.name``.
+
+        In threaded mode (see ``Pari.set_threaded``), the GIL is
+        released during the call if ``nogil`` is true, unless it is
+        made from within another PARI computation. Since PARI errors
+        and signals jump back to the last ``sig_on()``, the call is
+        made inside ``sig_on_nogil()``, which does not take the GIL in
+        the signal handler, and left with ``sig_off()`` before the GIL
+        is taken again. ``sig_on_after_nogil()`` then raises the
+        exception for an interruption, or enters ``sig_on()`` again.
         """
-        s  = "        cdef {ctype} {name} = {value}\n"
+        s  = "        cdef {ctype} {name}\n"
+        if not nogil:
+            s += "        {name} = {value}\n"
+            return s.format(ctype=self.ctype(), name=self.name, value=value)
+        s += "        if release_gil and sig_on_count == 1:\n"
+        s += "            sig_off()\n"
+        s += "            with nogil:\n"
+        s += "                if sig_on_nogil():\n"
+        s += "                    {name} = {value}\n"
+        s += "                    sig_off()\n"
+        s += "            sig_on_after_nogil()\n"
+        s += "        else:\n"
+        s += "            {name} = {value}\n"
         return s.format(ctype=self.ctype(), name=self.name, value=value)
 
     def return_code(self, **kwargs):
@@ -50,12 +71,17 @@ class PariReturn(object):
 class PariReturnGEN(PariReturn):
     def ctype(self):
         return "GEN"
-    def return_code(self, dynamic=False):
-        if dynamic:
-            s = "        return new_dynamic_gen({name})\n"
+    def return_code(self, dynamic=False, cached=False):
+        new = "new_dynamic_gen" if dynamic else "new_gen"
+        if not cached:
+            s = "        return {new}({name})\n"
         else:
-            s = "        return new_gen({name})\n"
-        return s.format(name=self.name)
+            # Store the result in the disk cache, see write_method()
+            s  = "        _result = {new}({name})\n"
+            s += "        if _key is not None:\n"
+            s += "            _cache.store(_key, _result)\n"
+            s += "        return _result\n"
+        return s.format(name=self.name, new=new)
 
 class PariReturnmGEN(PariReturn):
     def ctype(self):
@@ -80,8 +106,19 @@ class PariReturnULong(PariReturn):
 class PariReturnVoid(PariReturn):
     def ctype(self):
         return "void"
-    def assign_code(self, value):
-        return "        {value}\n".format(value=value)
+    def assign_code(self, value, nogil=True):
+        if not nogil:
+            return "        {value}\n".format(value=value)
+        s  = "        if release_gil and sig_on_count == 1:\n"
+        s += "            sig_off()\n"
+        s += "            with nogil:\n"
+        s += "                if sig_on_nogil():\n"
+        s += "                    {value}\n"
+        s += "                    sig_off()\n"
+        s += "            sig_on_after_nogil()\n"
+        s += "        else:\n"
+        s += "            {value}\n"
+        return s.format(value=value)
     def return_code(self, **kwargs):
         s = "        clear_stack()\n"
         return s
@@ -0,0 +1,53 @@
+"""
+Benchmark for the asyncio front end of cypari.
+
+Runs factorizations through an AsyncPari while a ticker coroutine
+measures how late the event loop wakes it up, then cancels a
+computation and measures how long it takes to be interrupted.  The
+event loop should stay responsive, with delays of about a millisecond,
+while the workers compute.
+
+Usage: python benchmarks/bench_asyncio.py [thread|process] [workers]
+"""
+
+import asyncio
+import sys
+import time
+from cypari import pari
+from cypari.aio import AsyncPari
+
+numbers = [pari('nextprime(10^%d) * nextprime(10^%d + 10^6)' % (k, k))
+           for k in range(14, 20)]
+
+async def ticker(delays, period=0.01):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(period)
+        delays.append(time.perf_counter() - start - period)
+
+async def main(mode=None, n=2):
+    async with AsyncPari(int(n), mode=mode) as apari:
+        delays = []
+        tick = asyncio.ensure_future(ticker(delays))
+        start = time.perf_counter()
+        results = await asyncio.gather(*[apari.factor(m) for m in numbers])
+        elapsed = time.perf_counter() - start
+        tick.cancel()
+        assert all(r[0, 0] * r[1, 0] == m for r, m in zip(results, numbers))
+        print('%s mode, %d factorizations: %8.2f ms, event loop delay max %6.2f ms'
+              % (apari.mode, len(numbers), 1000 * elapsed, 1000 * max(delays)))
+
+        task = asyncio.ensure_future(apari.factor(2**512 + 1))
+        await asyncio.sleep(0.2)
+        start = time.perf_counter()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await apari.call('x -> x + 1', 1)
+        print('cancellation and next call: %6.2f ms'
+              % (1000 * (time.perf_counter() - start)))
+
+if __name__ == '__main__':
+    asyncio.run(main(*sys.argv[1:]))
@@ -0,0 +1,50 @@
+"""
+Benchmark for the conversion of large integers between Python and PARI.
+
+Measures the time to convert integers of 10^2 to 10^7 bits from Python
+to PARI and back, and from and to gmpy2.mpz if gmpy2 is installed.
+The conversion through a hexadecimal string is shown for comparison.
+
+Usage: python benchmarks/bench_bigint.py [repetitions]
+"""
+
+import sys
+import time
+from cypari import pari
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+def best(f, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main(repeat=5):
+    # Allow the largest integers to fit on the PARI stack
+    pari.allocatemem(2**28, silent=True)
+    for e in range(2, 8):
+        bits = 10**e
+        x = -(3**(bits * 100 // 158) | 1)
+        g = pari(x)
+        assert int(g) == x
+        times = [
+            ('int->Gen', best(lambda: pari(x), repeat)),
+            ('Gen->int', best(lambda: int(g), repeat)),
+            ('hex->Gen', best(lambda: pari('0x' + hex(x)[3:]), repeat)),
+        ]
+        if gmpy2 is not None:
+            m = gmpy2.mpz(x)
+            assert pari(m) == g and gmpy2.mpz(g) == m
+            times.append(('mpz->Gen', best(lambda: pari(m), repeat)))
+            times.append(('Gen->mpz', best(lambda: gmpy2.mpz(g), repeat)))
+        print('10^%d bits: ' % e + ', '.join('%s %9.3f ms' % (label, 1000 * t)
+                                            for label, t in times))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,58 @@
+"""
+Benchmark for the pool of small clones.
+
+Measures the throughput of creating and deleting small Gens, and the
+memory left allocated after deleting every other one of many small
+Gens, with the clone pool enabled and disabled.
+
+Usage: python benchmarks/bench_clone_pool.py [count]
+"""
+
+import resource
+import sys
+import time
+from cypari import pari
+
+def rss_kb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+def throughput(n):
+    a, b = pari(10)**20, pari('Mod(3, 1000003)')
+    v = pari('[1, 2, 3]')
+    start = time.perf_counter()
+    for i in range(n):
+        a + i
+        b * i
+        v * i
+    elapsed = time.perf_counter() - start
+    return 3 * n / elapsed
+
+def fragmentation(n):
+    before = pari.memory_stats()
+    rss = rss_kb()
+    items = [pari(10)**20 + i for i in range(n)]
+    del items[::2]
+    stats = pari.memory_stats()
+    clone_bytes = stats['clone_bytes'] - before['clone_bytes']
+    pool_bytes = stats['pool_bytes'] - before['pool_bytes']
+    used_bytes = stats['pool_used_bytes'] - before['pool_used_bytes']
+    growth = rss_kb() - rss
+    del items
+    return clone_bytes, pool_bytes, used_bytes, growth
+
+def main(n=10**6):
+    limit = pari.get_clone_pool_limit()
+    for words in (0, limit):
+        pari.set_clone_pool_limit(words)
+        label = 'pool limit %2d words' % words
+        print('%s: %10.0f Gens/s' % (label, throughput(n)))
+        clone_bytes, pool_bytes, used_bytes, growth = fragmentation(n)
+        print('%s: %d bytes in live clones, %d pool bytes (%d in use), '
+              'max RSS grew by %d kB' % (label, clone_bytes, pool_bytes,
+                                         used_bytes, growth))
+    pari.set_clone_pool_limit(limit)
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
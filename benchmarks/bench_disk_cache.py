@@ -0,0 +1,44 @@
+"""
+Benchmark for the disk cache of expensive PARI functions.
+
+Times nfinit, bnfinit, ellinit, mfinit and lfuninit without the cache,
+when they are stored in it, and when they are read back from it.
+
+Usage: python benchmarks/bench_disk_cache.py [directory]
+"""
+
+import sys
+import tempfile
+import time
+from cypari import pari
+
+calls = [
+    ('nfinit', lambda: pari.nfinit('polcyclo(60)')),
+    ('bnfinit', lambda: pari.bnfinit('x^6 - 3*x^2 - 1')),
+    ('ellinit', lambda: pari.ellinit([0, 0, 1, -7, 6])),
+    ('mfinit', lambda: pari.mfinit([154, 2])),
+    ('lfuninit', lambda: pari.lfuninit(pari.ellinit([0, 0, 1, -7, 6]), [2, 0, 10])),
+]
+
+def timed(f):
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+def main(directory=None):
+    if directory is None:
+        directory = tempfile.mkdtemp()
+    for name, f in calls:
+        pari.cache_dir(None)
+        plain = timed(f)
+        cache = pari.cache_dir(directory)
+        cache.clear()
+        store = timed(f)
+        load = timed(f)
+        print('%-8s plain %9.2f ms, store %9.2f ms, load %9.2f ms'
+              % (name, 1000 * plain, 1000 * store, 1000 * load))
+    print(cache.stats())
+    pari.cache_dir(None)
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,79 @@
+"""
+Benchmark for files of Gens.
+
+Writes many elliptic curves and polynomials to a file, once as lines
+of text read back with pari(line), and once with cypari.io.GenWriter
+read back with GenReader, with each available compression.  Prints
+the time to write and read each file and its size.
+
+Usage: python benchmarks/bench_gen_io.py [count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from cypari import pari
+from cypari.io import GenWriter, GenReader
+
+def objects(n):
+    curves = [pari.ellinit([0, 0, 1, -i, i // 3]) for i in range(1, n // 2 + 1)]
+    polys = [pari('x^12 + %d*x^7 - %d*x^3 + 1/%d' % (i, 3*i, i + 1))
+             for i in range(n - n // 2)]
+    return curves + polys
+
+def text_write(path, gens):
+    with open(path, 'w') as f:
+        for g in gens:
+            f.write(str(g))
+            f.write('\n')
+
+def text_read(path):
+    with open(path) as f:
+        return [pari(line) for line in f]
+
+def binary_write(path, gens, compression):
+    with GenWriter(path, compression=compression) as w:
+        w.extend(gens)
+
+def binary_read(path):
+    with GenReader(path) as r:
+        return list(r)
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - start
+
+def main(n=20000):
+    gens = objects(n)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'text')
+    _, write = timed(text_write, path, gens)
+    result, read = timed(text_read, path)
+    assert result == gens
+    print('%-12s write %7.1f ms, read %7.1f ms, %9d bytes'
+          % ('text', 1000 * write, 1000 * read, os.path.getsize(path)))
+    for compression in (None, 'zlib', 'zstd'):
+        path = os.path.join(directory, str(compression))
+        try:
+            _, write = timed(binary_write, path, gens, compression)
+        except ImportError:
+            print('%-12s not available' % compression)
+            continue
+        result, read = timed(binary_read, path)
+        assert result == gens
+        print('%-12s write %7.1f ms, read %7.1f ms, %9d bytes'
+              % ('binary/%s' % compression, 1000 * write, 1000 * read,
+                 os.path.getsize(path)))
+        # Random access
+        with GenReader(path) as r:
+            start = time.perf_counter()
+            for i in range(0, len(r), 97):
+                r[i]
+            elapsed = time.perf_counter() - start
+        print('%-12s random access %7.3f ms/record'
+              % ('', 1000 * elapsed / len(range(0, n, 97))))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
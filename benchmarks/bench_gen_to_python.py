@@ -0,0 +1,67 @@
+"""
+Benchmark for gen_to_python on nested vectors.
+
+Compares the conversion by a single traversal of the PARI object with
+the previous implementation, which created a Gen for every component
+and converted it recursively.  The latter is reproduced below using
+the public Gen methods.
+
+Usage: python benchmarks/bench_gen_to_python.py [repetitions]
+"""
+
+import sys
+import time
+from fractions import Fraction
+from cypari import pari
+from cypari._pari import gen_to_python
+
+def old_gen_to_python(z):
+    t = z.type()
+    if t == 't_INT':
+        return int(z)
+    elif t == 't_FRAC':
+        return Fraction(int(z.numerator()), int(z.denominator()))
+    elif t == 't_REAL':
+        return float(z)
+    elif t == 't_COMPLEX':
+        return complex(old_gen_to_python(z.real()),
+                       old_gen_to_python(z.imag()))
+    elif t in ('t_VEC', 't_COL'):
+        return [old_gen_to_python(x) for x in z.python_list()]
+    elif t == 't_VECSMALL':
+        return z.python_list_small()
+    elif t == 't_MAT':
+        nr, nc = z.nrows(), z.ncols()
+        return [[old_gen_to_python(z[i, j]) for j in range(nc)]
+                for i in range(nr)]
+    raise NotImplementedError(t)
+
+inputs = [
+    ('flat small integers', 'vector(10000, i, i)'),
+    ('flat big integers', 'vector(10000, i, 10^40 + i)'),
+    ('rationals', 'vector(10000, i, 1/i)'),
+    ('nested 100x100', 'vector(100, i, vector(100, j, i*j))'),
+    ('nested 10x10x10x10', 'vector(10, a, vector(10, b, vector(10, c, '
+                           'vector(10, d, a+b+c+d))))'),
+    ('matrix 100x100', 'matrix(100, 100, i, j, i - j)'),
+]
+
+def best(f, x, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        f(x)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main(repeat=5):
+    for label, expr in inputs:
+        x = pari(expr)
+        assert gen_to_python(x) == old_gen_to_python(x)
+        new = best(gen_to_python, x, repeat)
+        old = best(old_gen_to_python, x, repeat)
+        print('%-20s old %8.2f ms, new %8.2f ms, speedup %5.1fx'
+              % (label, 1000 * old, 1000 * new, old / new))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,79 @@
+"""
+Leak check for PARI functions returning lazily extended structures.
+
+Repeatedly creates the structures returned by ellinit, bnfinit,
+lfuninit, mfinit and friends, makes PARI fill in their cached data,
+and deletes them.  After a warm-up, the resident set size of the
+process must stay flat, and the number of dynamic clones reported by
+pari.memory_stats() must return to its initial value.
+
+Usage: python benchmarks/bench_lazy_leaks.py [iterations]
+"""
+
+import sys
+import time
+from cypari import pari
+
+def rss_kb():
+    # Current resident set size on Linux, maximum resident set size
+    # elsewhere (which is enough to detect a steady leak).
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        import resource
+        return pages * resource.getpagesize() // 1024
+    except (IOError, OSError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if sys.platform == 'darwin' else rss
+
+def ell():
+    E = pari.ellinit([0, 0, 1, -1, 0])
+    E.ellglobalred()
+    E.ellrootno()
+    E2 = E.ellchangecurve([2, 1, 0, 3])
+    E2.ellrootno()
+
+def bnf():
+    K = pari.bnfinit('y^3 - 2')
+    K.bnfunits()
+    R = pari.bnrinit(K, 6)
+    R.bnrclassfield()
+
+def rnf():
+    K = pari.nfinit('y^2 + 1')
+    R = pari.rnfinit(K, 'x^2 - y')
+    R.rnfeltabstorel('x^2')
+
+def lfun():
+    L = pari.lfuninit(pari.ellinit([0, 0, 1, -1, 0]), [1, 0, 1])
+    pari.lfun(L, 1)
+
+def mf():
+    M = pari.mfinit([23, 2])
+    M.mfeigenbasis()
+    M.mfsplit()
+
+producers = [ell, bnf, rnf, lfun, mf]
+
+def main(n=200, warmup=20, tolerance_kb=2048):
+    leaks = []
+    for produce in producers:
+        for i in range(warmup):
+            produce()
+        dynamic = pari.memory_stats()['dynamic_clones']
+        before = rss_kb()
+        start = time.perf_counter()
+        for i in range(n):
+            produce()
+        elapsed = time.perf_counter() - start
+        growth = rss_kb() - before
+        left = pari.memory_stats()['dynamic_clones'] - dynamic
+        print('%-5s %6.2f ms/iteration, RSS grew by %6d kB, %d dynamic clones left'
+              % (produce.__name__, 1000 * elapsed / n, growth, left))
+        if growth > tolerance_kb or left:
+            leaks.append(produce.__name__)
+    assert not leaks, 'memory leak in: ' + ', '.join(leaks)
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,45 @@
+"""
+Benchmark for pari.map against a Python loop over the methods of pari.
+
+Applies cheap PARI functions to many inputs, once with a list
+comprehension calling the generated method for each input and once
+with pari.map, and reports the time per element of both.
+
+Usage: python benchmarks/bench_map.py [number_of_inputs]
+"""
+
+import sys
+import time
+from cypari import pari
+
+def best(f, repeat=3):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main(n=10**5):
+    ints = list(range(10**12, 10**12 + n))
+    curves = [pari.ellinit([a, 1]) for a in range(1, n // 100 + 1)]
+    pols = list(pari('vector(%d, i, x^4 + i*x + 1)' % (n // 10)))
+    jobs = [
+        ('isprime', ints, (),
+         lambda: [pari.isprime(m) for m in ints]),
+        ('ellap', curves, (10007,),
+         lambda: [pari.ellap(E, 10007) for E in curves]),
+        ('polisirreducible', pols, (),
+         lambda: [pari.polisirreducible(P) for P in pols]),
+    ]
+    for name, seq, args, loop in jobs:
+        batched = lambda: pari.map(name, seq, *args)
+        assert list(batched()) == loop()
+        t_loop = best(loop)
+        t_map = best(batched)
+        print('%-17s %7d inputs: loop %7.3f us, map %7.3f us per element, speedup %4.1fx'
+              % (name, len(seq), 1e6 * t_loop / len(seq), 1e6 * t_map / len(seq),
+                 t_loop / t_map))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,58 @@
+"""
+Benchmark for the parallel GP functions with the pthread engine.
+
+Runs parapply, parvector and parsum on expensive GP closures with 1,
+2, 4, ... threads, up to the number of processors, and reports the
+speedup over a single thread.  On a 16-core machine with libpari built
+with --mt=pthread, the speedup should approach 16.
+
+Usage: python benchmarks/bench_parallel.py [max_threads]
+"""
+
+import os
+import sys
+import time
+from cypari import pari
+
+# 20-digit semiprimes, whose factorization takes a few milliseconds
+semiprimes = pari('vector(64, i, nextprime(10^10 + 1000*i) * nextprime(2*10^10 + 1000*i))')
+
+jobs = [
+    ('parapply factor', lambda: pari.parapply('n -> factor(n)', semiprimes)),
+    ('parvector bnfinit', lambda: pari.parvector(
+        32, 'i -> bnfinit(x^3 - 1000 - 2*i).no')),
+    ('parsum numdiv', lambda: pari.parsum(
+        1, 128, 'i -> numdiv(10^30 + i)')),
+]
+
+def best(f, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main(max_threads=os.cpu_count(), repeat=3):
+    old = pari.get_nbthreads()
+    counts = [1]
+    while 2 * counts[-1] <= max_threads:
+        counts.append(2 * counts[-1])
+    if counts[-1] != max_threads:
+        counts.append(max_threads)
+    try:
+        for label, job in jobs:
+            pari.set_nbthreads(1)
+            expected = job()
+            serial = best(job, repeat)
+            for n in counts:
+                pari.set_nbthreads(n)
+                assert job() == expected
+                t = best(job, repeat)
+                print('%-18s %2d threads %8.2f ms, speedup %5.1fx'
+                      % (label, n, 1000 * t, serial / t))
+    finally:
+        pari.set_nbthreads(old)
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
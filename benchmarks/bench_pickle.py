@@ -0,0 +1,44 @@
+"""
+Benchmark for pickling Gens.
+
+Compares the size and the time to pickle and unpickle number field
+structures with the binary serialization of Gen.to_bytes() and with
+the previous method, which used repr() and the GP parser.
+
+Usage: python benchmarks/bench_pickle.py [repetitions]
+"""
+
+import pickle
+import sys
+import time
+from cypari import pari
+from cypari._pari import objtogen
+
+def best(f, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+inputs = [
+    ('nfinit deg 8', lambda: pari.nfinit('polcyclo(32)')),
+    ('bnfinit deg 6', lambda: pari.bnfinit('x^6 - 3*x^2 - 1')),
+    ('vector of reals', lambda: pari('vector(10^5, i, sqrt(i))')),
+]
+
+def main(repeat=5):
+    for label, make in inputs:
+        x = make()
+        binary = pickle.dumps(x, protocol=5)
+        text = pickle.dumps(repr(x))
+        assert pickle.loads(binary) == x
+        t_binary = (best(lambda: pickle.dumps(x, protocol=5), repeat)
+                    + best(lambda: pickle.loads(binary), repeat))
+        t_text = best(lambda: objtogen(repr(x)), repeat)
+        print('%-16s binary %9d bytes %8.2f ms, repr %9d bytes %8.2f ms'
+              % (label, len(binary), 1000 * t_binary, len(text), 1000 * t_text))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,53 @@
+"""
+Benchmark for cypari.pool.PariPool.
+
+Compares a PariPool with the usual hand-rolled multiprocessing.Pool,
+whose workers receive each input as a string, parse it with pari() and
+send back the string of the result, to be parsed again by the parent.
+Many small tasks (factoring 20-digit integers) show the cost of the
+round trips, and fewer large results (bnfinit) the cost of printing
+and parsing them.
+
+Usage: python benchmarks/bench_pool.py [processes]
+"""
+
+import os
+import sys
+import time
+import multiprocessing
+from cypari import pari
+from cypari.pool import PariPool
+
+def repr_task(args):
+    # What everyone writes: strings in, strings out
+    name, s = args
+    from cypari import pari
+    return str(getattr(pari, name)(pari(s)))
+
+def repr_map(pool, name, inputs, chunksize):
+    out = pool.map(repr_task, [(name, str(x)) for x in inputs], chunksize)
+    return [pari(s) for s in out]
+
+workloads = [
+    ('factor', [pari(10**19 + 7 * i) for i in range(20000)], 500),
+    ('bnfinit', [pari('x^3 - %d' % (1002 + 2 * i)) for i in range(200)], 4),
+]
+
+def main(processes=os.cpu_count()):
+    for name, inputs, chunksize in workloads:
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            expected = repr_map(pool, name, inputs, chunksize)
+        old = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with PariPool(processes) as pool:
+            result = list(pool.map(name, inputs, chunksize=chunksize))
+        new = time.perf_counter() - start
+
+        assert [str(r) for r in result] == [str(e) for e in expected]
+        print('%-8s %6d tasks: repr pool %7.2f s, PariPool %7.2f s, speedup %5.1fx'
+              % (name, len(inputs), old, new, old / new))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,53 @@
+"""
+Benchmark for Gens which refer to components of other Gens.
+
+Measures the Python memory used per Gen returned by indexing or
+iterating a PARI vector, and the throughput of iterating a vector.
+
+Usage: python benchmarks/bench_refs.py [length]
+"""
+
+import sys
+import time
+import tracemalloc
+from cypari import pari
+
+def memory_per_item(make, n):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = make()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return (after - before) / n
+
+def main(n=10**6):
+    v = pari('vector(%d, i, i)' % n)
+    print('vector of length %d' % n)
+
+    start = time.perf_counter()
+    for x in v:
+        pass
+    elapsed = time.perf_counter() - start
+    print('iteration:        %10.0f items/s' % (n / elapsed))
+
+    start = time.perf_counter()
+    for i in range(n):
+        v[i]
+    elapsed = time.perf_counter() - start
+    print('indexing:         %10.0f items/s' % (n / elapsed))
+
+    w = pari('vector(%d, i, i)' % n)
+    print('bytes per item (iteration): %6.1f' % memory_per_item(lambda: list(w), n))
+    w = pari('vector(%d, i, i)' % n)
+    print('bytes per item (indexing):  %6.1f' % memory_per_item(
+        lambda: [w[i] for i in range(n)], n))
+
+    m = int(n ** 0.5)
+    start = time.perf_counter()
+    pari.matrix(m, m, range(m * m))
+    elapsed = time.perf_counter() - start
+    print('pari.matrix(%d, %d): %.3f s' % (m, m, elapsed))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,40 @@
+"""
+Benchmark for the batched conversion of lists of Python numbers.
+
+Compares pari(list) and per-entry conversion back to Python with
+pari.vec_from_ints(), pari.vec_from_floats(), pari.vec_from_fractions(),
+Gen.to_ints() and Gen.to_floats().
+
+Usage: python benchmarks/bench_sequences.py [length]
+"""
+
+import sys
+import time
+from fractions import Fraction
+from cypari import pari
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - start
+
+def compare(label, generic, batched, *args):
+    a, t_generic = timed(generic, *args)
+    b, t_batched = timed(batched, *args)
+    assert a == b
+    print('%-20s generic %8.1f ms, batched %8.1f ms, speedup %5.1fx'
+          % (label, 1000 * t_generic, 1000 * t_batched, t_generic / t_batched))
+    return b
+
+def main(n=10**6):
+    ints = list(range(-n // 2, n // 2))
+    floats = [i / 7 for i in ints]
+    fractions = [Fraction(i, 7) for i in ints[:n // 10]]
+    v = compare('ints to PARI', pari, pari.vec_from_ints, ints)
+    compare('ints from PARI', lambda v: [int(x) for x in v], lambda v: v.to_ints(), v)
+    v = compare('floats to PARI', pari, pari.vec_from_floats, floats)
+    compare('floats from PARI', lambda v: [float(x) for x in v], lambda v: v.to_floats(), v)
+    compare('fractions to PARI', pari, pari.vec_from_fractions, fractions)
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
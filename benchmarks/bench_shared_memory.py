@@ -0,0 +1,43 @@
+"""
+Benchmark for sending a large Gen to worker processes.
+
+A large bnfinit structure is sent to every process of a pool, once
+as a pickled argument and once as the name of a shared memory block
+written by Gen.to_shared_memory().
+
+Usage: python benchmarks/bench_shared_memory.py [workers]
+"""
+
+import multiprocessing
+import sys
+import time
+from cypari import pari
+
+def from_pickle(K):
+    return len(K)
+
+def from_shared_memory(name):
+    return len(pari.from_shared_memory(name))
+
+def main(workers=8):
+    K = pari.bnfinit('x^8 - 3*x^4 + 7', 1)
+    print('structure of %d bytes' % len(K.to_bytes()))
+    with multiprocessing.Pool(workers) as pool:
+        pool.map(abs, range(workers))   # start the workers
+        start = time.perf_counter()
+        pool.map(from_pickle, [K] * workers)
+        t_pickle = time.perf_counter() - start
+
+        start = time.perf_counter()
+        shm = K.to_shared_memory()
+        try:
+            pool.map(from_shared_memory, [shm.name] * workers)
+        finally:
+            shm.close()
+            shm.unlink()
+        t_shared = time.perf_counter() - start
+    print('%d workers: pickle %8.1f ms, shared memory %8.1f ms'
+          % (workers, 1000 * t_pickle, 1000 * t_shared))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
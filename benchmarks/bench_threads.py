@@ -0,0 +1,50 @@
+"""
+Benchmark for the threaded mode.
+
+Runs the same batch of independent PARI computations with 1, 2, 4, ...
+Python threads, with the threaded mode off (the threads take turns
+holding the GIL) and on (each thread computes on its own PARI stack
+without the GIL).  Needs a PARI library built with the pthread engine.
+
+Usage: python benchmarks/bench_threads.py [jobs] [max_threads]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cypari import pari
+
+def job(i):
+    # Factor a product of two primes of about 70 bits
+    p = pari.nextprime(2**70 + 1000 * i)
+    q = pari.nextprime(2**71 + 3000 * i)
+    return pari.factor(p * q)
+
+def run(jobs, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(job, range(jobs)))
+    return time.perf_counter() - start, results
+
+def main(jobs=64, max_threads=os.cpu_count()):
+    _, expected = run(jobs, 1)
+    threads = 1
+    while threads <= max_threads:
+        line = '%3d threads:' % threads
+        for threaded in (False, True):
+            try:
+                pari.set_threaded(threaded)
+            except RuntimeError:
+                line += ' threaded mode not available'
+                continue
+            elapsed, results = run(jobs, threads)
+            assert results == expected
+            line += ' %s %8.1f ms' % ('GIL released' if threaded else 'GIL held',
+                                       1000 * elapsed)
+        print(line)
+        threads *= 2
+    pari.set_threaded(False)
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -118,7 +118,7 @@ if [ $(uname) = "Darwin" ] ; then
     export CFLAGS="-arch x86_64 -arch arm64 -mmacosx-version-min=10.9"
 # For debugging:
 #   export CFLAGS="-g -arch x86_64 -arch arm64 -mmacosx-version-min=10.9"
-    ./Configure --host=universal-darwin --prefix=${PARIPREFIX} --with-gmp=${GMPPREFIX}
+    ./Configure --host=universal-darwin --prefix=${PARIPREFIX} --with-gmp=${GMPPREFIX} --mt=pthread
     cd Odarwin-universal
     make install
     make install-lib-sta
@@ -141,7 +141,7 @@ elif [ `python -c "import sys; print(sys.platform)"` = 'win32' ] ; then
     make install-bin-sta
 else
 # linux
-    ./Configure --prefix=${PARIPREFIX} --libdir=${PARILIBDIR} --with-gmp=${GMPPREFIX}
+    ./Configure --prefix=${PARIPREFIX} --libdir=${PARILIBDIR} --with-gmp=${GMPPREFIX} --mt=pthread
     make install
     make install-lib-sta
 fi
@@ -1,6 +1,6 @@
 # These should be sufficient for most people.
-from cypari._pari import PariError, pari
-__all__ = ['PariError', 'pari']
+from cypari._pari import PariError, AlarmInterrupt, pari
+__all__ = ['PariError', 'AlarmInterrupt', 'pari']
 # These might come in handy for tinkerers.
 from cypari._pari import (prec_words_to_dec, prec_words_to_bits, prec_bits_to_dec, prec_dec_to_bits)
 # Also, we should make the version available.
@@ -7,12 +7,19 @@ cdef class RingElement:
 cdef class Gen_base(RingElement):
     cdef GEN g
     cdef int is_ref
-    cdef dict refers_to
+    # For a Gen pointing into another Gen, the Gen owning the memory
+    cdef Gen_base owner
+    # Objects which must stay alive as long as self, in slot n for
+    # component n (allocated lazily)
+    cdef list refers_to
     cdef int is_dynamic
+    # Whether g is a clone made by clone_gen(), which self must free;
+    # pooled clones do not have PARI's clone bit (see stack.pyx)
+    cdef int is_clone
 
 @cython.final
 cdef class Gen(Gen_base):
-    pass
+    cdef move_to_heap(self)
 
 cpdef Gen objtogen(s)
 
@@ -48,7 +55,7 @@ cdef Gen new_gen_noclear(GEN x)
 cdef void clear_stack()
 
 cdef void _pari_init_error_handling()
-cdef int _pari_err_handle(GEN E) except 0
+cdef int _pari_err_handle(GEN E) except 0 with gil
 cdef void _pari_err_recover(long errnum)
 
 cdef extern from *:
@@ -72,6 +79,12 @@ cdef extern from *:
     int sig_str_no_except "sig_str"(char*) nogil
     int sig_check_no_except "sig_check"() nogil
 
+    # sig_on() for a computation made without the GIL, which returns 0
+    # when interrupted, and sig_on() again once the GIL is held, which
+    # raises the exception for the interruption (see macros.h)
+    int sig_on_nogil() nogil
+    int sig_on_after_nogil() except 0
+
     # Do we need to declare these?
     # void print_backtrace() nogil
     # void _sig_on_interrupt_received() nogil
@@ -90,6 +103,8 @@ cdef inline void cython_check_exception() except * nogil:
 cdef extern from "struct_signals.h":
     ctypedef struct cysigs_t:
         int sig_on_count
+        int interrupt_received
+        int block_sigint
         const char* s
 
 #cdef api:
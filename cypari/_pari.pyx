@@ -69,6 +69,7 @@ from cpython.unicode cimport PyUnicode_Check
 from cpython.float cimport PyFloat_AS_DOUBLE
 from cpython.complex cimport PyComplex_RealAsDouble, PyComplex_ImagAsDouble
 from cpython.object cimport Py_EQ, Py_NE, Py_LE, Py_GE, Py_LT, Py_GT
+from cpython.buffer cimport PyBUF_WRITABLE, PyBUF_FORMAT, PyBUF_ND, PyBUF_STRIDES
 
 from .paridecl cimport *
 from .paripriv cimport *
@@ -86,6 +87,8 @@ from .paripriv cimport *
 
 cimport libc.stdlib
 from libc.stdio cimport *
+from libc.string cimport memcpy, memset, memcmp
+from libc.stdint cimport int64_t, uint64_t, INT64_MAX
 
 cdef String(x):
     """
@@ -118,6 +121,8 @@ include "memory.pxi"
 include "signals.pyx"
 init_cysignals()
 include "stack.pyx"
+include "deadline.pyx"
+include "disk_cache.pyx"
 include "pari_instance.pyx"
 # Instantiate an instance of the Pari class
 cdef Pari pari_instance = Pari()
@@ -0,0 +1,376 @@
+r"""
+PARI computations for asyncio
+
+An :class:`AsyncPari` runs PARI computations in worker threads or
+worker processes and returns awaitables, so that a long computation
+does not block the event loop. Cancelling the task awaiting a
+computation interrupts it, like ``Ctrl-C`` interrupts a computation in
+the main thread, and the worker stays available for the next calls.
+
+    >>> import asyncio
+    >>> from cypari.aio import AsyncPari
+    >>> async def main():
+    ...     async with AsyncPari(2) as apari:
+    ...         K = await apari.bnfinit('y^2 + 23')
+    ...         print(K.bnf_get_no())
+    ...         print(await apari.call('x -> x^2 + 1', 5))
+    ...         try:
+    ...             # Far too long: the computation is interrupted
+    ...             await asyncio.wait_for(apari.factor(2**512 + 1), 0.5)
+    ...         except asyncio.TimeoutError:
+    ...             print('timeout')
+    ...         print(await apari.factor(2**64 + 1))
+    >>> asyncio.run(main())
+    3
+    26
+    timeout
+    [274177, 1; 67280421310721, 1]
+
+The method :meth:`Pari.acall` uses a default :class:`AsyncPari`::
+
+    >>> asyncio.run(pari.acall('nextprime', 10**20))
+    100000000000000000039
+"""
+
+import asyncio
+import atexit
+import functools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ._pari import (pari, thread_interrupt_handle, interrupt_thread,
+                    discard_thread_interrupt)
+from .pool import _init_worker, _call
+
+__all__ = ['AsyncPari']
+
+# Worker processes block SIGINT except while they compute
+_block_interrupts = hasattr(signal, 'pthread_sigmask')
+
+# The number of open AsyncPari in thread mode, and whether the threaded
+# mode of PARI was on before the first of them turned it on
+_thread_lock = threading.Lock()
+_thread_users = 0
+_was_threaded = False
+
+
+def _start_threaded():
+    global _thread_users, _was_threaded
+    with _thread_lock:
+        if not _thread_users:
+            _was_threaded = pari.set_threaded(True)
+        _thread_users += 1
+
+
+def _stop_threaded():
+    global _thread_users
+    with _thread_lock:
+        _thread_users -= 1
+        if not _thread_users:
+            pari.set_threaded(_was_threaded)
+
+
+class _Interrupted(Exception):
+    """
+    Raised by a worker whose computation was interrupted, normally
+    because the task awaiting it was cancelled.
+    """
+    def __str__(self):
+        return "the PARI computation was interrupted"
+
+
+class _Call(object):
+    """
+    State of a call, shared by the coroutine awaiting it and the worker
+    thread running it. ``target`` is what :meth:`AsyncPari._interrupt`
+    needs to interrupt the computation, while it runs.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cancelled = False
+        self.target = None
+
+    def start(self, target):
+        with self.lock:
+            if self.cancelled:
+                raise _Interrupted
+            self.target = target
+
+
+def _worker_main(conn, initargs):
+    """
+    Main function of a worker process: run the requests received
+    through ``conn`` until it is closed.
+    """
+    if _block_interrupts:
+        signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGINT])
+    _init_worker(*initargs)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = _run_request(*request)
+        except KeyboardInterrupt:
+            # An interrupt which came just after the computation
+            reply = (False, _Interrupted())
+        try:
+            conn.send(reply)
+        except Exception as e:
+            conn.send((False, RuntimeError("cannot send the result: {}".format(e))))
+
+
+def _run_request(task, args, kwargs):
+    """
+    Run one request in a worker process, allowing interrupts during the
+    computation only.
+    """
+    if _block_interrupts:
+        # Discard an interrupt which was meant for the previous request
+        if signal.SIGINT in signal.sigpending():
+            signal.sigwait([signal.SIGINT])
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, [signal.SIGINT])
+    try:
+        return (True, _call(task, args, kwargs))
+    except KeyboardInterrupt:
+        return (False, _Interrupted())
+    except Exception as e:
+        return (False, e)
+    finally:
+        if _block_interrupts:
+            signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGINT])
+
+
+class _Worker(object):
+    """
+    A worker process and the connection to it.
+    """
+    def __init__(self, context, initargs):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main,
+                                       args=(child, initargs), daemon=True)
+        self.process.start()
+        child.close()
+
+    def close(self):
+        self.conn.close()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class AsyncPari(object):
+    """
+    Run PARI computations in ``n`` worker threads or processes, and
+    return awaitables for their results.
+
+    INPUT:
+
+    - ``n`` -- (default: the number of processors) the number of
+      computations which can run at the same time
+
+    - ``mode`` -- (default: ``'process'``) ``'process'`` or
+      ``'thread'``; thread mode needs PARI to be built with thread
+      support
+
+    - ``mp_context`` -- (default: ``None``) in process mode, the
+      multiprocessing context used to start the workers
+
+    - other keyword arguments set up the worker processes, as for
+      :class:`cypari.pool.PariPool`: ``init``, ``size``, ``sizemax``,
+      ``maxprime``, ``precision``, ``nbthreads`` and ``scripts``
+
+    In process mode, the worker processes are started when they are
+    first needed, and the arguments and results are sent through pipes,
+    in the binary format of :meth:`Gen.to_bytes`.  In thread mode, the
+    computations share the Gens of the calling thread, and the threaded
+    mode of PARI (see :meth:`Pari.set_threaded`) is turned on for the
+    whole process until :meth:`close` is called, so that the other
+    threads are not blocked while PARI computes.
+    A call is given like a task of :class:`cypari.pool.PariPool`: the
+    name of a method of ``pari`` or a GP expression, with its
+    arguments.  Methods of ``pari`` can also be called directly, as in
+    ``await apari.bnfinit(pol)``.
+
+    Cancelling the task awaiting a computation interrupts it, which
+    raises :class:`asyncio.CancelledError` in the task. On Windows, a
+    worker process whose computation is cancelled is restarted.
+    """
+    def __init__(self, n=None, mode='process', mp_context=None, init=None,
+                 size=0, sizemax=0, maxprime=0, precision=0, nbthreads=1,
+                 scripts=()):
+        if n is None:
+            n = os.cpu_count() or 1
+        settings = (init is not None or size or sizemax or maxprime or
+                    precision or scripts)
+        if mode == 'thread':
+            if settings:
+                raise ValueError("worker settings are only supported in process mode")
+            _start_threaded()
+        elif mode != 'process':
+            raise ValueError("mode must be 'thread' or 'process'")
+        self.mode = mode
+        self._closed = False
+        self._threads = ThreadPoolExecutor(n)
+        if mode == 'thread':
+            return
+        self._context = mp_context or multiprocessing.get_context()
+        self._initargs = (size, sizemax, maxprime, precision, nbthreads,
+                          tuple(os.fspath(s) for s in scripts), init)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = n
+        self._started = 0
+
+    def __repr__(self):
+        return "AsyncPari({}, mode={!r})".format(self._threads._max_workers, self.mode)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not hasattr(pari, name):
+            raise AttributeError(name)
+        return functools.partial(self.call, name)
+
+    async def call(self, task, *args, **kwargs):
+        """
+        Run ``task`` with the given arguments in a worker and return its
+        result.
+        """
+        loop = asyncio.get_running_loop()
+        state = _Call()
+        if self.mode == 'thread':
+            run = self._run_thread
+        else:
+            run = self._run_process
+        future = loop.run_in_executor(self._threads, run, state, task, args, kwargs)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self._interrupt(state)
+            future.cancel()
+            raise
+
+    def _run_thread(self, state, task, args, kwargs):
+        """
+        Run a call in a worker thread.
+        """
+        state.start(thread_interrupt_handle())
+        try:
+            return _call(task, args, kwargs)
+        except KeyboardInterrupt:
+            # Raising KeyboardInterrupt in the event loop would stop it
+            raise _Interrupted
+        finally:
+            with state.lock:
+                state.target = None
+                if state.cancelled:
+                    discard_thread_interrupt()
+
+    def _run_process(self, state, task, args, kwargs):
+        """
+        Run a call in a worker process, from a worker thread.
+        """
+        worker = self._get_worker()
+        try:
+            state.start(worker)
+            try:
+                worker.conn.send((task, args, kwargs))
+                ok, value = worker.conn.recv()
+            finally:
+                with state.lock:
+                    state.target = None
+        except (EOFError, OSError):
+            # The worker was terminated or died
+            worker.close()
+            worker = _Worker(self._context, self._initargs)
+            if state.cancelled:
+                raise _Interrupted
+            raise RuntimeError("a PARI worker process died")
+        finally:
+            self._idle.put(worker)
+        if ok:
+            return value
+        raise value
+
+    def _get_worker(self):
+        """
+        Return an idle worker process, starting a new one if all those
+        started so far are busy.
+        """
+        with self._lock:
+            start = self._idle.empty() and self._started < self._workers
+            if start:
+                self._started += 1
+        if not start:
+            return self._idle.get()
+        try:
+            return _Worker(self._context, self._initargs)
+        except BaseException:
+            with self._lock:
+                self._started -= 1
+            raise
+
+    def _interrupt(self, state):
+        """
+        Interrupt the computation of a cancelled call.
+        """
+        with state.lock:
+            state.cancelled = True
+            target = state.target
+            if target is None:
+                return
+            if self.mode == 'thread':
+                interrupt_thread(target)
+            elif _block_interrupts:
+                os.kill(target.process.pid, signal.SIGINT)
+            else:
+                target.process.terminate()
+
+    def close(self):
+        """
+        Stop the workers, after the running computations.  In thread
+        mode, the threaded mode of PARI is turned off again once no
+        other :class:`AsyncPari` in thread mode is open, unless it was
+        on before.
+        """
+        self._threads.shutdown()
+        if self._closed:
+            return
+        self._closed = True
+        if self.mode == 'process':
+            while not self._idle.empty():
+                self._idle.get().close()
+        else:
+            _stop_threaded()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+_default = None
+
+
+def default_async_pari():
+    """
+    Return the :class:`AsyncPari` used by :meth:`Pari.acall`, created
+    on first use with the default settings.  Its worker processes are
+    started as calls need them, and stopped when Python exits.
+    """
+    global _default
+    if _default is None:
+        _default = AsyncPari()
+        atexit.register(_default.close)
+    return _default
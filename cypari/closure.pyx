@@ -45,10 +45,11 @@ from cpython.tuple cimport *
 from cpython.object cimport PyObject_Call
 from cpython.ref cimport Py_INCREF
 
-cdef inline GEN call_python_func_impl "call_python_func"(GEN* args, object py_func) except NULL:
+cdef GEN call_python_func_impl "call_python_func"(GEN* args, object py_func) except NULL with gil:
     """
     Call ``py_func(*args)`` where ``py_func`` is a Python function
     and ``args`` is an array of ``GEN``s terminated by ``NULL``.
+    The GIL is taken, since PARI computes without it in threaded mode.
 
     The arguments are converted from ``GEN`` to a Sage ``gen`` before
     calling ``py_func``. The result is converted back to a PARI ``GEN``.
@@ -103,6 +104,13 @@ cdef GEN call_python(GEN arg1, GEN arg2, GEN arg3, GEN arg4, GEN arg5, ulong py_
     args[4] = arg5
     args[5] = NULL
 
+    # The threads started by the parallel GP functions (parapply,
+    # parvector...) cannot run Python code: they hold neither the GIL
+    # nor a Python thread state, and the main thread which started them
+    # holds the GIL while it waits for them.
+    if cypari_thread_kind == CYPARI_THREAD_NEW:
+        pari_err(e_MISC, "Python functions cannot be called by parallel GP functions")
+
     sig_block()
     # Disallow interrupts during the Python code inside
     # call_python_func_impl(). We need to do this because this function
@@ -170,11 +178,28 @@ cpdef Gen objtoclosure(f):
         Traceback (most recent call last):
         ...
         PariError: call_python: forbidden multiplication t_VEC (1 elts) * t_VEC (1 elts)
+
+    The parallel GP functions cannot call Python functions from the
+    threads they start::
+
+        sage: square = objtoclosure(lambda i: i*i)
+        sage: try:
+        ....:     old = pari.set_nbthreads(2)
+        ....: except RuntimeError:  # PARI built without threads
+        ....:     old = None
+        sage: try:
+        ....:     r = pari.parapply(square, [1, 2, 3])
+        ....: except PariError as e:
+        ....:     r = e.errtext()
+        sage: r == [1, 4, 9] if old is None else "cannot be called" in r
+        True
+        sage: if old is not None:
+        ....:     _ = pari.set_nbthreads(old)
     """
     sig_on()
     # Convert f to a t_INT containing the address of f
     cdef GEN f_int = utoi(<ulong><PyObject*>f)
     # Create a t_CLOSURE which calls call_python() with py_func equal to f
     cdef Gen c = new_gen(snm_closure(ep_call_python, mkvec(f_int)))
-    c.refers_to = {0:f}  # c needs to keep a reference to f
+    c.refers_to = [f]  # c needs to keep a reference to f
     return c
@@ -50,7 +50,13 @@ from .stack cimport new_gen
 
 from cpython.version cimport PY_MAJOR_VERSION
 from cpython.ref cimport PyObject
-from cpython.long cimport PyLong_FromLongLong
+from cpython.long cimport (PyLong_FromLongLong, PyLong_AsLongAndOverflow,
+    PyLong_CheckExact)
+from cpython.float cimport PyFloat_Check, PyFloat_CheckExact
+from cpython.complex cimport PyComplex_CheckExact
+from cpython.buffer cimport (PyObject_GetBuffer, PyBuffer_Release,
+    PyBUF_RECORDS_RO, PyBUF_SIMPLE)
+from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AS_STRING
 from cpython.longintrepr cimport (_PyLong_New, digit, PyLong_SHIFT,
     PyLong_MASK, py_long)
 
@@ -59,8 +65,13 @@ cdef extern from "pylong_support.h":
     void CyPari_SetSignAndDigitCount(py_long o, int sign, Py_ssize_t size)
     Py_ssize_t CyPari_DigitCount(py_long op)
     Py_ssize_t CyPari_Sign(object op)
+    object CyPari_FromBytes(const unsigned char* b, size_t n, int little_endian)
+    int CyPari_AsBytes(object op, unsigned char* b, size_t n, int little_endian)
     cdef int LLONG_MAX, LLONG_MIN
 
+cdef extern from "Python.h":
+    int PY_LITTLE_ENDIAN
+
 ####################################
 # Integers
 ####################################
@@ -83,20 +94,76 @@ cpdef integer_to_gen(x):
         ...
         TypeError: integer_to_gen() needs an int or long argument, not float
 
+    Integers in the range of the small integer cache (see
+    :meth:`Pari.set_small_int_range`) are not converted at all; the
+    interned Gen is returned::
+
+        sage: integer_to_gen(int(42)) is integer_to_gen(int(42))
+        True
+
     TESTS::
 
         sage: for i in range(10000):
         ....:     x = 3**i
         ....:     if int(pari(x)) != x:
         ....:         print(x)
+        sage: for i in range(1000):
+        ....:     x = -2**(16*i) + i
+        ....:     if int(pari(x)) != x or pari(x) != pari(-2)**(16*i) + i:
+        ....:         print(x)
     """
+    cdef int overflow
+    cdef long n
+    cdef Gen g
     if isinstance(x, int):
+        n = PyLong_AsLongAndOverflow(x, &overflow)
+        if not overflow:
+            g = small_int_from_long(n)
+            if g is not None:
+                return g
         sig_on()
         return new_gen(PyLong_AsGEN(x))
     
     raise TypeError(f"integer_to_gen() needs an int argument, not {type(x).__name__}")
 
+cdef int INT_byte_order():
+    """
+    Return 1 if the words of every ``t_INT`` form its absolute value in
+    little-endian byte order, 0 if they form it in big-endian byte
+    order and -1 otherwise.
+
+    The order of the words depends on the PARI kernel (least
+    significant word first with GMP, last with the native kernel).
+    """
+    cdef bint lsw_first = int_nextW(gen_1) == gen_1 + 1
+    if lsw_first and PY_LITTLE_ENDIAN:
+        return 1
+    if not lsw_first and not PY_LITTLE_ENDIAN:
+        return 0
+    return -1
+
+# If this is not -1, the words of a t_INT can be copied as a whole by
+# CyPari_FromBytes() and CyPari_AsBytes()
+cdef int INT_BYTE_ORDER = INT_byte_order()
+
 cdef PyLong_FromINT(GEN g):
+    cdef Py_ssize_t sizedigits
+    if INT_BYTE_ORDER < 0:
+        return PyLong_FromINT_digits(g)
+
+    x = CyPari_FromBytes(<unsigned char*>(g + 2),
+                         (lgefint(g) - 2) * (BITS_IN_LONG // 8), INT_BYTE_ORDER)
+    if signe(g) > 0:
+        return x
+    # Negate in place, unless x might be one of the cached small
+    # integers which have only one digit
+    sizedigits = CyPari_DigitCount(<py_long>x)
+    if sizedigits > 1:
+        CyPari_SetSignAndDigitCount(<py_long>x, -1, sizedigits)
+        return x
+    return -x
+
+cdef PyLong_FromINT_digits(GEN g):
     # Size of input in words, bits and Python digits. The size in
     # digits might be a small over-estimation, but that is not a
     # problem.
@@ -207,8 +274,12 @@ cpdef gen_to_integer(Gen x):
         ....:                 print(N1, type(N1), N2, type(N2))
     """
     # First convert the input to a t_INT
-    cdef GEN g = gtoi(x.g)
+    return INT_to_python(gtoi(x.g))
 
+cdef INT_to_python(GEN g):
+    """
+    Convert the ``t_INT`` `g` to a Python integer.
+    """
     if not signe(g):
         return 0
 
@@ -256,6 +327,39 @@ cdef GEN gtoi(GEN g0) except NULL:
 
 
 cdef GEN PyLong_AsGEN(py_long x):
+    if INT_BYTE_ORDER < 0:
+        return PyLong_AsGEN_digits(x)
+
+    cdef Py_ssize_t sign = CyPari_Sign(<object>x)
+    if sign == 0:
+        return gen_0
+
+    # Room for the absolute value of x and for the sign bit of its
+    # two's complement representation
+    cdef size_t sizebits = CyPari_DigitCount(x) * PyLong_SHIFT + 1
+    cdef size_t sizewords = (sizebits + BITS_IN_LONG - 1) // BITS_IN_LONG
+    cdef GEN g = cgeti(sizewords + 2)
+    g[1] = evalsigne(1) + evallgefint(sizewords + 2)
+    # This cannot fail since the buffer is large enough
+    CyPari_AsBytes(<object>x, <unsigned char*>(g + 2),
+                   sizewords * (BITS_IN_LONG // 8), INT_BYTE_ORDER)
+
+    # Negate the two's complement representation of a negative x
+    cdef size_t i
+    cdef GEN ptr
+    cdef bint carry = True
+    if sign < 0:
+        ptr = int_LSW(g)
+        for i in range(sizewords):
+            ptr[0] = ~(<ulong>ptr[0]) + carry
+            carry = carry and ptr[0] == 0
+            ptr = int_nextW(ptr)
+        setsigne(g, -1)
+
+    # Remove the leading zero words
+    return int_normalize(g, 0)
+
+cdef GEN PyLong_AsGEN_digits(py_long x):
     cdef const digit* D = OB_DIGIT(x)
 
     # Size of the input
@@ -334,6 +438,90 @@ cdef GEN PyLong_AsGEN(py_long x):
     return g
 
 
+####################################
+# gmpy2 integers
+####################################
+
+# Integers of type gmpy2.mpz are converted through the portable binary
+# format of gmpy2, which consists of a byte 1 (the code of mpz), a byte
+# 0, 1 or 2 for a zero, positive or negative number and the bytes of
+# the absolute value in little-endian order. This way, the digits are
+# copied by a single mpz_export() or mpz_import() without needing the
+# C API of gmpy2 at compile time.
+
+cdef inline bint is_mpz(x):
+    """
+    Return whether `x` is a ``gmpy2.mpz``. This does not import gmpy2.
+    """
+    gmpy2 = sys.modules.get('gmpy2')
+    return gmpy2 is not None and type(x) is gmpy2.mpz
+
+cdef Gen mpz_to_gen(x):
+    """
+    Convert the ``gmpy2.mpz`` `x` to a PARI ``t_INT``.
+    """
+    from gmpy2 import to_binary
+    cdef bytes b = to_binary(x)
+    cdef const unsigned char* p = b
+    cdef size_t n = len(b) - 2
+    cdef size_t W = BITS_IN_LONG // 8
+    cdef size_t nwords = (n + W - 1) // W
+    cdef size_t i
+    cdef GEN g
+    if p[1] == 0:
+        return integer_to_gen(0)
+
+    sig_on()
+    g = cgeti(nwords + 2)
+    g[1] = evalsigne(1 if p[1] == 1 else -1) + evallgefint(nwords + 2)
+    if INT_BYTE_ORDER == 1:
+        int_MSW(g)[0] = 0
+        memcpy(g + 2, p + 2, n)
+    else:
+        for i in range(nwords):
+            int_W(g, i)[0] = bytes_to_word(p + 2 + i * W, min(W, n - i * W))
+    return new_gen(int_normalize(g, 0))
+
+cdef inline ulong bytes_to_word(const unsigned char* p, size_t n):
+    """
+    Return the word made of the `n` bytes at `p` in little-endian order.
+    """
+    cdef ulong w = 0
+    cdef size_t k
+    for k in range(n):
+        w |= (<ulong>p[k]) << (8 * k)
+    return w
+
+cpdef gen_to_mpz(Gen x):
+    """
+    Convert a PARI object to a ``gmpy2.mpz``, like :func:`gen_to_integer`
+    converts it to a Python integer.
+    """
+    return INT_to_mpz(gtoi(x.g))
+
+cdef INT_to_mpz(GEN g):
+    """
+    Convert the ``t_INT`` `g` to a ``gmpy2.mpz``.
+    """
+    from gmpy2 import from_binary
+    cdef size_t W = BITS_IN_LONG // 8
+    cdef size_t nwords = lgefint(g) - 2
+    cdef size_t i, k
+    cdef ulong w
+    b = PyBytes_FromStringAndSize(NULL, nwords * W + 2)
+    cdef unsigned char* p = <unsigned char*>PyBytes_AS_STRING(b)
+    p[0] = 1
+    p[1] = 0 if signe(g) == 0 else 1 if signe(g) > 0 else 2
+    if INT_BYTE_ORDER == 1:
+        memcpy(p + 2, g + 2, nwords * W)
+    else:
+        for i in range(nwords):
+            w = int_W(g, i)[0]
+            for k in range(W):
+                p[2 + i * W + k] = (w >> (8 * k)) & 0xFF
+    return from_binary(b)
+
+
 ####################################
 # Other basic types
 ####################################
@@ -360,7 +548,7 @@ cdef Gen new_t_POL_from_int_star(int* vals, unsigned long length, long varnum):
     return new_gen(z)
 
 
-cdef Gen new_gen_from_double(double x):
+cdef GEN double_to_GEN(double x):
     # Pari has an odd concept where it attempts to track the accuracy
     # of floating-point 0; a floating-point zero might be 0.0e-20
     # (meaning roughly that it might represent any number in the
@@ -374,23 +562,20 @@ cdef Gen new_gen_from_double(double x):
     # So we translate 0 into a floating-point 0 with 53 bits
     # of precision (that's the number of mantissa bits in an IEEE
     # double).
-    cdef GEN g, G
+    cdef GEN g
     global prec
-    
-    sig_on()
+
     if x == 0:
         g = real_0_bit(-53)
     else:
         g = dbltor(x)
     if prec - 2 == 64 / BITS_IN_LONG:
-        return new_gen(g)
+        return g
     else:
-        G = bitprecision0(g, (prec - 2)*BITS_IN_LONG)
-        return new_gen(G)
+        return bitprecision0(g, (prec - 2)*BITS_IN_LONG)
 
-cdef Gen new_t_COMPLEX_from_double(double re, double im):
-    sig_on()
-    cdef GEN g = cgetg(3, t_COMPLEX), G
+cdef GEN complex_to_GEN(double re, double im):
+    cdef GEN g = cgetg(3, t_COMPLEX)
     if re == 0:
         set_gel(g, 1, gen_0)
     else:
@@ -400,10 +585,330 @@ cdef Gen new_t_COMPLEX_from_double(double re, double im):
     else:
         set_gel(g, 2, dbltor(im))
     if prec - 2 == 64 / BITS_IN_LONG:
-        return new_gen(g)
+        return g
     else:
-        G = bitprecision0(g, (prec - 2)*BITS_IN_LONG)
-        return new_gen(G)
+        return bitprecision0(g, (prec - 2)*BITS_IN_LONG)
+
+cdef Gen new_gen_from_double(double x):
+    sig_on()
+    return new_gen(double_to_GEN(x))
+
+cdef Gen new_t_COMPLEX_from_double(double re, double im):
+    sig_on()
+    return new_gen(complex_to_GEN(re, im))
+
+
+####################################
+# Buffers
+####################################
+
+cdef enum:
+    # Kinds of buffer items
+    ITEM_SIGNED = 0
+    ITEM_UNSIGNED = 1
+    ITEM_FLOAT = 2
+    ITEM_COMPLEX = 3
+
+cdef int buffer_item_kind(Py_buffer* view) except -1:
+    """
+    Return the kind of the items of `view`, which must be native
+    integers or floating point numbers.
+    """
+    cdef bytes fmt = view.format if view.format is not NULL else b"B"
+    # Only native byte order is supported
+    if fmt[:1] in (b"@", b"="):
+        fmt = fmt[1:]
+    elif fmt[:1] == (b"<" if sys.byteorder == "little" else b">"):
+        fmt = fmt[1:]
+    if fmt in (b"b", b"h", b"i", b"l", b"q", b"n"):
+        return ITEM_SIGNED
+    if fmt in (b"B", b"H", b"I", b"L", b"Q", b"N"):
+        return ITEM_UNSIGNED
+    if fmt in (b"f", b"d"):
+        return ITEM_FLOAT
+    if fmt in (b"Zf", b"Zd"):
+        return ITEM_COMPLEX
+    raise TypeError("cannot convert a buffer of format {!r} to PARI".format(fmt.decode("ascii")))
+
+cdef GEN double_to_GEN_bits(double x, long bits):
+    """
+    Convert `x` to a ``t_REAL`` with `bits` bits of precision, or
+    with the default precision if `bits` is 0 (see :func:`double_to_GEN`).
+    """
+    if bits == 0:
+        return double_to_GEN(x)
+    if x == 0:
+        return real_0_bit(-bits)
+    return bitprecision0(dbltor(x), bits)
+
+cdef inline GEN ulonglong_to_GEN(unsigned long long x):
+    """
+    Convert `x` to a ``t_INT``, also when a PARI word has 32 bits.
+    """
+    if sizeof(ulong) >= sizeof(unsigned long long):
+        return utoi(<ulong>x)
+    return uutoi(<ulong>(x >> 32), <ulong>(x & 0xFFFFFFFFUL))
+
+cdef inline GEN longlong_to_GEN(long long x):
+    """
+    Convert `x` to a ``t_INT``, also when a PARI word has 32 bits.
+    """
+    cdef unsigned long long u
+    if sizeof(long) >= sizeof(long long):
+        return stoi(<long>x)
+    if x >= 0:
+        return ulonglong_to_GEN(<unsigned long long>x)
+    u = -<unsigned long long>x
+    return uutoineg(<ulong>(u >> 32), <ulong>(u & 0xFFFFFFFFUL))
+
+cdef inline GEN buffer_item_to_GEN(char* p, int kind, Py_ssize_t size, long bits):
+    """
+    Convert the buffer item at `p` to a PARI ``t_INT``, ``t_REAL`` or
+    ``t_COMPLEX``.  Floating point numbers get `bits` bits of precision
+    (the default precision if `bits` is 0).
+    """
+    cdef GEN z
+    if kind == ITEM_FLOAT:
+        if size == sizeof(double):
+            return double_to_GEN_bits((<double*>p)[0], bits)
+        return double_to_GEN_bits((<float*>p)[0], bits)
+    if kind == ITEM_COMPLEX:
+        z = cgetg(3, t_COMPLEX)
+        if size == 2 * sizeof(double):
+            set_gel(z, 1, double_to_GEN_bits((<double*>p)[0], bits))
+            set_gel(z, 2, double_to_GEN_bits((<double*>p)[1], bits))
+        else:
+            set_gel(z, 1, double_to_GEN_bits((<float*>p)[0], bits))
+            set_gel(z, 2, double_to_GEN_bits((<float*>p)[1], bits))
+        return z
+    if kind == ITEM_UNSIGNED:
+        if size == 8:
+            return ulonglong_to_GEN((<unsigned long long*>p)[0])
+        if size == 4:
+            return utoi((<unsigned int*>p)[0])
+        if size == 2:
+            return utoi((<unsigned short*>p)[0])
+        return utoi((<unsigned char*>p)[0])
+    if size == 8:
+        return longlong_to_GEN((<long long*>p)[0])
+    if size == 4:
+        return stoi((<int*>p)[0])
+    if size == 2:
+        return stoi((<short*>p)[0])
+    return stoi((<signed char*>p)[0])
+
+cdef inline bint buffer_item_fits_word(char* p, int kind, Py_ssize_t size):
+    """
+    Return whether the integer buffer item at `p` fits in a PARI word.
+    """
+    cdef unsigned long long word_max = (<pari_ulongword>-1) >> 1
+    cdef long long x
+    if kind == ITEM_UNSIGNED:
+        if size == 8:
+            return (<unsigned long long*>p)[0] <= word_max
+        if size == 4:
+            return (<unsigned int*>p)[0] <= word_max
+        return True
+    if size == 8:
+        x = (<long long*>p)[0]
+        return -<long long>word_max - 1 <= x <= <long long>word_max
+    return True
+
+cdef inline pari_longword buffer_item_to_word(char* p, int kind, Py_ssize_t size):
+    """
+    Return the integer buffer item at `p` as a PARI word, which it
+    must fit in (see :func:`buffer_item_fits_word`).
+    """
+    if kind == ITEM_UNSIGNED:
+        if size == 8:
+            return <pari_longword>(<unsigned long long*>p)[0]
+        if size == 4:
+            return (<unsigned int*>p)[0]
+        if size == 2:
+            return (<unsigned short*>p)[0]
+        return (<unsigned char*>p)[0]
+    if size == 8:
+        return <pari_longword>(<long long*>p)[0]
+    if size == 4:
+        return (<int*>p)[0]
+    if size == 2:
+        return (<short*>p)[0]
+    return (<signed char*>p)[0]
+
+cdef Gen buffer_to_gen(obj, str type, long bits):
+    """
+    Convert an object supporting the buffer protocol, whose items
+    are integers, floating point or complex numbers, to a ``t_VECSMALL``,
+    ``t_VEC``, ``t_COL`` or ``t_MAT`` (see :meth:`Pari.from_buffer`).
+    """
+    cdef Py_buffer view
+    cdef int kind
+    cdef long t
+    cdef Py_ssize_t i, j, m, n, size
+    cdef char* p
+    cdef GEN v, col
+    if type == "vecsmall":
+        t = t_VECSMALL
+    elif type == "vec":
+        t = t_VEC
+    elif type == "col":
+        t = t_COL
+    elif type == "mat":
+        t = t_MAT
+    else:
+        raise ValueError("type must be 'vecsmall', 'vec', 'col' or 'mat', not {!r}".format(type))
+    PyObject_GetBuffer(obj, &view, PyBUF_RECORDS_RO)
+    try:
+        kind = buffer_item_kind(&view)
+        size = view.itemsize
+        if t == t_MAT:
+            if view.ndim != 2:
+                raise ValueError("a PARI t_MAT needs a 2-dimensional buffer, not {}-dimensional".format(view.ndim))
+        elif view.ndim != 1:
+            raise ValueError("a PARI {} needs a 1-dimensional buffer, not {}-dimensional".format(
+                "t_VECSMALL" if t == t_VECSMALL else "t_" + type.upper(), view.ndim))
+        if t == t_VECSMALL:
+            if kind == ITEM_FLOAT or kind == ITEM_COMPLEX:
+                raise TypeError("a PARI t_VECSMALL cannot hold floating point numbers")
+            n = view.shape[0]
+            # Check the range before entering sig_on()
+            if size >= sizeof(pari_longword):
+                for i in range(n):
+                    p = <char*>view.buf + i * view.strides[0]
+                    if not buffer_item_fits_word(p, kind, size):
+                        raise OverflowError("entry {} does not fit in a PARI t_VECSMALL".format(i))
+            sig_on()
+            v = cgetg(n + 1, t_VECSMALL)
+            for i in range(n):
+                p = <char*>view.buf + i * view.strides[0]
+                v[i + 1] = buffer_item_to_word(p, kind, size)
+            return new_gen(v)
+        if t != t_MAT:
+            n = view.shape[0]
+            sig_on()
+            v = cgetg(n + 1, t)
+            for i in range(n):
+                p = <char*>view.buf + i * view.strides[0]
+                set_gel(v, i + 1, buffer_item_to_GEN(p, kind, size, bits))
+            return new_gen(v)
+        m = view.shape[0]
+        n = view.shape[1]
+        sig_on()
+        v = cgetg(n + 1, t_MAT)
+        for j in range(n):
+            col = cgetg(m + 1, t_COL)
+            set_gel(v, j + 1, col)
+            for i in range(m):
+                p = <char*>view.buf + i * view.strides[0] + j * view.strides[1]
+                set_gel(col, i + 1, buffer_item_to_GEN(p, kind, size, bits))
+        return new_gen(v)
+    finally:
+        PyBuffer_Release(&view)
+
+
+#################################################
+# Python numbers as operands of PARI operations #
+#################################################
+
+cdef inline bint is_python_number(x):
+    """
+    Return whether `x` is exactly a Python ``int``, ``float`` or
+    ``complex``, that is, an object which :func:`python_number_to_GEN`
+    can convert.
+
+    Subclasses are excluded since they might define ``_pari_()``,
+    which :func:`objtogen` gives priority over the basic types.
+    """
+    return PyLong_CheckExact(x) or PyFloat_CheckExact(x) or PyComplex_CheckExact(x)
+
+cdef GEN python_number_to_GEN(x):
+    """
+    Convert a Python number `x` (see :func:`is_python_number`) to a
+    GEN on the PARI stack. This must be called inside ``sig_on()``.
+
+    This is meant for operands of arithmetic operations: unlike
+    :func:`objtogen`, no Gen is created, so the operand is discarded
+    together with the PARI stack when the result is constructed.
+    """
+    if PyLong_CheckExact(x):
+        return int_to_GEN(x)
+    if PyFloat_CheckExact(x):
+        return double_to_GEN(PyFloat_AS_DOUBLE(x))
+    return complex_to_GEN(PyComplex_RealAsDouble(x), PyComplex_ImagAsDouble(x))
+
+
+cdef inline GEN int_to_GEN(x):
+    """
+    Convert the Python ``int`` `x` to a ``t_INT`` on the PARI stack.
+    This must be called inside ``sig_on()``.
+    """
+    cdef int overflow
+    cdef long n = PyLong_AsLongAndOverflow(x, &overflow)
+    if not overflow:
+        return stoi(n)
+    return PyLong_AsGEN(x)
+
+
+#################################
+# Sequences of Python numbers   #
+#################################
+
+cdef enum:
+    SEQ_INTS
+    SEQ_FLOATS
+    SEQ_FRACTIONS
+
+cdef Gen sequence_to_gen(seq, int kind, long bits):
+    """
+    Convert the sequence `seq` of Python numbers to a ``t_VEC``. All
+    entries must be of the type given by `kind`: ``int`` for
+    ``SEQ_INTS``, ``float`` for ``SEQ_FLOATS`` (converted to ``t_REAL``
+    with `bits` bits of precision, see :func:`double_to_GEN_bits`) and
+    ``int`` or ``Fraction`` for ``SEQ_FRACTIONS``.
+
+    The vector is built on the PARI stack and copied to the heap as a
+    whole, without creating a Gen for each entry.
+    """
+    cdef list L = seq if type(seq) is list else list(seq)
+    cdef Py_ssize_t i, n = len(L)
+    cdef list dens
+    if kind == SEQ_FRACTIONS:
+        # Read the attributes of the fractions before sig_on(), since
+        # this runs Python code
+        from fractions import Fraction
+        dens = [None] * n
+        L = list(L)
+        for i in range(n):
+            x = L[i]
+            if isinstance(x, Fraction):
+                L[i] = x.numerator
+                if x.denominator != 1:
+                    dens[i] = x.denominator
+            elif not PyLong_Check(x):
+                raise TypeError(f"entry {i} is of type {type(x).__name__}, "
+                                "not int or Fraction")
+
+    cdef GEN v
+    sig_on()
+    v = cgetg(n + 1, t_VEC)
+    for i in range(n):
+        x = L[i]
+        if kind == SEQ_FLOATS:
+            if not PyFloat_Check(x):
+                break
+            set_gel(v, i + 1, double_to_GEN_bits(PyFloat_AS_DOUBLE(x), bits))
+        elif not PyLong_Check(x):
+            break
+        elif kind == SEQ_FRACTIONS and dens[i] is not None:
+            set_gel(v, i + 1, mkfrac(int_to_GEN(x), int_to_GEN(dens[i])))
+        else:
+            set_gel(v, i + 1, int_to_GEN(x))
+    else:
+        return new_gen(v)
+
+    clear_stack()
+    raise TypeError(f"entry {i} is of type {type(x).__name__}, "
+                    f"not {'float' if kind == SEQ_FLOATS else 'int'}")
 
 
 ####################################
@@ -436,9 +941,23 @@ cpdef gen_to_python(Gen z):
 
     - a string for strings (type ``t_STR``)
 
+    - a tuple ``('t_POL', v, c)`` for polynomials, where ``v`` is the
+      name of the variable and ``c`` the list of coefficients, starting
+      with the constant term
+
+    - a tuple ``('t_INTMOD', a, n)`` for ``Mod(a, n)``
+
+    - a tuple ``('t_POLMOD', a, T)`` for ``Mod(a, T)``
+
+    - a tuple ``('t_PADIC', p, v, r, u)`` for the `p`-adic number
+      `p^v u + O(p^{v+r})`
+
     - other PARI types are not supported and the function will raise a
       ``NotImplementedError``
 
+    The object is converted by a single traversal of the PARI object,
+    without creating a :class:`Gen` for its components.
+
     EXAMPLES::
 
         sage: from cypari._pari import gen_to_python
@@ -552,53 +1071,296 @@ cpdef gen_to_python(Gen z):
         sage: type(a)
         <... 'str'>
 
+    Converting polynomials, modular objects and `p`-adic numbers::
+
+        sage: gen_to_python(pari('2*y^3 - 1/2*y'))
+        ('t_POL', 'y', [0, Fraction(-1, 2), 0, 2])
+        sage: gen_to_python(pari('Mod(3, 7)'))
+        ('t_INTMOD', 3, 7)
+        sage: gen_to_python(pari('Mod(x + 1, x^2 + 1)'))
+        ('t_POLMOD', ('t_POL', 'x', [1, 1]), ('t_POL', 'x', [1, 0, 1]))
+        sage: gen_to_python(pari('12 + O(2^13)'))
+        ('t_PADIC', 2, 2, 11, 3)
+        sage: gen_to_python(pari('[Mod(1, 2), x]'))
+        [('t_INTMOD', 1, 2), ('t_POL', 'x', [0, 1])]
+
     Some currently unsupported types::
 
-        sage: z = pari('x')
+        sage: z = pari('x + O(x^2)')
         sage: z.type()
-        't_POL'
+        't_SER'
         sage: gen_to_python(z)
         Traceback (most recent call last):
         ...
-        NotImplementedError: conversion not implemented for t_POL
-
-        sage: z = pari('12 + O(2^13)')
-        sage: z.type()
-        't_PADIC'
-        sage: gen_to_python(z)
+        NotImplementedError: conversion not implemented for t_SER
+        sage: gen_to_python(pari('[1, x + O(x^2)]'))
         Traceback (most recent call last):
         ...
-        NotImplementedError: conversion not implemented for t_PADIC
+        NotImplementedError: conversion not implemented for t_SER
+    """
+    return GEN_to_python(z.g, {})
+
+cdef GEN_to_python(GEN g, dict var_names):
+    """
+    Convert `g` to a Python object as described in :func:`gen_to_python`.
+    The names of the variables of polynomials are cached in
+    `var_names` during one conversion.
     """
-    cdef GEN g = z.g
     cdef long t = typ(g)
     cdef Py_ssize_t i, j, nr, nc
 
     if t == t_INT:
-        return gen_to_integer(z)
+        return INT_to_python(g)
     elif t == t_FRAC:
         from fractions import Fraction
-        num = gen_to_integer(z.numerator())
-        den = gen_to_integer(z.denominator())
-        return Fraction(num, den)
+        return Fraction(INT_to_python(gel(g, 1)), INT_to_python(gel(g, 2)))
     elif t == t_REAL:
         return rtodbl(g)
     elif t == t_COMPLEX:
-        return complex(gen_to_python(z.real()), gen_to_python(z.imag()))
+        return complex(GEN_to_python(gel(g, 1), var_names),
+                       GEN_to_python(gel(g, 2), var_names))
     elif t == t_VEC or t == t_COL:
-        return [gen_to_python(x) for x in z.python_list()]
+        return [GEN_to_python(gel(g, i), var_names) for i in range(1, lg(g))]
     elif t == t_VECSMALL:
-        return z.python_list_small()
+        return [g[i] for i in range(1, lg(g))]
     elif t == t_MAT:
-        nc = lg(g)-1
-        nr = 0 if nc == 0 else lg(gel(g,1))-1
-        return [[gen_to_python(z[i,j]) for j in range(nc)] for i in range(nr)]
+        nc = lg(g) - 1
+        nr = 0 if nc == 0 else lg(gel(g, 1)) - 1
+        return [[GEN_to_python(gcoeff(g, i, j), var_names) for j in range(1, nc + 1)]
+                for i in range(1, nr + 1)]
     elif t == t_INFINITY:
         if inf_get_sign(g) >= 0:
             return float('inf')
         else:
             return -float('inf')
     elif t == t_STR:
-        return str(z)
+        return String(GSTR(g))
+    elif t == t_POL:
+        return ('t_POL', var_name(varn(g), var_names),
+                [GEN_to_python(gel(g, i), var_names) for i in range(2, lg(g))])
+    elif t == t_INTMOD:
+        return ('t_INTMOD', INT_to_python(gel(g, 2)), INT_to_python(gel(g, 1)))
+    elif t == t_POLMOD:
+        return ('t_POLMOD', GEN_to_python(gel(g, 2), var_names),
+                GEN_to_python(gel(g, 1), var_names))
+    elif t == t_PADIC:
+        return ('t_PADIC', INT_to_python(gel(g, 2)), valp(g), precp(g),
+                INT_to_python(gel(g, 4)))
     else:
-        raise NotImplementedError(f"conversion not implemented for {z.type()}")
+        raise NotImplementedError(f"conversion not implemented for {type_name(t).decode('ascii')}")
+
+cdef var_name(long v, dict var_names):
+    """
+    Return the name of the PARI variable number `v`, looking it up in
+    `var_names` first.
+    """
+    cdef char* c
+    name = var_names.get(v)
+    if name is None:
+        sig_on()
+        # GENtostr() uses malloc(), see Gen.__repr__
+        sig_block()
+        c = GENtostr(pol_x(v))
+        sig_unblock()
+        clear_stack()
+        name = var_names[v] = String(c)
+        pari_free(c)
+    return name
+
+
+########################
+# Binary serialization #
+########################
+
+# A Gen is serialized as a header, followed by the fields len, x and
+# base of the GENbin made by copy_bin_canon() and by the len words of
+# the copy. The header consists of GEN_BYTES_MAGIC, the format version,
+# the size of a word in bytes, 0 or 1 for little-endian or big-endian
+# words and the flags GEN_BYTES_DYNAMIC, padded to GEN_BYTES_HEADER
+# bytes. GEN_BYTES_DYNAMIC marks a structure created by obj_init, as
+# for a Gen created by new_dynamic_gen(). Integers are stored in the
+# canonical order of their words, so the data can be read with both
+# the GMP and the native PARI kernel, like the files of writebin().
+cdef const char* GEN_BYTES_MAGIC = "CyPari"  # 7 bytes with the final NUL
+cdef enum:
+    GEN_BYTES_VERSION = 1
+    GEN_BYTES_HEADER = 16
+    GEN_BYTES_DYNAMIC = 1
+
+cdef GENbin* gen_to_bin(Gen x) except NULL:
+    """
+    Return the binary copy of `x` made by ``copy_bin_canon()``, which
+    must be freed with ``pari_free()``.
+    """
+    cdef GENbin* p
+    sig_on()
+    # copy_bin_canon() uses malloc(), see Gen.__repr__
+    sig_block()
+    p = copy_bin_canon(x.g)
+    sig_unblock()
+    sig_off()
+    return p
+
+cdef inline size_t bin_serialized_size(GENbin* p):
+    """
+    Return the size in bytes of the serialization of `p`.
+    """
+    return GEN_BYTES_HEADER + (3 + p.len) * sizeof(pari_longword)
+
+cdef void bin_serialize(GENbin* p, char* s, bint dynamic):
+    """
+    Write the serialization of `p` to `s`, which must have room for
+    ``bin_serialized_size(p)`` bytes, flagged as a structure created
+    by ``obj_init`` if `dynamic` is true.
+    """
+    cdef size_t W = sizeof(pari_longword)
+    cdef pari_ulongword fields[3]
+    memset(s, 0, GEN_BYTES_HEADER)
+    memcpy(s, GEN_BYTES_MAGIC, 7)
+    s[7] = GEN_BYTES_VERSION
+    s[8] = W
+    s[9] = 0 if PY_LITTLE_ENDIAN else 1
+    s[10] = GEN_BYTES_DYNAMIC if dynamic else 0
+    s += GEN_BYTES_HEADER
+    fields[0] = p.len
+    fields[1] = <pari_ulongword>p.x
+    fields[2] = <pari_ulongword>p.base
+    memcpy(s, fields, 3 * W)
+    memcpy(s + 3 * W, GENbinbase(p), p.len * W)
+
+cdef size_t serialized_size(const char* s, size_t n) except 0:
+    """
+    Check the header of the serialized Gen at `s`, of which `n` bytes
+    are available, and return the size of the serialization.
+    """
+    cdef size_t W = sizeof(pari_longword)
+    cdef pari_ulongword fields[3]
+    if n < GEN_BYTES_HEADER + 3 * W or memcmp(s, GEN_BYTES_MAGIC, 7) != 0:
+        raise ValueError("not a serialized PARI object")
+    if s[7] != GEN_BYTES_VERSION:
+        raise ValueError(f"unsupported version {s[7]} of serialized PARI object")
+    if s[8] != W or s[9] != (0 if PY_LITTLE_ENDIAN else 1):
+        raise ValueError("serialized PARI object was made on an "
+                         "incompatible architecture")
+    memcpy(fields, s + GEN_BYTES_HEADER, 3 * W)
+    cdef size_t length = fields[0]
+    cdef GEN x = <GEN>fields[1]
+    cdef GEN base = <GEN>fields[2]
+    if (length > n or n < GEN_BYTES_HEADER + (3 + length) * W
+            or (x is not NULL and not (base <= x < base + length))):
+        raise ValueError("corrupt serialized PARI object")
+    return GEN_BYTES_HEADER + (3 + length) * W
+
+cdef Gen serialized_to_gen(const char* s):
+    """
+    Convert the serialized Gen at `s`, which has been checked by
+    :func:`serialized_size`, to a Gen.
+
+    This does what ``bin_copy()`` does for a ``GENbin``: the data is
+    copied to the PARI stack once and relocated there.
+    """
+    cdef size_t W = sizeof(pari_longword)
+    cdef pari_ulongword fields[3]
+    memcpy(fields, s + GEN_BYTES_HEADER, 3 * W)
+    cdef size_t length = fields[0]
+    cdef GEN x = <GEN>fields[1]
+    cdef GEN base = <GEN>fields[2]
+    cdef GEN y
+    sig_on()
+    if x is NULL:
+        return new_gen(gen_0)
+    y = new_chunk(length)
+    memcpy(y, s + GEN_BYTES_HEADER + 3 * W, length * W)
+    y += x - base
+    shiftaddress_canon(y, <long>(<char*>y - <char*>x))
+    if s[10] & GEN_BYTES_DYNAMIC:
+        # A structure like nfinit() returns, to which PARI attaches
+        # more data later
+        return new_dynamic_gen(y)
+    return new_gen(y)
+
+cpdef bytes gen_to_bytes(Gen x):
+    """
+    Serialize `x` to a ``bytes`` object, which can be converted back
+    by :func:`bytes_to_gen` (see :meth:`Gen.to_bytes`).
+    """
+    cdef GENbin* p = gen_to_bin(x)
+    cdef bytes b
+    try:
+        b = PyBytes_FromStringAndSize(NULL, bin_serialized_size(p))
+        bin_serialize(p, PyBytes_AS_STRING(b), x.is_dynamic)
+    finally:
+        pari_free(p)
+    return b
+
+cpdef Gen bytes_to_gen(data):
+    """
+    Convert the output of :func:`gen_to_bytes`, given as any object
+    supporting the buffer protocol, back to a Gen (see
+    :meth:`Pari.from_bytes`).
+    """
+    cdef Py_buffer view
+    PyObject_GetBuffer(data, &view, PyBUF_SIMPLE)
+    try:
+        if serialized_size(<char*>view.buf, view.len) != <size_t>view.len:
+            raise ValueError("corrupt serialized PARI object")
+        return serialized_to_gen(<char*>view.buf)
+    finally:
+        PyBuffer_Release(&view)
+
+cdef gen_to_shared_memory(Gen x, name):
+    """
+    Serialize `x` to a new ``multiprocessing.shared_memory.SharedMemory``
+    block (see :meth:`Gen.to_shared_memory`).
+    """
+    from multiprocessing.shared_memory import SharedMemory
+    cdef Py_buffer view
+    cdef GENbin* p = gen_to_bin(x)
+    try:
+        shm = SharedMemory(name=name, create=True, size=bin_serialized_size(p))
+        try:
+            PyObject_GetBuffer(shm.buf, &view, PyBUF_SIMPLE | PyBUF_WRITABLE)
+            try:
+                bin_serialize(p, <char*>view.buf, x.is_dynamic)
+            finally:
+                PyBuffer_Release(&view)
+        except BaseException:
+            # Do not leave a block nobody knows the name of
+            shm.close()
+            shm.unlink()
+            raise
+    finally:
+        pari_free(p)
+    return shm
+
+cdef Gen shared_memory_to_gen(name):
+    """
+    Convert the Gen serialized in the shared memory block `name` by
+    :func:`gen_to_shared_memory` back to a Gen (see
+    :meth:`Pari.from_shared_memory`).
+    """
+    from multiprocessing.shared_memory import SharedMemory
+    cdef Py_buffer view
+    try:
+        # Do not let the resource tracker of this process destroy the
+        # block when this process exits (Python 3.13 and later)
+        shm = SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = SharedMemory(name=name)
+        # Before Python 3.13, attaching to a block registers it with
+        # the resource tracker on POSIX systems, which would unlink it
+        # when this process exits, while other processes still use it.
+        if sys.platform != "win32":
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        PyObject_GetBuffer(shm.buf, &view, PyBUF_SIMPLE)
+        try:
+            # The block may be larger than requested, the size of the
+            # data is given by its header
+            serialized_size(<char*>view.buf, view.len)
+            return serialized_to_gen(<char*>view.buf)
+        finally:
+            PyBuffer_Release(&view)
+    finally:
+        shm.close()
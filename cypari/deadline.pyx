@@ -0,0 +1,219 @@
+"""
+Time limits for PARI computations.
+
+A :class:`Deadline` arms the interval timers of the process, so that a
+computation which runs for too long, in wall-clock time or in CPU time,
+is interrupted by ``SIGALRM`` or ``SIGVTALRM``.  Inside ``sig_on()``,
+these signals raise :class:`AlarmInterrupt` and jump back out of PARI,
+like ``signal.alarm``.
+"""
+
+#*****************************************************************************
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#                  http://www.gnu.org/licenses/
+#*****************************************************************************
+
+from libc.math cimport INFINITY, ceil
+import threading
+from time import monotonic
+try:
+    from resource import getrusage, RUSAGE_SELF
+    from signal import getitimer, setitimer, ITIMER_REAL, ITIMER_VIRTUAL
+except ImportError:  # Windows
+    getrusage = None
+
+# The deadlines which are open, the innermost one last.  The real timer
+# (ITIMER_REAL) is armed for the earliest wall-clock end among them, and
+# the virtual timer (ITIMER_VIRTUAL) for the earliest CPU time end.
+cdef list deadlines = []
+
+# The timers which were armed when the outermost deadline was entered,
+# for instance by signal.alarm(), as ((end, interval), (end, interval))
+# for the real and the virtual timer, with an end of INFINITY if the
+# timer was not armed.  They keep running while deadlines are open.
+cdef tuple saved_timers = None
+
+# Whether the real and the virtual timer are armed for a deadline,
+# rather than for a saved timer.
+cdef bint real_for_deadline = False
+cdef bint virtual_for_deadline = False
+
+
+cdef double cpu_time() except? -1:
+    """
+    Return the user CPU time of the process (of all its threads), which
+    is what the virtual timer measures.
+    """
+    return getrusage(RUSAGE_SELF).ru_utime
+
+
+cdef tuple saved_timer(int which, double now):
+    delay, interval = getitimer(which)
+    return (now + delay if delay else INFINITY, interval)
+
+
+cdef double saved_end(tuple saved, double now):
+    """
+    Return the next end of a saved timer.  A timer which has already
+    expired does not expire again, unless it is periodic.
+    """
+    end, interval = saved
+    if end <= now:
+        if interval:
+            end += ceil((now - end) / interval) * interval
+        else:
+            end = INFINITY
+    return end
+
+
+cdef int set_timer(int which, double now, double deadline_end, tuple saved) except -1:
+    """
+    Arm the timer ``which`` for the earliest of ``deadline_end`` and the
+    timer which was armed before the deadlines.  Return whether it was
+    armed for ``deadline_end``.
+    """
+    cdef double end = saved_end(saved, now)
+    interval = saved[1]
+    cdef bint for_deadline = deadline_end <= end
+    if for_deadline:
+        end = deadline_end
+        interval = 0
+    if end == INFINITY:
+        setitimer(which, 0)
+        return False
+    # A deadline which has already passed expires at once
+    setitimer(which, max(end - now, 1e-6), interval)
+    return for_deadline
+
+
+cdef tuple deadline_ends():
+    """
+    Return the earliest wall-clock end and CPU time end of the open
+    deadlines.
+    """
+    cdef double wall_end = INFINITY, cpu_end = INFINITY
+    cdef Deadline d
+    for d in deadlines:
+        wall_end = min(wall_end, d.wall_end)
+        cpu_end = min(cpu_end, d.cpu_end)
+    return (wall_end, cpu_end)
+
+
+cdef int arm_timers() except -1:
+    """
+    Arm the timers for the open deadlines and the saved timers.
+    """
+    global real_for_deadline, virtual_for_deadline
+    wall_end, cpu_end = deadline_ends()
+    real_for_deadline = set_timer(ITIMER_REAL, monotonic(), wall_end, saved_timers[0])
+    virtual_for_deadline = set_timer(ITIMER_VIRTUAL, cpu_time(), cpu_end, saved_timers[1])
+    return 0
+
+
+cdef void discard_alarm(bint real, bint virtual) noexcept:
+    """
+    Discard a timer interrupt which was received but not acted upon
+    yet, if it came from a timer armed for a deadline: the real timer
+    if `real` is true, the virtual timer if `virtual` is true.
+    """
+    global PARI_SIGINT_pending
+    if ((real and cysigs.interrupt_received == SIGALRM) or
+        (virtual and cysigs.interrupt_received == SIGVTALRM)):
+        cysigs.interrupt_received = 0
+        PARI_SIGINT_pending = 0
+
+
+cdef void recover_from_alarm() noexcept:
+    """
+    Reset the GP evaluator and the PARI stack after a computation was
+    interrupted, unless the deadline is used by a Python function
+    called from PARI, which is still computing.
+
+    An interrupt jumps back to ``sig_on()`` from anywhere in PARI,
+    leaving behind the frames and local variables of the GP functions
+    which were running.  PARI errors reset them the same way.
+    """
+    global avma
+    if cysigs.sig_on_count > 0:
+        return
+    evalstate_reset()
+    if stack_floor:
+        avma = stack_floor
+    else:
+        avma = pari_mainstack.top
+
+
+cdef class Deadline:
+    """
+    Context manager returned by :meth:`Pari.deadline`.
+
+    On entry, the timers are armed so that :class:`AlarmInterrupt` is
+    raised once ``seconds`` of wall-clock time or ``cpu`` seconds of
+    CPU time have passed (``None`` means no limit).  On exit, they are
+    armed again for the enclosing deadlines, if any, or for the timer
+    which was running before, unless it has expired in the meantime
+    and is not periodic.  After an :class:`AlarmInterrupt`, the
+    attribute ``expired`` tells whether this deadline was the one which
+    expired, rather than an enclosing one.
+    """
+    cdef readonly object seconds
+    cdef readonly object cpu
+    cdef readonly bint expired
+    cdef double wall_end
+    cdef double cpu_end
+    cdef bint entered
+
+    def __init__(self, seconds=None, cpu=None):
+        if (seconds is not None and seconds < 0) or (cpu is not None and cpu < 0):
+            raise ValueError("time limits must be nonnegative")
+        self.seconds = seconds
+        self.cpu = cpu
+        self.wall_end = self.cpu_end = INFINITY
+
+    def __repr__(self):
+        return "Deadline(seconds={!r}, cpu={!r})".format(self.seconds, self.cpu)
+
+    def __enter__(self):
+        global saved_timers
+        if self.entered:
+            raise RuntimeError("this deadline has already been entered")
+        if getrusage is None:
+            raise RuntimeError("deadlines are not supported on this platform")
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("deadlines can only be used in the main thread")
+        cdef double now = monotonic(), now_cpu = cpu_time()
+        if self.seconds is not None:
+            self.wall_end = now + self.seconds
+        if self.cpu is not None:
+            self.cpu_end = now_cpu + self.cpu
+        if not deadlines:
+            saved_timers = (saved_timer(ITIMER_REAL, now),
+                            saved_timer(ITIMER_VIRTUAL, now_cpu))
+        self.entered = True
+        deadlines.append(self)
+        arm_timers()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global saved_timers
+        setitimer(ITIMER_REAL, 0)
+        setitimer(ITIMER_VIRTUAL, 0)
+        # A deadline which expired after the block ended is disregarded;
+        # arm_timers() sets the timers again for the deadlines which are
+        # still open, even if they have expired.  A saved timer which
+        # expired is not: it is raised once the block is left.
+        discard_alarm(real_for_deadline, virtual_for_deadline)
+        deadlines.remove(self)
+        if exc_type is not None and issubclass(exc_type, AlarmInterrupt):
+            # Timers do not expire early, allow for the rounding of
+            # getrusage() only
+            self.expired = (monotonic() >= self.wall_end or
+                            cpu_time() >= self.cpu_end - 1e-3)
+            recover_from_alarm()
+        arm_timers()
+        if not deadlines:
+            saved_timers = None
+        return False
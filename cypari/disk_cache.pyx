@@ -0,0 +1,257 @@
+"""
+A cache on disk for the results of expensive PARI functions.
+"""
+
+#*****************************************************************************
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#                  http://www.gnu.org/licenses/
+#*****************************************************************************
+
+import os
+import mmap
+import hashlib
+import tempfile
+
+cdef extern from *:
+    # Indexed by the type of a GEN: the index of its first component
+    # which is a GEN, or 0 if it has none
+    const long* lontyp
+
+# The cache used by the functions generated for PariFunctionGenerator._cached,
+# set by Pari.cache_dir().
+cdef DiskCache disk_cache = None
+
+
+cdef int write_key(GEN x, bytearray out, dict var_names) except -1:
+    """
+    Append to ``out`` a representation of `x` which, unlike the data
+    written by :func:`gen_to_bytes`, does not depend on the address of
+    `x`: the type and length of each component followed by its
+    non-GEN words, in depth-first order. The names of the variables
+    of polynomials and power series are added to ``var_names``.
+
+    Return 0 if `x` contains an object which cannot be represented in
+    this way, and 1 otherwise.
+    """
+    cdef size_t W = sizeof(pari_longword)
+    cdef long tx = typ(x)
+    cdef long i, lx, first
+    cdef pari_ulongword header[2]
+    if tx == t_LIST or tx == t_CLOSURE or tx == t_ERROR:
+        return 0
+    lx = lgefint(x) if tx == t_INT else lg(x)
+    header[0] = tx
+    header[1] = lx
+    out += (<char*>header)[:2 * W]
+    if tx == t_POL or tx == t_SER:
+        var_name(varn(x), var_names)
+    first = lontyp[tx] if is_recursive_t(tx) else lx
+    if first > 1:
+        out += (<char*>(x + 1))[:(first - 1) * W]
+    for i in range(first, lx):
+        if not write_key(gel(x, i), out, var_names):
+            return 0
+    return 1
+
+
+cdef class DiskCache:
+    """
+    Content-addressed cache on disk of the results of expensive PARI
+    functions, returned by :meth:`Pari.cache_dir`.
+
+    Each result is stored in its own file, named after a hash of the
+    function, its arguments, the precision and the variables occurring
+    in the arguments, in the binary format of :meth:`Gen.to_bytes`.
+    Files are read through ``mmap``. When the files take more than
+    ``max_size`` bytes, the least recently used ones are removed.
+    Several processes may share the same directory.
+    """
+    cdef readonly str path
+    cdef readonly object max_size
+    cdef size_t hits
+    cdef size_t misses
+    cdef size_t stores
+    cdef size_t evictions
+    cdef size_t errors
+
+    def __init__(self, path, max_size):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.path = os.fspath(path)
+        self.max_size = max_size
+        os.makedirs(self.path, exist_ok=True)
+
+    def __repr__(self):
+        return "DiskCache({!r}, max_size={})".format(self.path, self.max_size)
+
+    cdef key(self, str function, tuple args):
+        """
+        Return the key for the call of `function` with arguments
+        `args`, or ``None`` if the result cannot be cached.
+        """
+        cdef dict var_names = {}
+        cdef bytearray out = bytearray()
+        h = hashlib.blake2b(digest_size=20)
+        h.update("{} {} {} {}".format(GEN_BYTES_VERSION, sizeof(pari_longword),
+                                      pari_PARIVERSION.decode(), function).encode())
+        for a in args:
+            if isinstance(a, Gen):
+                del out[:]
+                if not write_key((<Gen>a).g, out, var_names):
+                    return None
+                h.update(b" G%d:" % len(out))
+                h.update(out)
+            else:
+                h.update(b" " + repr(a).encode())
+        # The result refers to variables by their number
+        for v in sorted(var_names):
+            h.update(" {}={}".format(v, var_names[v]).encode())
+        return h.hexdigest()
+
+    cdef filename(self, key):
+        return os.path.join(self.path, key + ".gen")
+
+    cdef load(self, key):
+        """
+        Return the Gen stored for `key`, or ``None``.
+        """
+        if key is None:
+            return None
+        filename = self.filename(key)
+        try:
+            with open(filename, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    result = bytes_to_gen(m)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except ValueError:
+            # Corrupt or empty file: compute the result again
+            self.misses += 1
+            self.remove(filename)
+            return None
+        except OSError:
+            # The file cannot be read or mapped, for instance because
+            # another process is replacing it
+            self.misses += 1
+            return None
+        try:
+            # The modification time records the last use of the file
+            os.utime(filename)
+        except OSError:
+            pass
+        self.hits += 1
+        return result
+
+    cdef store(self, key, Gen x):
+        """
+        Store `x` for `key`, then remove the least recently used files
+        if the cache is too large.
+
+        A file which cannot be written, for instance because the disk
+        is full or the directory is read-only, is only counted in
+        :meth:`stats`: the caller still has its result.
+        """
+        data = x.to_bytes()
+        if len(data) > self.max_size:
+            return
+        # Write to a temporary file first, so other processes never
+        # see a partial file
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.filename(key))
+        except OSError:
+            if tmp is not None:
+                self.remove(tmp)
+            self.errors += 1
+            return
+        except BaseException:
+            if tmp is not None:
+                self.remove(tmp)
+            raise
+        self.stores += 1
+        try:
+            self.evict()
+        except OSError:
+            self.errors += 1
+
+    cdef remove(self, filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+    cdef evict(self):
+        """
+        Remove the least recently used files until the files take at
+        most ``max_size`` bytes.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".gen"):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        if total <= self.max_size:
+            return
+        entries.sort()
+        for mtime, size, filename in entries:
+            self.remove(filename)
+            self.evictions += 1
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def stats(self):
+        """
+        Return a dictionary with the number of results found in the
+        cache (``hits``) or not (``misses``), stored and evicted by
+        this process, the number of failures to write to the cache
+        (``errors``), and the number and total size of the files in the
+        cache.
+
+        EXAMPLES::
+
+            sage: import tempfile
+            sage: cache = pari.cache_dir(tempfile.mkdtemp())
+            sage: K = pari.nfinit('y^2 + 7')
+            sage: K = pari.nfinit('y^2 + 7')
+            sage: stats = cache.stats()
+            sage: stats['hits'], stats['misses'], stats['stores'], stats['files']
+            (1, 1, 1, 1)
+            sage: stats['errors']
+            0
+            sage: pari.cache_dir(None)
+        """
+        files = size = 0
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".gen"):
+                try:
+                    # Another process may have removed the file
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files += 1
+                size += st.st_size
+        return {'hits': self.hits, 'misses': self.misses,
+                'stores': self.stores, 'evictions': self.evictions,
+                'errors': self.errors, 'files': files, 'bytes': size}
+
+    def clear(self):
+        """
+        Remove all files of the cache.
+        """
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".gen"):
+                self.remove(entry.path)
@@ -100,11 +100,24 @@ cdef class Gen(Gen_base):
         raise RuntimeError("PARI objects cannot be instantiated directly; use pari(x) to convert x to PARI")
 
     def __dealloc__(self):
-        if self.is_ref == False and isclone(self.g):
-            if self.is_dynamic:
-                obj_free(self.g)
-            gunclone(self.g)
-        #sig_free(<void*>self.b)
+        if self.is_clone:
+            unclone_gen(self.g, self.is_dynamic)
+
+    def __sizeof__(self):
+        """
+        Return the size in bytes of ``self``, including the PARI
+        object it wraps (as computed by ``gsizebyte``).
+
+        EXAMPLES::
+
+            sage: import sys
+            sage: x = pari(2)**1000; y = pari('[1, 2, 3]')
+            sage: x.__sizeof__() - object.__sizeof__(x) == x.sizebyte()
+            True
+            sage: sys.getsizeof(y) > sys.getsizeof(y[0])
+            True
+        """
+        return object.__sizeof__(self) + gsizebyte(self.g)
 
     def __repr__(self):
         """
@@ -294,7 +307,7 @@ cdef class Gen(Gen_base):
         return (new_ref(gel(x, i), v) for i in range(1, lg(x)))
 
     def _where(self):
-        return "on heap" if isclone(self.g) else "on stack"
+        return "on stack" if is_on_stack(self.g) else "on heap"
 
     def list(self):
         """
@@ -350,6 +363,8 @@ cdef class Gen(Gen_base):
 
     def __reduce__(self):
         """
+        Pickle ``self`` by its binary serialization (see :meth:`to_bytes`).
+
         EXAMPLES::
 
             sage: from pickle import loads, dumps
@@ -359,9 +374,92 @@ cdef class Gen(Gen_base):
             sage: f = pari('"hello world"')
             sage: loads(dumps(f)) == f
             True
+
+        Real numbers are pickled exactly::
+
+            sage: x = pari('Pi') + pari('1e-30')
+            sage: y = loads(dumps(x))
+            sage: y == x and y.bitprecision() == x.bitprecision()
+            True
+        """
+        return (bytes_to_gen, (self.to_bytes(),))
+
+    def __reduce_ex__(self, protocol):
+        """
+        With pickle protocol 5, the serialized data is given as a
+        ``pickle.PickleBuffer``, so it can be transferred out-of-band.
+
+        EXAMPLES::
+
+            sage: import pickle
+            sage: K = pari.nfinit('y^3 - 2')
+            sage: buffers = []
+            sage: p = pickle.dumps(K, protocol=5, buffer_callback=buffers.append)
+            sage: len(buffers)
+            1
+            sage: pickle.loads(p, buffers=buffers) == K
+            True
+            sage: pickle.loads(pickle.dumps(K, protocol=5)) == K
+            True
+        """
+        if protocol < 5:
+            return self.__reduce__()
+        from pickle import PickleBuffer
+        return (bytes_to_gen, (PickleBuffer(self.to_bytes()),))
+
+    def to_bytes(self):
+        """
+        Serialize ``self`` to a ``bytes`` object, which
+        :meth:`Pari.from_bytes` converts back to an identical Gen.
+
+        The data is a relocatable binary copy of the PARI object, like
+        the files written by ``writebin``: converting it back does not
+        involve the GP parser and is exact for all types, including
+        ``t_REAL``. It can only be read on a machine with the same word
+        size and byte order.
+
+        EXAMPLES::
+
+            sage: K = pari.bnfinit('y^2 + 5')
+            sage: b = K.to_bytes()
+            sage: type(b)
+            <... 'bytes'>
+            sage: pari.from_bytes(b) == K
+            True
+            sage: pari.from_bytes(pari('[1.5, x^2, "a"]').to_bytes())
+            [1.50000000000000, x^2, "a"]
+        """
+        return gen_to_bytes(self)
+
+    def to_shared_memory(self, name=None):
+        """
+        Serialize ``self`` (see :meth:`to_bytes`) to a new block of
+        shared memory, from which other processes can create a copy
+        of it with :meth:`Pari.from_shared_memory`.
+
+        INPUT:
+
+        - ``name`` -- (default: ``None``) the name of the block; by
+          default, a unique name is chosen
+
+        OUTPUT: the ``multiprocessing.shared_memory.SharedMemory``
+        object. Its ``name`` attribute is what the other processes need.
+        As usual, the block must be closed and, once no process needs
+        it anymore, unlinked.
+
+        Each process reads the data directly from the shared memory to
+        its PARI stack, so a large object is neither pickled nor copied
+        through a pipe for every process.
+
+        EXAMPLES::
+
+            sage: K = pari.bnfinit('y^3 - 5')
+            sage: shm = K.to_shared_memory()
+            sage: pari.from_shared_memory(shm.name) == K
+            True
+            sage: shm.close(); shm.unlink()
         """
-        s = repr(self)
-        return (objtogen, (s,))
+        return gen_to_shared_memory(self, name)
 
     def __add__(Gen left, right):
         """
@@ -377,8 +475,23 @@ cdef class Gen(Gen_base):
             3.00000000000000 E20
             sage: -2 + pari(3)
             1
+
+        Python numbers are converted directly on the PARI stack::
+
+            sage: x = pari('x')
+            sage: x*3 + 1
+            3*x + 1
+            sage: pari(1) + 2**100
+            1267650600228229401496703205377
+            sage: pari(1) + 0.5
+            1.50000000000000
+            sage: 1j + pari(1)
+            1 + 1.00000000000000*I
         """
         cdef Gen t
+        if is_python_number(right):
+            sig_on()
+            return new_gen(gadd(left.g, python_number_to_GEN(right)))
         try:
             t = objtogen(right)
         except Exception:
@@ -388,6 +501,9 @@ cdef class Gen(Gen_base):
 
     def __radd__(Gen right, left):
         cdef Gen t
+        if is_python_number(left):
+            sig_on()
+            return new_gen(gadd(python_number_to_GEN(left), right.g))
         try:
             t = objtogen(left)
         except Exception:
@@ -411,6 +527,9 @@ cdef class Gen(Gen_base):
             -5
         """
         cdef Gen t
+        if is_python_number(right):
+            sig_on()
+            return new_gen(gsub(left.g, python_number_to_GEN(right)))
         try:
             t = objtogen(right)
         except Exception:
@@ -420,6 +539,9 @@ cdef class Gen(Gen_base):
 
     def __rsub__(Gen right, left):
         cdef Gen t
+        if is_python_number(left):
+            sig_on()
+            return new_gen(gsub(python_number_to_GEN(left), right.g))
         try:
             t = objtogen(left)
         except Exception:
@@ -429,6 +551,9 @@ cdef class Gen(Gen_base):
 
     def __mul__(Gen left, right):
         cdef Gen t
+        if is_python_number(right):
+            sig_on()
+            return new_gen(gmul(left.g, python_number_to_GEN(right)))
         try:
             t = objtogen(right)
         except Exception:
@@ -438,6 +563,9 @@ cdef class Gen(Gen_base):
 
     def __rmul__(Gen right, left):
         cdef Gen t
+        if is_python_number(left):
+            sig_on()
+            return new_gen(gmul(python_number_to_GEN(left), right.g))
         try:
             t = objtogen(left)
         except Exception:
@@ -447,6 +575,9 @@ cdef class Gen(Gen_base):
 
     def __div__(Gen left, right):
         cdef Gen t
+        if is_python_number(right):
+            sig_on()
+            return new_gen(gdiv(left.g, python_number_to_GEN(right)))
         try:
             t = objtogen(right)
         except Exception:
@@ -456,6 +587,9 @@ cdef class Gen(Gen_base):
 
     def __rdiv__(Gen right, left):
         cdef Gen t
+        if is_python_number(left):
+            sig_on()
+            return new_gen(gdiv(python_number_to_GEN(left), right.g))
         try:
             t = objtogen(left)
         except Exception:
@@ -465,6 +599,9 @@ cdef class Gen(Gen_base):
 
     def __truediv__(Gen left, right):
         cdef Gen t
+        if is_python_number(right):
+            sig_on()
+            return new_gen(gdiv(left.g, python_number_to_GEN(right)))
         try:
             t = objtogen(right)
         except Exception:
@@ -474,6 +611,9 @@ cdef class Gen(Gen_base):
 
     def __rtruediv__(Gen right, left):
         cdef Gen t
+        if is_python_number(left):
+            sig_on()
+            return new_gen(gdiv(python_number_to_GEN(left), right.g))
         try:
             t = objtogen(left)
         except Exception:
@@ -515,6 +655,9 @@ cdef class Gen(Gen_base):
             1
         """
         cdef Gen t
+        if is_python_number(right):
+            sig_on()
+            return new_gen(gmod(left.g, python_number_to_GEN(right)))
         try:
             t = objtogen(right)
         except Exception:
@@ -524,6 +667,9 @@ cdef class Gen(Gen_base):
 
     def __rmod__(Gen right, left):
         cdef Gen t
+        if is_python_number(left):
+            sig_on()
+            return new_gen(gmod(python_number_to_GEN(left), right.g))
         try:
             t = objtogen(left)
         except Exception:
@@ -550,6 +696,10 @@ cdef class Gen(Gen_base):
             1/32
         """
         cdef Gen t0, t1
+        if m is None and is_python_number(right):
+            sig_on()
+            return new_gen(gpow(left.g, python_number_to_GEN(right),
+                                prec_bits_to_words(0)))
         try:
             t1 = objtogen(right)
         except Exception:
@@ -560,6 +710,10 @@ cdef class Gen(Gen_base):
 
     def __rpow__(Gen right, left, m):
         cdef Gen t
+        if m is None and is_python_number(left):
+            sig_on()
+            return new_gen(gpow(python_number_to_GEN(left), right.g,
+                                prec_bits_to_words(0)))
         try:
             t = objtogen(left)
         except Exception:
@@ -1111,21 +1265,9 @@ cdef class Gen(Gen_base):
             if j < 0 or j >= glength(self.g):
                 raise IndexError("column index out of range")
 
-            ind = (i,j)
-
-            if self.refers_to is not None and ind in self.refers_to:
-                return self.refers_to[ind]
-            else:
-                ## In this case, we're being asked to return
-                ## a GEN that has no Gen pointing to it, so
-                ## we need to create such a gen, add it to
-                ## self.refers_to, and return it.
-                val = new_ref(gmael(self.g, j+1, i+1), self)
-                if self.refers_to is None:
-                    self.refers_to = {ind: val}
-                else:
-                    self.refers_to[ind] = val
-                return val
+            # The entry is a component of the column
+            col = get_child(self, j, gel(self.g, j+1))
+            return get_child(col, i, gmael(self.g, j+1, i+1))
 
         elif isinstance(n, slice):
             l = glength(self.g)
@@ -1165,19 +1307,7 @@ cdef class Gen(Gen_base):
         elif pari_type == t_VEC or pari_type == t_MAT:
             #t_VEC    : row vector        [ code ] [  x_1  ] ... [  x_k  ]
             #t_MAT    : matrix            [ code ] [ col_1 ] ... [ col_k ]
-            if self.refers_to is not None and n in self.refers_to:
-                return self.refers_to[n]
-            else:
-                ## In this case, we're being asked to return
-                ## a GEN that has no Gen pointing to it, so
-                ## we need to create such a gen, add it to
-                ## self.refers_to, and return it.
-                val = new_ref(gel(self.g, n+1), self)
-                if self.refers_to is None:
-                    self.refers_to = {n: val}
-                else:
-                    self.refers_to[n] = val
-                return val
+            return get_child(self, n, gel(self.g, n+1))
 
         elif pari_type == t_VECSMALL:
             #t_VECSMALL: vec. small ints  [ code ] [ x_1 ] ... [ x_k ]
@@ -1310,16 +1440,14 @@ cdef class Gen(Gen_base):
 
                 i = n[0]
                 j = n[1]
-                ind = (i,j)
 
                 if i < 0 or i >= glength(<GEN>(self.g[1])):
                     raise IndexError("row i(=%s) must be between 0 and %s" % (i, self.nrows()-1))
                 if j < 0 or j >= glength(self.g):
                     raise IndexError("column j(=%s) must be between 0 and %s" % (j, self.ncols()-1))
-                if self.refers_to is None:
-                    self.refers_to = {ind: x}
-                else:
-                    self.refers_to[ind] = x
+                if is_on_stack(x.g) and not is_on_stack(self.g):
+                    clone_into(x, x.g)
+                set_child(get_child(self, j, gel(self.g, j+1)), i, x)
                 (<GEN>(self.g)[j+1])[i+1] = <pari_longword>(x.g)
                 return
 
@@ -1340,13 +1468,15 @@ cdef class Gen(Gen_base):
             if i < 0 or i >= glength(self.g):
                 raise IndexError("index (%s) must be between 0 and %s" % (i, <pari_longword>glength(self.g)-1))
 
+            # A Gen kept on the PARI stack by a stack scope cannot be
+            # stored in a Gen which will outlive the scope.
+            if is_on_stack(x.g) and not is_on_stack(self.g):
+                clone_into(x, x.g)
+
             # so python memory manager will work correctly
             # and not free x if PARI part of self is the
             # only thing pointing to it.
-            if self.refers_to is None:
-                self.refers_to = {i: x}
-            else:
-                self.refers_to[i] = x
+            set_child(self, i, x)
 
             ## correct indexing for t_POLs
             if typ(self.g) == t_POL:
@@ -1422,15 +1552,25 @@ cdef class Gen(Gen_base):
             True
         """
         cdef Gen t0, t1
-        try:
-            t0 = objtogen(left)
-            t1 = objtogen(right)
-        except Exception:
-            return NotImplemented
         cdef bint r
-        cdef GEN x = t0.g
-        cdef GEN y = t1.g
-        sig_on()
+        cdef GEN x, y
+        if isinstance(left, Gen) and is_python_number(right):
+            sig_on()
+            x = (<Gen>left).g
+            y = python_number_to_GEN(right)
+        elif isinstance(right, Gen) and is_python_number(left):
+            sig_on()
+            x = python_number_to_GEN(left)
+            y = (<Gen>right).g
+        else:
+            try:
+                t0 = objtogen(left)
+                t1 = objtogen(right)
+            except Exception:
+                return NotImplemented
+            x = t0.g
+            y = t1.g
+            sig_on()
         if op == Py_EQ:
             r = (gequal(x, y) != 0)
         elif op == Py_NE:
@@ -1443,7 +1583,7 @@ cdef class Gen(Gen_base):
             r = (gcmp(x, y) < 0)
         else:  # Py_GT
             r = (gcmp(x, y) > 0)
-        sig_off()
+        clear_stack()
         return r
 
     def cmp_universal(Gen self, Gen other):
@@ -1588,11 +1728,396 @@ cdef class Gen(Gen_base):
             sage: type(w[0])
             <... 'int'>
         """
-        cdef long n
         if typ(self.g) != t_VECSMALL:
             raise TypeError("Object (=%s) must be of type t_VECSMALL." % self)
-        return [pari_longword_to_int(self.g[n+1])
-                for n in range(<long>glength(self.g))]
+        return memoryview(self).tolist()
+
+    def __getbuffer__(self, Py_buffer* buffer, int flags):
+        """
+        Export the entries of a ``t_VECSMALL`` as a read-only buffer of
+        integers of the size of a PARI word (64 or 32 bits), without
+        copying them.
+
+        The Gen stays alive as long as the buffer is in use.  Only a
+        ``t_VECSMALL`` supports the buffer protocol.
+
+        EXAMPLES::
+
+            sage: v = pari('Vecsmall([1, -2, 3])')
+            sage: m = memoryview(v)
+            sage: m.format, m.itemsize, m.shape, m.readonly
+            ('l', 4, (3,), True)  # 32-bit
+            ('q', 8, (3,), True)  # 64-bit
+            sage: m.tolist()
+            [1, -2, 3]
+            sage: import numpy  # optional - numpy
+            sage: numpy.asarray(v)  # optional - numpy
+            array([ 1, -2,  3])
+            sage: memoryview(pari('[1, 2]'))
+            Traceback (most recent call last):
+            ...
+            BufferError: PARI object of type 't_VEC' does not support the buffer protocol
+
+        A view of a Gen created in a stack scope remains valid after
+        the scope exits::
+
+            sage: with pari.stack_scope():
+            ....:     v = pari('Vecsmall([5, 4])').vecsort()
+            ....:     inside = v._where()
+            ....:     m = memoryview(v)
+            sage: inside, v._where()
+            ('on stack', 'on heap')
+            sage: m.tolist()
+            [4, 5]
+        """
+        if typ(self.g) != t_VECSMALL:
+            raise BufferError(f"PARI object of type {self.type()!r} does not support the buffer protocol")
+        if flags & PyBUF_WRITABLE:
+            raise BufferError("the buffer of a PARI t_VECSMALL is read-only")
+        self.move_to_heap()
+        # shape and strides
+        cdef Py_ssize_t* dims = <Py_ssize_t*>check_malloc(2 * sizeof(Py_ssize_t))
+        dims[0] = lg(self.g) - 1
+        dims[1] = sizeof(pari_longword)
+        buffer.buf = <void*>(self.g + 1)
+        buffer.obj = self
+        buffer.len = dims[0] * sizeof(pari_longword)
+        buffer.readonly = 1
+        buffer.itemsize = sizeof(pari_longword)
+        buffer.format = NULL
+        if flags & PyBUF_FORMAT:
+            if sizeof(pari_longword) == 8:
+                buffer.format = "q"
+            else:
+                buffer.format = "l"
+        buffer.ndim = 1
+        buffer.shape = NULL
+        if flags & PyBUF_ND:
+            buffer.shape = dims
+        buffer.strides = NULL
+        if flags & PyBUF_STRIDES == PyBUF_STRIDES:
+            buffer.strides = dims + 1
+        buffer.suboffsets = NULL
+        buffer.internal = dims
+
+    def __releasebuffer__(self, Py_buffer* buffer):
+        sig_free(buffer.internal)
+
+    @property
+    def __array_interface__(self):
+        """
+        The NumPy array interface of a ``t_VECSMALL``, giving a
+        read-only view of its entries.  Other PARI types do not have
+        this attribute.
+
+        EXAMPLES::
+
+            sage: v = pari('Vecsmall([1, 2, 3])')
+            sage: d = v.__array_interface__
+            sage: d['shape'], d['typestr'][1:]
+            ((3,), 'i4')  # 32-bit
+            ((3,), 'i8')  # 64-bit
+            sage: hasattr(pari('[1, 2, 3]'), '__array_interface__')
+            False
+        """
+        if typ(self.g) != t_VECSMALL:
+            raise AttributeError("__array_interface__")
+        self.move_to_heap()
+        return {'version': 3,
+                'shape': (lg(self.g) - 1,),
+                'typestr': '{}i{}'.format('<' if sys.byteorder == 'little' else '>',
+                                          sizeof(pari_longword)),
+                'data': (<size_t>(self.g + 1), True)}
+
+    cdef move_to_heap(self):
+        """
+        Make sure that ``self.g`` is not on the PARI stack, where a
+        stack scope may leave it, so that its address does not change.
+        """
+        if is_on_stack(self.g):
+            sig_on()
+            # A reference now owns its own copy
+            clone_into(self, self.g)
+            sig_off()
+
+    def to_numpy(self, dtype=None):
+        """
+        Return a NumPy array with the entries of ``self``, which must
+        be a ``t_VECSMALL``, ``t_VEC``, ``t_COL`` or ``t_MAT``.
+
+        A vector becomes a 1-dimensional array and a matrix a
+        2-dimensional one.  This converts all entries in a single
+        loop, without creating a Gen or a Python number for each of
+        them.  The result does not share memory with ``self``; use
+        ``numpy.asarray()`` to get a view of a ``t_VECSMALL`` instead.
+
+        INPUT:
+
+        - ``dtype`` -- (default: ``int64``) the type of the array, one
+          of:
+
+          - ``int64``: the entries must be integers fitting in 64 bits
+
+          - ``float64``: the entries must be integers, rationals or
+            real numbers, or complex numbers with a zero imaginary part
+
+          - ``complex128``: the entries may also be complex numbers
+
+        EXAMPLES::
+
+            sage: pari('[1, -2, 3]~').to_numpy()  # optional - numpy
+            array([ 1, -2,  3])
+            sage: pari('primes(5)').to_numpy()  # optional - numpy
+            array([ 2,  3,  5,  7, 11])
+            sage: a = pari('Vecsmall([2^62, -2^63])').to_numpy(); a  # optional - numpy
+            array([ 4611686018427387904, -9223372036854775808])
+            sage: a.dtype  # optional - numpy
+            dtype('int64')
+            sage: pari('[1, 2; 3, 4; 5, 6]').to_numpy()  # optional - numpy
+            array([[1, 2],
+                   [3, 4],
+                   [5, 6]])
+
+        Floating point and complex arrays::
+
+            sage: import numpy  # optional - numpy
+            sage: pari('[1, 1/4, 0.5, 2 + 0*I]').to_numpy(numpy.float64)  # optional - numpy
+            array([1.  , 0.25, 0.5 , 2.  ])
+            sage: r = pari('x^2 + 1').polroots().to_numpy(numpy.complex128)  # optional - numpy
+            sage: numpy.allclose(r, [-1j, 1j])  # optional - numpy
+            True
+            sage: pari('[1.5, 0; I, 1/2]').to_numpy('complex128')  # optional - numpy
+            array([[1.5+0.j, 0. +0.j],
+                   [0. +1.j, 0.5+0.j]])
+
+        TESTS::
+
+            sage: pari('[1, 2^63]').to_numpy()  # optional - numpy
+            Traceback (most recent call last):
+            ...
+            OverflowError: entry 1 does not fit in 64 bits
+            sage: pari('[1, 1/2]').to_numpy()  # optional - numpy
+            Traceback (most recent call last):
+            ...
+            TypeError: entry 1 is of type t_FRAC, not t_INT
+            sage: pari('[1, I]').to_numpy('float64')  # optional - numpy
+            Traceback (most recent call last):
+            ...
+            TypeError: entry 1 is not real
+            sage: pari('[1, 2; x, 4]').to_numpy('complex128')  # optional - numpy
+            Traceback (most recent call last):
+            ...
+            TypeError: entry (1, 0) is of type t_POL, not a number
+            sage: pari('Vecsmall([1])').to_numpy('float64')  # optional - numpy
+            array([1.])
+            sage: pari('[1]').to_numpy('int8')  # optional - numpy
+            Traceback (most recent call last):
+            ...
+            ValueError: dtype must be int64, float64 or complex128, not int8
+            sage: pari(1).to_numpy()  # optional - numpy
+            Traceback (most recent call last):
+            ...
+            TypeError: cannot convert PARI object of type t_INT to a NumPy array
+            sage: pari('matrix(0, 0)').to_numpy().shape  # optional - numpy
+            (0, 0)
+        """
+        global avma
+        import numpy
+        cdef long t = typ(self.g)
+        if t != t_VEC and t != t_COL and t != t_MAT and t != t_VECSMALL:
+            raise TypeError(f"cannot convert PARI object of type {self.type()} to a NumPy array")
+        dtype = numpy.dtype(numpy.int64 if dtype is None else dtype)
+        cdef int kind
+        if dtype == numpy.int64:
+            kind = 0
+        elif dtype == numpy.float64:
+            kind = 1
+        elif dtype == numpy.complex128:
+            kind = 2
+        else:
+            raise ValueError(f"dtype must be int64, float64 or complex128, not {dtype}")
+
+        # A vector is treated as a matrix with one column
+        cdef long nrows, ncols
+        if t == t_MAT:
+            ncols = lg(self.g) - 1
+            nrows = lg(gel(self.g, 1)) - 1 if ncols else 0
+            shape = (nrows, ncols)
+        else:
+            nrows = lg(self.g) - 1
+            ncols = 1
+            shape = (nrows,)
+        out = numpy.empty(shape, dtype=dtype)
+        cdef size_t address = out.__array_interface__['data'][0]
+        cdef int64_t* ints = <int64_t*>address
+        cdef double* doubles = <double*>address
+        cdef long i, j, k, tx
+
+        if t == t_VECSMALL:
+            if kind != 0:
+                out[:] = numpy.asarray(self)
+            elif sizeof(pari_longword) == sizeof(int64_t):
+                memcpy(ints, self.g + 1, nrows * sizeof(int64_t))
+            else:
+                for i in range(nrows):
+                    ints[i] = self.g[i + 1]
+            return out
+
+        cdef GEN col, x
+        cdef uint64_t u
+        cdef pari_sp av
+        # The entry which cannot be converted, and why
+        cdef long bad = -1
+        cdef int reason = 0
+        sig_on()
+        av = avma
+        for j in range(ncols):
+            col = gel(self.g, j + 1) if t == t_MAT else self.g
+            for i in range(nrows):
+                x = gel(col, i + 1)
+                k = i * ncols + j
+                tx = typ(x)
+                if kind == 0:
+                    if tx != t_INT:
+                        bad, reason = k, 1
+                        break
+                    if lgefint(x) == 2:
+                        ints[k] = 0
+                        continue
+                    if lgefint(x) == 3:
+                        u = <pari_ulongword>x[2]
+                    elif lgefint(x) == 4 and sizeof(pari_longword) == 4:
+                        # Two 32-bit words
+                        u = ((<uint64_t><pari_ulongword>int_MSW(x)[0]) << 32 |
+                             <pari_ulongword>int_LSW(x)[0])
+                    else:
+                        bad, reason = k, 2
+                        break
+                    if u > <uint64_t>INT64_MAX + (signe(x) < 0):
+                        bad, reason = k, 2
+                        break
+                    ints[k] = <int64_t>(-u) if signe(x) < 0 else <int64_t>u
+                    continue
+                if tx == t_COMPLEX:
+                    if kind == 1 and not gequal0(gel(x, 2)):
+                        bad, reason = k, 3
+                        break
+                    if kind == 2:
+                        doubles[2 * k + 1] = gtodouble(gel(x, 2))
+                    x = gel(x, 1)
+                elif kind == 2:
+                    doubles[2 * k + 1] = 0
+                tx = typ(x)
+                if tx != t_INT and tx != t_REAL and tx != t_FRAC:
+                    bad, reason = k, 4
+                    break
+                doubles[kind * k] = gtodouble(x)
+                avma = av
+            if bad >= 0:
+                break
+        clear_stack()
+        if bad < 0:
+            return out
+
+        i, j = bad // ncols, bad % ncols
+        entry = f"({i}, {j})" if t == t_MAT else f"{i}"
+        x = gel(gel(self.g, j + 1), i + 1) if t == t_MAT else gel(self.g, i + 1)
+        if reason == 1:
+            raise TypeError(f"entry {entry} is of type {new_ref(x, self).type()}, not t_INT")
+        if reason == 2:
+            raise OverflowError(f"entry {entry} does not fit in 64 bits")
+        if reason == 3:
+            raise TypeError(f"entry {entry} is not real")
+        raise TypeError(f"entry {entry} is of type {new_ref(x, self).type()}, not a number")
+
+    def to_ints(self):
+        """
+        Convert this vector of integers to a list of Python ``int``.
+
+        This object must be of type ``t_VEC``, ``t_COL`` or
+        ``t_VECSMALL``, with entries of type ``t_INT``. No Gen is
+        created for the entries, unlike in ``[int(x) for x in self]``.
+
+        EXAMPLES::
+
+            sage: pari('[1, -2, 3^50]~').to_ints()
+            [1, -2, 717897987691852588770249]
+            sage: pari('Vecsmall([4, 5])').to_ints()
+            [4, 5]
+
+        TESTS::
+
+            sage: pari('[1, 1/2]').to_ints()
+            Traceback (most recent call last):
+            ...
+            TypeError: entry 1 is of type t_FRAC, not t_INT
+            sage: pari('[1, 2; 3, 4]').to_ints()
+            Traceback (most recent call last):
+            ...
+            TypeError: Object (=[1, 2; 3, 4]) must be of type t_VEC, t_COL or t_VECSMALL.
+        """
+        cdef long t = typ(self.g)
+        cdef long i, n = lg(self.g) - 1
+        cdef GEN x
+        if t == t_VECSMALL:
+            return [self.g[i] for i in range(1, n + 1)]
+        if t != t_VEC and t != t_COL:
+            raise TypeError("Object (=%s) must be of type t_VEC, t_COL or t_VECSMALL." % self)
+        for i in range(1, n + 1):
+            x = gel(self.g, i)
+            if typ(x) != t_INT:
+                raise TypeError(f"entry {i - 1} is of type {new_ref(x, self).type()}, not t_INT")
+        return [INT_to_python(gel(self.g, i)) for i in range(1, n + 1)]
+
+    def to_floats(self):
+        """
+        Convert this vector of real numbers to a list of Python ``float``.
+
+        This object must be of type ``t_VEC``, ``t_COL`` or
+        ``t_VECSMALL``, with entries of type ``t_INT``, ``t_FRAC`` or
+        ``t_REAL``. No Gen is created for the entries, unlike in
+        ``[float(x) for x in self]``.
+
+        EXAMPLES::
+
+            sage: pari('[1, 1/4, 0.5, -2^70]').to_floats()
+            [1.0, 0.25, 0.5, -1.1805916207174113e+21]
+            sage: pari('Vecsmall([4, 5])').to_floats()
+            [4.0, 5.0]
+
+        TESTS::
+
+            sage: pari('[1, I]').to_floats()
+            Traceback (most recent call last):
+            ...
+            TypeError: entry 1 is of type t_COMPLEX, not a real number
+        """
+        global avma
+        cdef long t = typ(self.g)
+        cdef long i, tx, n = lg(self.g) - 1
+        cdef GEN x
+        if t == t_VECSMALL:
+            return [<double>self.g[i] for i in range(1, n + 1)]
+        if t != t_VEC and t != t_COL:
+            raise TypeError("Object (=%s) must be of type t_VEC, t_COL or t_VECSMALL." % self)
+        for i in range(1, n + 1):
+            x = gel(self.g, i)
+            tx = typ(x)
+            if tx != t_INT and tx != t_REAL and tx != t_FRAC:
+                raise TypeError(f"entry {i - 1} is of type {new_ref(x, self).type()}, not a real number")
+
+        cdef double* d = <double*>check_malloc(max(n, 1) * sizeof(double))
+        cdef pari_sp av
+        try:
+            sig_on()
+            av = avma
+            for i in range(n):
+                d[i] = gtodouble(gel(self.g, i + 1))
+                avma = av
+            clear_stack()
+            return [d[i] for i in range(n)]
+        finally:
+            sig_free(d)
 
     def python_list(self):
         """
@@ -1670,6 +2195,25 @@ cdef class Gen(Gen_base):
         """
         return gen_to_integer(self)
 
+    def __mpz__(self):
+        """
+        Convert ``self`` to a ``gmpy2.mpz``.
+
+        This is called by ``gmpy2.mpz()`` and copies the words of the
+        PARI integer, without going through a Python ``int``.
+
+        EXAMPLES::
+
+            sage: from gmpy2 import mpz  # optional - gmpy2
+            sage: mpz(pari(-10))  # optional - gmpy2
+            mpz(-10)
+            sage: mpz(pari(2)**200) == 2**200  # optional - gmpy2
+            True
+            sage: mpz(pari("Mod(2, 7)"))  # optional - gmpy2
+            mpz(2)
+        """
+        return gen_to_mpz(self)
+
     def __float__(self):
         """
         Return Python float.
@@ -4454,12 +4998,45 @@ cdef Gen new_ref(GEN g, Gen parent):
     """
     cdef Gen p = Gen.__new__(Gen)
     p.g = g
-    parent.is_ref = True
-    #p.b = 0
-    p.refers_to = {-1: parent}
+    p.is_ref = True
+    p.owner = parent
+    # A reference into a Gen kept on the PARI stack by a stack scope
+    # must be cloned along with it if it outlives the scope.
+    if scoped_gens is not None and is_on_stack(g):
+        scoped_gens.append(p)
     return p
 
 
+cdef Gen get_child(Gen parent, Py_ssize_t n, GEN g):
+    """
+    Return a ``Gen`` pointing to ``g``, which is component ``n``
+    (0-based) of ``parent.g``.
+
+    The ``Gen`` is kept in slot ``n`` of ``parent.refers_to``, so the
+    same ``Gen`` is returned if the component is asked for again.
+    """
+    cdef object c
+    if parent.refers_to is None:
+        parent.refers_to = [None] * glength(parent.g)
+    else:
+        c = parent.refers_to[n]
+        if c is not None:
+            return <Gen>c
+    c = new_ref(g, parent)
+    parent.refers_to[n] = c
+    return <Gen>c
+
+
+cdef inline set_child(Gen parent, Py_ssize_t n, Gen x):
+    """
+    Keep ``x`` alive as long as ``parent``, because ``x.g`` is stored as
+    component ``n`` (0-based) of ``parent.g``.
+    """
+    if parent.refers_to is None:
+        parent.refers_to = [None] * glength(parent.g)
+    parent.refers_to[n] = x
+
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
 cdef Gen list_of_Gens_to_Gen(list s):
@@ -4569,6 +5146,9 @@ cpdef Gen objtogen(s):
         0
         sage: pari(True)
         1
+        sage: from gmpy2 import mpz  # optional - gmpy2
+        sage: pari(mpz(-2)**200) == pari(-2)**200  # optional - gmpy2
+        True
 
     Some commands are just executed without returning a value::
 
@@ -4617,6 +5197,8 @@ cpdef Gen objtogen(s):
         return new_gen_from_double(PyFloat_AS_DOUBLE(s))
     if isinstance(s, complex):
         return new_t_COMPLEX_from_double(PyComplex_RealAsDouble(s), PyComplex_ImagAsDouble(s))
+    if is_mpz(s):
+        return mpz_to_gen(s)
 
     # A list is iterable, but we handle the common case of a list
     # separately as an optimization
@@ -137,12 +137,14 @@ cdef void _pari_init_error_handling():
     cb_pari_err_handle = _pari_err_handle
     cb_pari_err_recover = _pari_err_recover
     
-cdef int _pari_err_handle(GEN E) except 0:
+cdef int _pari_err_handle(GEN E) except 0 with gil:
     """
     Convert a PARI error into a Sage exception, unless the error was
     a stack overflow, in which case we enlarge the stack.
 
-    This function is a callback from the PARI error handler.
+    This function is a callback from the PARI error handler. It takes
+    the GIL, which is released during PARI computations in threaded
+    mode (see :meth:`Pari.set_threaded`).
 
     EXAMPLES::
 
@@ -158,6 +160,12 @@ cdef int _pari_err_handle(GEN E) except 0:
     """
     cdef long errnum = <long>E[1]
 
+    # The call being profiled, if any, does not reach clear_stack().
+    # Only calls in the main thread are profiled.
+    global profile_name
+    if cypari_thread_kind != CYPARI_THREAD_OWN:
+        profile_name = None
+
     sig_block()
     cdef char* errstr
     cdef const char* s
@@ -178,7 +186,11 @@ cdef int _pari_err_handle(GEN E) except 0:
 
         raise PariError(errnum, pari_error_string, new_gen_noclear(E))
     finally:
-        sig_unblock()
+        # Unlike sig_unblock(), do not act on an interrupt received in
+        # the meantime: it would jump back to sig_on() from within this
+        # function, which holds the GIL.  The error stops the
+        # computation anyway.
+        cysigs.block_sigint = 0
 
 # This gets assigned as Pari's cb_pari_err_recover callback
 cdef void _pari_err_recover(long errnum) noexcept:
@@ -53,23 +53,26 @@ Interrupt and signal handling for Cython
 #include <pari/pari.h>
 #include "struct_signals.h"
 
-/* The cysigs object (there is a unique copy of this, shared by all
- * Cython modules using cysignals) */
-static cysigs_t cysigs;
+/* The cysigs object (there is a unique copy of this for each thread,
+ * shared by all Cython modules using cysignals) */
+static CYSIGS_THREAD cysigs_t cysigs;
 
-/* The default signal mask during normal operation,
- * initialized by setup_cysignals_handlers(). */
-static sigset_t default_sigmask;
+/* The default signal mask during normal operation, initialized by
+ * setup_cysignals_handlers() and, in threads with their own PARI stack,
+ * by cypari_thread_setup(). */
+static CYSIGS_THREAD sigset_t default_sigmask;
 
-/* default_sigmask with SIGHUP, SIGINT, SIGALRM added. */
+/* default_sigmask with SIGHUP, SIGINT, SIGALRM, SIGVTALRM added. */
 static sigset_t sigmask_with_sigint;
 
+/* Per-thread PARI stacks, set up by sig_on() */
+#include "threads.h"
 
 static void do_raise_exception(int sig);
 static void sigdie(int sig, const char* s);
 static void print_backtrace(void);
 
-/* Handler for SIGHUP, SIGINT, SIGALRM
+/* Handler for SIGHUP, SIGINT, SIGALRM, SIGVTALRM
  *
  * Inside sig_on() (i.e. when cysigs.sig_on_count is positive), this
  * raises an exception and jumps back to sig_on().
@@ -78,10 +81,14 @@ static void print_backtrace(void);
 static void cysigs_interrupt_handler(int sig)
 {
     DEBUG("Call to cysigs_interrupt_handler with signal %d\n", sig)
+    if (cypari_forward_interrupt(sig))
+        return;
     if (cysigs.sig_on_count > 0)
     {
       if (!cysigs.block_sigint && !PARI_SIGINT_block)
         {
+            cypari_self.requested = 0;
+
             /* Raise an exception so Python can see it */
             do_raise_exception(sig);
 
@@ -89,6 +96,12 @@ static void cysigs_interrupt_handler(int sig)
             siglongjmp(cysigs.env, sig);
         }
     }
+    else if (cypari_thread_kind == CYPARI_THREAD_OWN)
+    {
+        /* An interrupt sent by cypari_thread_interrupt(): the next
+         * sig_on() of this thread raises the exception. */
+        cypari_self.requested = 0;
+    }
     else
     {
         /* Set the Python interrupt indicator, which will cause the
@@ -145,6 +158,7 @@ static void cysigs_signal_handler(int sig)
         signal(SIGBUS, SIG_DFL);
         signal(SIGSEGV, SIG_DFL);
         signal(SIGALRM, SIG_DFL);
+        signal(SIGVTALRM, SIG_DFL);
         signal(SIGTERM, SIG_DFL);
         sigprocmask(SIG_SETMASK, &default_sigmask, NULL);
 
@@ -179,9 +193,16 @@ static void cysigs_signal_handler(int sig)
 
 extern int sig_raise_exception(int sig, const char* msg);
 
-/* This calls sig_raise_exception() to actually raise the exception. */
+/* This calls sig_raise_exception() to actually raise the exception,
+ * or, without the GIL, records the signal for sig_on_after_nogil(). */
 static void do_raise_exception(int sig)
 {
+    if (cysigs.nogil)
+    {
+        if (!cysigs.deferred_sig)
+            cysigs.deferred_sig = sig;
+        return;
+    }
     /* Call Cython function to raise exception */
     sig_raise_exception(sig, cysigs.s);
 }
@@ -249,6 +270,7 @@ static void setup_cysignals_handlers(void)
     sigaddset(&sigmask_with_sigint, SIGHUP);
     sigaddset(&sigmask_with_sigint, SIGINT);
     sigaddset(&sigmask_with_sigint, SIGALRM);
+    sigaddset(&sigmask_with_sigint, SIGVTALRM);
 
     /* Install signal handlers */
     struct sigaction sa;
@@ -258,11 +280,14 @@ static void setup_cysignals_handlers(void)
     sigaddset(&sa.sa_mask, SIGHUP);
     sigaddset(&sa.sa_mask, SIGINT);
     sigaddset(&sa.sa_mask, SIGALRM);
+    sigaddset(&sa.sa_mask, SIGVTALRM);
 
     sa.sa_handler = cysigs_interrupt_handler;
     if (sigaction(SIGHUP, &sa, NULL)) {perror("sigaction"); exit(1);}
     if (sigaction(SIGINT, &sa, NULL)) {perror("sigaction"); exit(1);}
     if (sigaction(SIGALRM, &sa, NULL)) {perror("sigaction"); exit(1);}
+    /* SIGVTALRM is sent by the CPU time limits of Pari.deadline() */
+    if (sigaction(SIGVTALRM, &sa, NULL)) {perror("sigaction"); exit(1);}
     sa.sa_handler = cysigs_signal_handler;
     /* Allow signals during signal handling, we have code to deal with
      * this case. */
@@ -317,7 +342,6 @@ static void sigdie(int sig, const char* s)
     exit(128 + sig);
 }
 
-
 /* Finally include the macros and inline functions for use in
  * signals.pyx. These require some of the above functions, therefore
  * this include must come at the end of this file. */
@@ -341,7 +365,7 @@ static void sigdie(int sig, const char* s)
 #endif
 /* The cysigs object (there is a unique copy of this, shared by all
  * Cython modules using cysignals) */
-static cysigs_t cysigs;
+static CYSIGS_THREAD cysigs_t cysigs;
 
 static void do_raise_exception(int sig);
 static void sigdie(int sig, const char* s);
@@ -519,9 +543,16 @@ static void cysigs_signal_handler(int sig)
 __PYX_EXTERN_C DL_EXPORT(int) sig_raise_exception(int, char const *);
 //extern int sig_raise_exception(int sig, const char* msg);
 
-/* This calls sig_raise_exception() to actually raise the exception. */
+/* This calls sig_raise_exception() to actually raise the exception,
+ * or, without the GIL, records the signal for sig_on_after_nogil(). */
 static void do_raise_exception(int sig)
 {
+    if (cysigs.nogil)
+    {
+        if (!cysigs.deferred_sig)
+            cysigs.deferred_sig = sig;
+        return;
+    }
     /* Call Cython function to raise exception */
     sig_raise_exception(sig, cysigs.s);
 }
@@ -626,6 +657,9 @@ static void sigdie(int sig, const char* s)
     exit(128 + sig);
 }
 
+/* Per-thread PARI stacks, set up by sig_on() */
+#include "threads.h"
+
 /* Finally include the macros and inline functions for use in
  * signals.pyx. These require some of the above functions, therefore
  * this include must come at the end of this file. */
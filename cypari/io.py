@@ -0,0 +1,426 @@
+r"""
+Files of records of PARI objects
+
+A :class:`GenWriter` appends Gens to a file in the binary format of
+:meth:`Gen.to_bytes`, and a :class:`GenReader` reads them back, either
+in sequence or by their index. Reading a record does not involve the
+GP parser, unlike writing ``str(g)`` and reading it with ``pari(line)``.
+
+    >>> import os, tempfile
+    >>> from cypari.io import GenWriter, GenReader
+    >>> path = os.path.join(tempfile.mkdtemp(), 'polys.gens')
+    >>> with GenWriter(path, compression='zlib') as w:
+    ...     for n in range(1, 6):
+    ...         w.write(pari('x^%d + 1/3' % n))
+    >>> with GenReader(path) as r:
+    ...     print(len(r), r[2], r[-1])
+    ...     print([g.poldegree() for g in r])
+    5 x^3 + 1/3 x^5 + 1/3
+    [1, 2, 3, 4, 5]
+
+Records can be appended to an existing file::
+
+    >>> with GenWriter(path, mode='a') as w:
+    ...     w.extend([pari(1.5), pari('[1, 2; 3, 4]')])
+    >>> with GenReader(path) as r:
+    ...     print(len(r), r[6])
+    7 [1, 2; 3, 4]
+
+The file consists of a header and of blocks of records, each of which
+is compressed as a whole, followed by an index of the blocks. Within a
+block, each record is preceded by its length. The index is written when
+the writer is closed; a file without index, for instance because the
+writing process was killed, can still be read up to its last complete
+block.
+
+Like the data of :meth:`Gen.to_bytes`, the files can only be read on a
+machine with the same word size and byte order, and only files from a
+trusted source should be read.
+"""
+
+import struct
+import zlib
+
+from ._pari import Gen, pari
+
+__all__ = ['GenWriter', 'GenReader']
+
+FILE_MAGIC = b'CyPGRec1'
+INDEX_MAGIC = b'CyPGIdx1'
+
+# Block header: b'B', the codec, the number of records, the size of the
+# records and the size of the stored (possibly compressed) payload
+BLOCK_HEADER = struct.Struct('<ccIQQ')
+RECORD_LENGTH = struct.Struct('<Q')
+# Index: b'I', the number of blocks, then for each block its offset and
+# the index of its first record, then the total number of records
+INDEX_HEADER = struct.Struct('<cQ')
+INDEX_ENTRY = struct.Struct('<QQ')
+INDEX_COUNT = struct.Struct('<Q')
+# Trailer at the end of the file: the offset of the index and INDEX_MAGIC
+TRAILER = struct.Struct('<Q8s')
+
+CODECS = {None: b'\0', 'zlib': b'\1', 'zstd': b'\2'}
+
+
+def _zstd():
+    """
+    Return a module-like object with ``compress(data, level)`` and
+    ``decompress(data)`` functions for zstd, or raise ImportError.
+    """
+    try:
+        from compression import zstd       # Python 3.14 and later
+        return zstd
+    except ImportError:
+        pass
+    import zstandard
+
+    class ZstdStandard(object):
+        @staticmethod
+        def compress(data, level=None):
+            if level is None:
+                level = 3
+            return zstandard.ZstdCompressor(level=level).compress(data)
+
+        @staticmethod
+        def decompress(data):
+            return zstandard.ZstdDecompressor().decompress(data)
+    return ZstdStandard
+
+
+def _compress(codec, data, level):
+    if codec == b'\0':
+        return data
+    if codec == b'\1':
+        return zlib.compress(data, -1 if level is None else level)
+    return _zstd().compress(data, level=level)
+
+
+def _decompress(codec, data):
+    if codec == b'\0':
+        return data
+    if codec == b'\1':
+        return zlib.decompress(data)
+    if codec == b'\2':
+        return _zstd().decompress(data)
+    raise ValueError('unknown compression codec %r' % codec)
+
+
+def _read_index(f):
+    """
+    Read the index at the end of the open file ``f``. Return the list
+    of pairs (offset of block, index of first record), the number of
+    records and the offset of the index, or ``None`` if the file has
+    no valid index.
+    """
+    f.seek(0, 2)
+    size = f.tell()
+    if size < len(FILE_MAGIC) + TRAILER.size:
+        return None
+    f.seek(size - TRAILER.size)
+    offset, magic = TRAILER.unpack(f.read(TRAILER.size))
+    if magic != INDEX_MAGIC or not len(FILE_MAGIC) <= offset < size:
+        return None
+    f.seek(offset)
+    tag, nblocks = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+    if tag != b'I':
+        return None
+    entries = f.read(nblocks * INDEX_ENTRY.size)
+    blocks = [INDEX_ENTRY.unpack_from(entries, i * INDEX_ENTRY.size)
+              for i in range(nblocks)]
+    count, = INDEX_COUNT.unpack(f.read(INDEX_COUNT.size))
+    return blocks, count, offset
+
+
+def _scan_blocks(f):
+    """
+    Build the index of the open file ``f``, which has none, by reading
+    the headers of its complete blocks. Return it as :func:`_read_index`
+    does, with the offset of the end of the last complete block.
+    """
+    f.seek(0, 2)
+    size = f.tell()
+    blocks, count = [], 0
+    offset = len(FILE_MAGIC)
+    while offset + BLOCK_HEADER.size <= size:
+        f.seek(offset)
+        tag, codec, n, raw_size, stored_size = BLOCK_HEADER.unpack(
+            f.read(BLOCK_HEADER.size))
+        end = offset + BLOCK_HEADER.size + stored_size
+        if tag != b'B' or end > size:
+            break
+        blocks.append((offset, count))
+        count += n
+        offset = end
+    return blocks, count, offset
+
+
+class GenWriter(object):
+    """
+    Write Gens to the file ``path``.
+
+    INPUT:
+
+    - ``path`` -- the name of the file
+
+    - ``mode`` -- (default: ``'w'``) ``'w'`` to create a new file or
+      ``'a'`` to append records to an existing one
+
+    - ``compression`` -- (default: ``None``) ``None``, ``'zlib'`` or
+      ``'zstd'`` (which needs the ``zstandard`` package before Python
+      3.14), the compression of the blocks
+
+    - ``level`` -- (default: ``None``) the compression level, or the
+      default level of the codec
+
+    - ``block_size`` -- (default: 1 MiB) the size in bytes of the
+      records in a block before compression; larger blocks compress
+      better, smaller ones make random access faster
+
+    EXAMPLES::
+
+        >>> import os, tempfile
+        >>> from cypari.io import GenWriter, GenReader
+        >>> path = os.path.join(tempfile.mkdtemp(), 'reals.gens')
+        >>> w = GenWriter(path, block_size=100)
+        >>> for k in range(1, 50):
+        ...     w.write(pari(k).sqrt())
+        >>> len(w)
+        49
+        >>> w.close()
+        >>> r = GenReader(path)
+        >>> r.nblocks > 1
+        True
+        >>> r[48] == pari(49).sqrt()
+        True
+        >>> r.close()
+
+    TESTS::
+
+        >>> GenWriter(path, compression='lzma')
+        Traceback (most recent call last):
+        ...
+        ValueError: compression must be None, 'zlib' or 'zstd', not 'lzma'
+    """
+    def __init__(self, path, mode='w', compression=None, level=None,
+                 block_size=1 << 20):
+        if compression not in CODECS:
+            raise ValueError("compression must be None, 'zlib' or 'zstd', "
+                             "not %r" % (compression,))
+        if mode not in ('w', 'a'):
+            raise ValueError("mode must be 'w' or 'a', not %r" % (mode,))
+        self.codec = CODECS[compression]
+        if self.codec == b'\2':
+            _zstd()   # Fail early if zstd is not available
+        self.level = level
+        self.block_size = block_size
+        self._records = []
+        self._buffered = 0
+        self._blocks = []
+        self._count = 0
+        if mode == 'a':
+            try:
+                self._file = open(path, 'r+b')
+            except FileNotFoundError:
+                mode = 'w'
+        if mode == 'w':
+            self._file = open(path, 'wb')
+            self._file.write(FILE_MAGIC)
+        else:
+            f = self._file
+            if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                f.close()
+                raise ValueError('%s is not a file of PARI records' % path)
+            index = _read_index(f) or _scan_blocks(f)
+            self._blocks, self._count, end = index
+            # Overwrite the index, which is written again on close()
+            f.seek(end)
+            f.truncate()
+
+    def __len__(self):
+        """
+        Return the number of records written to the file.
+        """
+        return self._count + len(self._records)
+
+    def write(self, x):
+        """
+        Append ``x``, a Gen or an object which ``pari()`` converts to a
+        Gen, to the file.
+        """
+        if not isinstance(x, Gen):
+            x = pari(x)
+        data = x.to_bytes()
+        self._records.append(RECORD_LENGTH.pack(len(data)))
+        self._records.append(data)
+        self._buffered += RECORD_LENGTH.size + len(data)
+        if self._buffered >= self.block_size:
+            self.flush()
+
+    def extend(self, iterable):
+        """
+        Append all objects of ``iterable`` to the file.
+        """
+        for x in iterable:
+            self.write(x)
+
+    def flush(self):
+        """
+        Write the records which are buffered as a block.
+        """
+        if not self._records:
+            return
+        n = len(self._records) // 2
+        raw = b''.join(self._records)
+        payload = _compress(self.codec, raw, self.level)
+        self._blocks.append((self._file.tell(), self._count))
+        self._file.write(BLOCK_HEADER.pack(b'B', self.codec, n, len(raw),
+                                           len(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        self._count += n
+        self._records = []
+        self._buffered = 0
+
+    def close(self):
+        """
+        Write the remaining records and the index, and close the file.
+        """
+        if self._file is None:
+            return
+        self.flush()
+        f = self._file
+        offset = f.tell()
+        f.write(INDEX_HEADER.pack(b'I', len(self._blocks)))
+        f.write(b''.join(INDEX_ENTRY.pack(*entry) for entry in self._blocks))
+        f.write(INDEX_COUNT.pack(self._count))
+        f.write(TRAILER.pack(offset, INDEX_MAGIC))
+        f.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class GenReader(object):
+    """
+    Read the Gens in the file ``path`` written by a :class:`GenWriter`.
+
+    Iterating over the reader yields the records in order, reading one
+    block at a time. Records can also be accessed by their index, which
+    only reads the block containing them.
+
+    EXAMPLES::
+
+        >>> import os, tempfile
+        >>> from cypari.io import GenWriter, GenReader
+        >>> path = os.path.join(tempfile.mkdtemp(), 'ints.gens')
+        >>> with GenWriter(path, block_size=64) as w:
+        ...     w.extend(pari(10)**k for k in range(30))
+        >>> r = GenReader(path)
+        >>> len(r), r[0], r[29] == pari(10)**29
+        (30, 1, True)
+        >>> sum(r) == sum(pari(10)**k for k in range(30))
+        True
+        >>> [int(x) for x in r[3:6]]
+        [1000, 10000, 100000]
+        >>> r.close()
+
+    TESTS::
+
+        >>> r = GenReader(path)
+        >>> r[30]
+        Traceback (most recent call last):
+        ...
+        IndexError: record index out of range
+        >>> r.close()
+
+    A file without index, here because the writer is not closed yet,
+    can be read up to its last complete block::
+
+        >>> w = GenWriter(path, block_size=64)
+        >>> w.extend(range(100))
+        >>> with GenReader(path) as r:
+        ...     0 < len(r) < 100 and r[len(r) - 1] == len(r) - 1
+        True
+        >>> w.flush()
+        >>> with GenReader(path) as r:
+        ...     len(r)
+        100
+        >>> w.close()
+    """
+    def __init__(self, path):
+        self._file = f = open(path, 'rb')
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            f.close()
+            raise ValueError('%s is not a file of PARI records' % path)
+        index = _read_index(f) or _scan_blocks(f)
+        self._blocks, self._count, _ = index
+        self._firsts = [first for offset, first in self._blocks]
+        # The last block which was read, as (block number, records)
+        self._cached = (None, None)
+
+    @property
+    def nblocks(self):
+        """
+        The number of blocks in the file.
+        """
+        return len(self._blocks)
+
+    def __len__(self):
+        return self._count
+
+    def _read_block(self, b):
+        """
+        Return the list of the records of block number ``b``, as
+        memoryviews of its data.
+        """
+        if self._cached[0] == b:
+            return self._cached[1]
+        f = self._file
+        f.seek(self._blocks[b][0])
+        tag, codec, n, raw_size, stored_size = BLOCK_HEADER.unpack(
+            f.read(BLOCK_HEADER.size))
+        raw = memoryview(_decompress(codec, f.read(stored_size)))
+        if tag != b'B' or len(raw) != raw_size:
+            raise ValueError('corrupt block %d' % b)
+        records, pos = [], 0
+        for i in range(n):
+            length, = RECORD_LENGTH.unpack_from(raw, pos)
+            pos += RECORD_LENGTH.size
+            records.append(raw[pos:pos + length])
+            pos += length
+        self._cached = (b, records)
+        return records
+
+    def __iter__(self):
+        for b in range(len(self._blocks)):
+            for data in self._read_block(b):
+                yield pari.from_bytes(data)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('record index out of range')
+        from bisect import bisect_right
+        b = bisect_right(self._firsts, i) - 1
+        return pari.from_bytes(self._read_block(b)[i - self._firsts[b]])
+
+    def close(self):
+        """
+        Close the file.
+        """
+        self._file.close()
+        self._cached = (None, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
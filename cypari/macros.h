@@ -3,12 +3,13 @@ Interrupt and signal handling for Cython.
 
 This code distinguishes between two kinds of signals:
 
-(1) interrupt-like signals: SIGINT, SIGALRM, SIGHUP.  The word
-"interrupt" refers to any of these signals.  These need not be handled
-immediately, we might handle them at a suitable later time, outside of
-sig_block() and with the Python GIL acquired.  SIGINT raises a
-KeyboardInterrupt (as usual in Python), SIGALRM raises AlarmInterrupt
-(a custom exception inheriting from KeyboardInterrupt), while SIGHUP
+(1) interrupt-like signals: SIGINT, SIGALRM, SIGVTALRM, SIGHUP.  The
+word "interrupt" refers to any of these signals.  These need not be
+handled immediately, we might handle them at a suitable later time,
+outside of sig_block() and with the Python GIL acquired.  SIGINT raises
+a KeyboardInterrupt (as usual in Python), SIGALRM and SIGVTALRM raise
+AlarmInterrupt (a custom exception inheriting from KeyboardInterrupt),
+while SIGHUP
 raises SystemExit, causing Python to exit.  The latter signal also
 redirects stdin from /dev/null, to cause interactive sessions to exit.
 
@@ -107,6 +108,8 @@ int (*__imp__setjmp)(jmp_buf) = _setjmp;
  */
 static inline int _sig_on_prejmp(const char* message, const char* file, int line)
 {
+    if (unlikely(cypari_thread_kind == CYPARI_THREAD_NEW))
+        cypari_thread_setup();
     cysigs.s = message;
     DEBUG("sig_on: setting count to %i at %s:%i\n", cysigs.sig_on_count+1, file, line)
     if (cysigs.sig_on_count > 0)
@@ -130,6 +133,7 @@ static inline int _sig_on_postjmp(int jmpret)
     {
         /* An exception occurred */
         _sig_on_recover();
+        cypari_mt_recover();
         return 0;
     }
 
@@ -179,6 +183,25 @@ static inline void _sig_off_(const char* file, int line)
 }
 
 
+/*
+ * End a computation made without the GIL (see sig_on_nogil() below):
+ * raise the exception for a signal received during it and return 0,
+ * or return 1.  This must be called with the GIL, outside of sig_on().
+ */
+static inline int _sig_nogil_end(void)
+{
+    int sig = cysigs.deferred_sig;
+    cysigs.nogil = 0;
+    if (unlikely(sig))
+    {
+        cysigs.deferred_sig = 0;
+        do_raise_exception(sig);
+        return 0;
+    }
+    return 1;
+}
+
+
 /**********************************************************************
  * USER MACROS/FUNCTIONS                                              *
  **********************************************************************/
@@ -188,6 +211,22 @@ static inline void _sig_off_(const char* file, int line)
 #define sig_str(message)   _sig_on_(message)
 #define sig_off()          _sig_off_(__FILE__, __LINE__)
 
+/* sig_on() for a computation made without the GIL, outside of any
+ * other sig_on().  Taking the GIL in a signal handler is not safe, so
+ * a signal received inside it only jumps back to it, which returns 0
+ * instead of raising an exception.  The computation must call sig_off()
+ * before taking the GIL again, and then sig_on_after_nogil(), which
+ * raises the exception, or else enters sig_on() again:
+ *
+ *     sig_off();
+ *     Py_BEGIN_ALLOW_THREADS
+ *     if (sig_on_nogil()) { compute(); sig_off(); }
+ *     Py_END_ALLOW_THREADS
+ *     if (!sig_on_after_nogil()) return NULL;
+ */
+#define sig_on_nogil()       ( cysigs.nogil = 1, _sig_on_(NULL) )
+#define sig_on_after_nogil() ( _sig_nogil_end() && _sig_on_(NULL) )
+
 /* sig_check() should be functionally equivalent to sig_on(); sig_off();
  * but much faster.  Essentially, it checks whether we missed any
  * interrupts.
@@ -242,7 +281,7 @@ static inline void sig_unblock(void)
       raise(cysigs.interrupt_received);  /* Re-raise the signal */
 #else
     if (unlikely(cysigs.interrupt_received) && cysigs.sig_on_count > 0)
-        kill(getpid(), cysigs.interrupt_received);  /* Re-raise the signal */
+        raise(cysigs.interrupt_received);  /* Re-raise the signal in this thread */
 #endif
 }
 
@@ -454,10 +454,11 @@ def prec_words_to_dec(long prec_in_words):
 
 
 # Callbacks from PARI to print stuff using sys.stdout.write() instead
-# of C library functions like puts().
+# of C library functions like puts().  They take the GIL, since PARI
+# may print while computing without it in threaded mode.
 cdef PariOUT sage_pariOut
 
-cdef void sage_putchar(char c) noexcept:
+cdef void sage_putchar(char c) noexcept with gil:
     cdef char s[2]
     s[0] = c
     s[1] = 0
@@ -466,11 +467,11 @@ cdef void sage_putchar(char c) noexcept:
     # so it doesn't print one when an error occurs.
     pari_set_last_newline(1)
     
-cdef void sage_puts(const char* s) noexcept:
+cdef void sage_puts(const char* s) noexcept with gil:
     sys.stdout.write(String(s))
     pari_set_last_newline(1)
 
-cdef void sage_flush() noexcept:
+cdef void sage_flush() noexcept with gil:
     sys.stdout.flush()
 
 cdef void swallow_ch(char ch) noexcept:
@@ -479,6 +480,37 @@ cdef void swallow_ch(char ch) noexcept:
 cdef void swallow_s(const char* s) noexcept:
     return
 
+#################################################################
+# Batched calls of a PARI function (see Pari.map)
+#################################################################
+
+cdef GEN map_closure(GEN C, GEN xs, GEN extra):
+    """
+    Return the ``t_VEC`` of the values of the closure ``C`` at the
+    entries of ``xs``, followed by the arguments in ``extra``.  The
+    PARI stack used by each call, except for its result, is released
+    before the next one.  This must be called inside ``sig_on()``.
+    """
+    global avma
+    cdef long i, n = lg(xs) - 1, m = lg(extra) - 1
+    cdef GEN v = cgetg(n + 1, t_VEC)
+    cdef GEN args = cgetg(m + 2, t_VEC)
+    cdef GEN y
+    cdef pari_sp av
+    for i in range(1, m + 1):
+        set_gel(args, i + 1, gel(extra, i))
+    for i in range(1, n + 1):
+        av = avma
+        set_gel(args, 1, gel(xs, i))
+        y = closure_callgenvec(C, args)
+        if is_universal_constant(y):
+            # Such as the results of isprime()
+            avma = av
+        else:
+            y = gerepilecopy(av, y)
+        set_gel(v, i, y)
+    return v
+
 include 'auto_instance.pxi'
 
 @cython.final
@@ -507,6 +539,10 @@ cdef class Pari(Pari_auto):
         # with multi-threading.
         pari_stackcheck_init(NULL)
 
+        # This is the main thread, other threads get their own PARI
+        # stack if PARI supports threads (see threads.h)
+        cypari_threads_init()
+
         _pari_init_error_handling()
         _pari_init_closure()
 
@@ -539,6 +575,9 @@ cdef class Pari(Pari_auto):
         global factor_proven
         factor_proven = 1
 
+        # Intern the integers in the same range as CPython does.
+        set_small_int_cache(-5, 256)
+
     def __init__(self, size_t size=8000000, size_t sizemax=0, unsigned long maxprime=500000):
         """
         (Re)-Initialize the PARI system.
@@ -612,12 +651,11 @@ cdef class Pari(Pari_auto):
         # Increase the table of primes if needed
         self.init_primes(maxprime)
 
-        # Initialize some constants
-        sig_on()
-        self.PARI_ZERO = new_gen_noclear(gen_0)
-        self.PARI_ONE = new_gen_noclear(gen_1)
-        self.PARI_TWO = new_gen_noclear(gen_2)
-        sig_off()
+        # Initialize some constants (these are interned, unless the
+        # small integer cache has been disabled)
+        self.PARI_ZERO = integer_to_gen(0)
+        self.PARI_ONE = integer_to_gen(1)
+        self.PARI_TWO = integer_to_gen(2)
 
     def shut_up(self):
         global pariErr
@@ -642,6 +680,8 @@ cdef class Pari(Pari_auto):
         (available memory address, think of this as the stack pointer),
         ``bot`` (bottom of stack).
 
+        See :meth:`memory_stats` for more detailed information.
+
         EXAMPLE::
 
             sage: pari.debugstack()  # random
@@ -660,6 +700,684 @@ cdef class Pari(Pari_auto):
             <unsigned long>pari_mainstack.rsize)
         fflush(stdout)
 
+    def memory_stats(self, reset=False):
+        r"""
+        Return a dictionary describing the memory used by PARI.
+
+        The entries are:
+
+        - ``clones`` -- the number of clones on the PARI heap owned by
+          a :class:`Gen`
+
+        - ``clone_bytes`` -- the total size of these clones in bytes
+
+        - ``dynamic_clones`` -- how many of these clones are dynamic
+          objects (such as the result of ``ellinit``), to which PARI
+          attaches further data as it is computed; that data is not
+          included in ``clone_bytes``
+
+        - ``stack_used`` -- the number of bytes currently in use on the
+          PARI stack
+
+        - ``stack_peak`` -- the largest number of bytes of the PARI
+          stack used during a computation, including the scratch space
+          freed before it returned, while the stack is tracked (see
+          :meth:`set_stack_tracking`); otherwise, only the part of the
+          stack left in use by computations is counted (computations in
+          threads other than the main thread are not included)
+
+        - ``stack_size``, ``stack_rsize`` and ``stack_vsize`` -- the
+          current, requested and maximum sizes of the PARI stack (see
+          :meth:`stacksize` and :meth:`stacksizemax`)
+
+        - ``stack_growths`` -- the number of times PARI had to enlarge
+          its stack during a computation
+
+        - ``pool_bytes`` -- the number of bytes allocated for the pool
+          of small clones (see :meth:`set_clone_pool_limit`)
+
+        - ``pool_used_bytes`` -- how many of these bytes are taken by
+          live clones, including the unused part of their slots
+
+        INPUT:
+
+        - ``reset`` -- (default: ``False``) if ``True``, reset
+          ``stack_peak`` and ``stack_growths`` after reading them
+
+        EXAMPLES::
+
+            sage: stats = pari.memory_stats(reset=True)
+            sage: sorted(stats)
+            ['clone_bytes', 'clones', 'dynamic_clones', 'pool_bytes', 'pool_used_bytes', 'stack_growths', 'stack_peak', 'stack_rsize', 'stack_size', 'stack_used', 'stack_vsize']
+            sage: x = pari(2)**10000
+            sage: stats = pari.memory_stats()
+            sage: stats['stack_peak'] >= x.__sizeof__() - object.__sizeof__(x)
+            True
+            sage: pari.set_stack_tracking(True)
+            False
+            sage: _ = pari.memory_stats(reset=True)
+            sage: pari('3^100000 % 7')
+            4
+            sage: pari.memory_stats()['stack_peak'] > (3**100000).bit_length() // 8
+            True
+            sage: pari.set_stack_tracking(False)
+            True
+            sage: L = [pari(2)**1000 + i for i in range(10)]
+            sage: after = pari.memory_stats()
+            sage: after['clones'] - stats['clones']
+            10
+            sage: after['clone_bytes'] - stats['clone_bytes'] >= 10 * 1000 // 8
+            True
+            sage: del L
+            sage: pari.memory_stats()['clones'] == stats['clones']
+            True
+            sage: e = pari([0,1,0,0,0]).ellinit()
+            sage: pari.memory_stats()['dynamic_clones'] - stats['dynamic_clones']
+            1
+            sage: K = pari('y^2 + 1').bnfinit()
+            sage: pari.memory_stats()['dynamic_clones'] - stats['dynamic_clones']
+            2
+        """
+        global stack_peak, stack_growths
+        stats = {
+            'clones': live_clones,
+            'clone_bytes': live_clone_bytes,
+            'dynamic_clones': live_dynamic,
+            'stack_used': pari_mainstack.top - avma,
+            'stack_peak': stack_peak,
+            'stack_size': pari_mainstack.size,
+            'stack_rsize': pari_mainstack.rsize,
+            'stack_vsize': pari_mainstack.vsize,
+            'stack_growths': stack_growths,
+            'pool_bytes': pool_bytes,
+            'pool_used_bytes': pool_used_bytes}
+        if reset:
+            stack_peak = 0
+            stack_growths = 0
+        return stats
+
+    def set_profiling(self, bint enable):
+        r"""
+        Turn on or off the profiling of calls to PARI functions, and
+        return whether it was on.
+
+        While profiling, every call of an auto-generated method (which
+        is named after the PARI function it calls) records its wall
+        time and the largest part of the PARI stack it used, as well
+        as whether PARI had to enlarge its stack.  The results are
+        returned by :meth:`profile_report`, and can be used to choose
+        the stack size for a job.  Calls made from within another PARI
+        computation are included in the outer call.
+
+        The stack used by a call is found as while the stack is tracked
+        (see :meth:`set_stack_tracking`): the free part of the PARI
+        stack below the deepest computation so far is kept filled with
+        a fixed pattern, so each call costs time proportional to the
+        stack it uses.
+
+        EXAMPLES::
+
+            sage: pari.set_profiling(True)
+            False
+            sage: K = pari.bnfinit('y^2 - 229')
+            sage: d = pari(2**100).numdiv()
+            sage: pari.set_profiling(False)
+            True
+            sage: data = pari.profile_report(raw=True, reset=True)
+            sage: sorted(data)
+            ['bnfinit', 'numdiv']
+            sage: data['bnfinit']['calls']
+            1
+            sage: data['bnfinit']['stack_peak'] > data['numdiv']['stack_peak'] > 0
+            True
+        """
+        global profiling, profile_name
+        old = profiling
+        profiling = enable
+        profile_name = None
+        return bool(old)
+
+    def set_stack_tracking(self, bint enable):
+        r"""
+        Turn on or off the tracking of the PARI stack used by
+        computations, including their scratch space, for the
+        ``stack_peak`` of :meth:`memory_stats`, and return whether it
+        was on.
+
+        While the stack is tracked, the free part of the PARI stack
+        below the deepest computation so far is kept filled with a
+        fixed pattern, so each computation costs time proportional to
+        the stack it uses.  The stack is also tracked while profiling
+        (see :meth:`set_profiling`) and while a stack policy is
+        installed (see :meth:`set_stack_policy`).
+
+        EXAMPLES::
+
+            sage: pari.set_stack_tracking(True)
+            False
+            sage: _ = pari.memory_stats(reset=True)
+            sage: pari('3^100000 % 7')
+            4
+            sage: pari.memory_stats()['stack_peak'] > 0
+            True
+            sage: pari.set_stack_tracking(False)
+            True
+        """
+        global stack_tracking
+        old = stack_tracking
+        stack_tracking = enable
+        if enable:
+            stack_watch()
+        return bool(old)
+
+    def set_threaded(self, bint enable):
+        r"""
+        Turn on or off the threaded mode, and return whether it was on.
+
+        In threaded mode, the auto-generated methods (which are named
+        after the PARI function they call) release the GIL while PARI
+        computes, so that other Python threads keep running, and can
+        compute with PARI at the same time.  This needs a PARI library
+        built with the ``pthread`` multithread engine (see
+        :meth:`mt_engine`), which is not the case on Windows, and in
+        which each thread has its own PARI stack.  The main thread uses the stack
+        set up by :meth:`allocatemem`; other threads get a stack when
+        they first use PARI, of ``pari.default("threadsize")`` bytes
+        (or of the current size of the main stack if this is 0) and
+        growing up to ``pari.default("threadsizemax")`` bytes, which
+        is freed when they exit.
+
+        Some restrictions apply in threads other than the main thread:
+
+        - Interrupts (``SIGINT``, ``SIGALRM``) only interrupt
+          computations in the main thread.
+
+        - Stack scopes (:meth:`stack_scope`) cannot be used, and
+          profiling (:meth:`set_profiling`) and the stack policy
+          (:meth:`set_stack_policy`) ignore these threads.
+
+        - PARI stores the data it computes on demand for objects such as
+          those returned by ``ellinit`` or ``bnfinit`` in the objects
+          themselves.  Such an object should not be used by two threads
+          at the same time, and the data which PARI attached to it in a
+          thread should not outlive that thread.
+
+        The table of variables, the defaults (``GP_DATA``) and the real
+        precision are shared by all threads.  The calls which may change
+        them keep the GIL, so that they never run at the same time:
+
+        - the conversion of strings to Gens, which may create variables,
+          and the methods :meth:`set_real_precision` and
+          :meth:`set_real_precision_bits`;
+
+        - the methods :meth:`default`, :meth:`eval`, :meth:`variable`,
+          :meth:`varhigher` and :meth:`varlower`, and the other
+          functions of the section "programming/specific" of the PARI
+          documentation;
+
+        - the functions taking a closure, such as ``parvector``.
+
+        A GP closure given to another function, as in ``apply``, runs
+        without the GIL: it must not create variables (by calling
+        ``eval`` on a string) or change defaults (with ``default`` or
+        ``localprec``) while other threads compute.
+
+        EXAMPLES::
+
+            sage: import threading
+            sage: try:
+            ....:     old = pari.set_threaded(True)
+            ....: except RuntimeError:  # PARI built without threads
+            ....:     old = False
+            sage: results = [None] * 4
+            sage: def work(i):
+            ....:     results[i] = pari.factor(2**64 + 2*i + 1)
+            sage: threads = [threading.Thread(target=work, args=(i,))
+            ....:            for i in range(4)]
+            sage: for t in threads:
+            ....:     t.start()
+            sage: for t in threads:
+            ....:     t.join()
+            sage: results[0]
+            [274177, 1; 67280421310721, 1]
+            sage: results == [pari.factor(2**64 + 2*i + 1) for i in range(4)]
+            True
+
+        Variables can be created by several threads at the same time::
+
+            sage: def create(i):
+            ....:     results[i] = [pari('t%d_%d + 1' % (i, j)).variable()
+            ....:                   for j in range(50)]
+            sage: threads = [threading.Thread(target=create, args=(i,))
+            ....:            for i in range(4)]
+            sage: for t in threads:
+            ....:     t.start()
+            sage: for t in threads:
+            ....:     t.join()
+            sage: len(set(str(v) for r in results for v in r))
+            200
+            sage: pari('t2_7').variable() == results[2][7]
+            True
+            sage: _ = pari.set_threaded(old)
+        """
+        global release_gil, cypari_thread_default_size
+        old = release_gil
+        if enable and not cypari_threads_enabled:
+            raise RuntimeError("PARI was built without thread support")
+        if enable:
+            cypari_thread_default_size = pari_mainstack.rsize
+        release_gil = enable
+        return bool(old)
+
+    def set_nbthreads(self, long n):
+        r"""
+        Set the number of threads used by the parallel GP functions
+        (``parapply``, ``pareval``, ``parselect``, ``parvector``,
+        ``parsum``, ``parfor``...), and return the previous number.
+
+        This needs a PARI library built with the ``pthread``
+        multithread engine (see :meth:`mt_engine`), as on Linux and
+        macOS.  On Windows, PARI is built with the ``single`` engine:
+        the parallel functions always run sequentially, in the calling
+        thread, and only 1 thread can be set.
+
+        By default, PARI uses one thread for each processor.  The
+        parallel functions run sequentially when ``n`` is 1 or when they
+        are called by another parallel function.  In threaded mode (see
+        :meth:`set_threaded`) they should only be called from the main
+        thread.  Each thread has its own PARI stack, whose size is
+        given by ``pari.default("threadsize")`` (the size of the main
+        stack if 0) and may grow up to :meth:`get_threadsizemax`.
+
+        The functions run in parallel must be GP closures, such as
+        ``pari("x -> factor(x)")``: Python functions converted to
+        closures cannot be called from the threads of PARI, and doing
+        so raises a :class:`PariError`.  The functions looping over a
+        variable take a closure of this variable instead of the variable
+        and an expression, so that the GP code ``parvector(N, i, i^2)``
+        becomes ``pari.parvector(N, "i -> i^2")``.  Global GP variables must be
+        exported with ``export`` to be seen by these threads.
+
+        EXAMPLES::
+
+            sage: try:
+            ....:     old = pari.set_nbthreads(4)
+            ....: except RuntimeError:  # PARI built without threads
+            ....:     old = None
+            sage: pari.parapply('n -> factor(2^n + 1)', [32, 64])
+            [[641, 1; 6700417, 1], [274177, 1; 67280421310721, 1]]
+            sage: pari.parvector(5, 'i -> i^2')
+            [1, 4, 9, 16, 25]
+            sage: pari.parsum(1, 1000, 'i -> i^2')
+            333833500
+            sage: pari.parvector(5, 2)
+            Traceback (most recent call last):
+            ...
+            TypeError: expr must be a closure
+
+        A single thread can run Python functions::
+
+            sage: _ = pari.set_nbthreads(1)
+            sage: pari.parvector(5, lambda i: i + 1)
+            [2, 3, 4, 5, 6]
+            sage: if old is not None:
+            ....:     _ = pari.set_nbthreads(old)
+
+        TESTS::
+
+            sage: pari.set_nbthreads(0)
+            Traceback (most recent call last):
+            ...
+            ValueError: the number of threads must be positive
+        """
+        if n < 1:
+            raise ValueError("the number of threads must be positive")
+        if n > 1 and not cypari_threads_enabled:
+            raise RuntimeError("PARI was built without thread support")
+        old = self.get_nbthreads()
+        self.default('nbthreads', n)
+        return old
+
+    def get_nbthreads(self):
+        """
+        Return the number of threads used by the parallel GP functions.
+        See :meth:`set_nbthreads`.
+
+        EXAMPLES::
+
+            sage: pari.get_nbthreads() >= 1
+            True
+        """
+        return int(self.default('nbthreads'))
+
+    def set_threadsizemax(self, size_t size):
+        r"""
+        Set the maximal size in bytes of the PARI stack of the threads
+        started by the parallel GP functions and by :meth:`set_threaded`,
+        and return the previous size.
+
+        Like the main stack (see :meth:`allocatemem`), the stack of a
+        thread starts at ``pari.default("threadsize")`` bytes and is
+        doubled when needed, up to this size.  It applies to the
+        threads started afterwards.
+
+        EXAMPLES::
+
+            sage: old = pari.set_threadsizemax(2**28)
+            sage: pari.get_threadsizemax()
+            268435456
+            sage: _ = pari.set_threadsizemax(old)
+        """
+        old = self.get_threadsizemax()
+        self.default('threadsizemax', size)
+        return old
+
+    def get_threadsizemax(self):
+        """
+        Return the maximal size in bytes of the PARI stack of a thread.
+        See :meth:`set_threadsizemax`.
+        """
+        return int(self.default('threadsizemax'))
+
+    def mt_engine(self):
+        """
+        Return the name of the multithread engine of the PARI library:
+        ``'pthread'``, with which the parallel GP functions run in
+        parallel (see :meth:`set_nbthreads`) and the threaded mode is
+        available (see :meth:`set_threaded`), or ``'single'``, without
+        them.  The PARI library is built with ``'pthread'`` on Linux
+        and macOS, and with ``'single'`` on Windows.
+
+        EXAMPLES::
+
+            sage: import sys
+            sage: pari.mt_engine() == ('single' if sys.platform == 'win32' else 'pthread')
+            True
+        """
+        return paricfg_mt_engine.decode('ascii')
+
+    def acall(self, task, *args, **kwargs):
+        r"""
+        Return an awaitable running ``task`` with the given arguments in
+        a worker process, so that the event loop of :mod:`asyncio` goes
+        on while PARI computes.
+
+        The task is given like for :class:`cypari.aio.AsyncPari`: the
+        name of a method of ``pari`` or a GP expression.  Cancelling the
+        task awaiting the result interrupts the computation.  The calls
+        are run by a default :class:`cypari.aio.AsyncPari`, created the
+        first time this method is called.
+
+        EXAMPLES::
+
+            sage: import asyncio
+            sage: asyncio.run(pari.acall('bnfinit', 'y^2 + 23')).bnf_get_no()
+            3
+            sage: asyncio.run(pari.acall('n -> n!', 10))
+            3628800
+        """
+        from cypari.aio import default_async_pari
+        return default_async_pari().call(task, *args, **kwargs)
+
+    def deadline(self, seconds=None, cpu=None):
+        r"""
+        Return a context manager which interrupts the computations in its
+        block with :class:`AlarmInterrupt` after ``seconds`` seconds of
+        wall-clock time or ``cpu`` seconds of CPU time, whichever comes
+        first (``None`` means no limit).
+
+        The interrupt jumps out of PARI like ``Ctrl-C``, and the PARI
+        stack and the state of the GP evaluator are then reset, so that
+        PARI can be used again.  The CPU time is that of the whole
+        process, including the threads of the parallel GP functions.
+
+        Deadlines can be nested: the computations are interrupted when
+        the earliest of them expires, and the attribute ``expired`` of a
+        deadline tells whether it was the one which expired.  They use
+        the interval timers of the process, and a timer which was set
+        before, for instance with ``signal.alarm()``, still fires in
+        time and runs on afterwards.  Deadlines can only be used in the
+        main thread, and not on Windows.
+
+        EXAMPLES::
+
+            sage: from cypari import AlarmInterrupt
+            sage: try:
+            ....:     with pari.deadline(0.5) as d:
+            ....:         pari.factor(2**512 + 1)
+            ....: except AlarmInterrupt:
+            ....:     print('too long', d.expired)
+            too long True
+            sage: pari.factor(2**64 + 1)
+            [274177, 1; 67280421310721, 1]
+
+        A CPU time limit inside a longer deadline, on GP code::
+
+            sage: with pari.deadline(60) as outer:
+            ....:     try:
+            ....:         with pari.deadline(cpu=0.5) as inner:
+            ....:             pari('my(n = 0); while(1, n++)')
+            ....:     except AlarmInterrupt:
+            ....:         print(inner.expired)
+            ....:     print(pari('sum(i = 1, 100, i)'))
+            True
+            5050
+            sage: outer.expired
+            False
+
+        TESTS::
+
+            sage: import signal
+            sage: _ = signal.setitimer(signal.ITIMER_REAL, 100)
+            sage: with pari.deadline(1):
+            ....:     pari.nextprime(10**20)
+            100000000000000000039
+            sage: 99 < signal.getitimer(signal.ITIMER_REAL)[0] <= 100
+            True
+            sage: _ = signal.setitimer(signal.ITIMER_REAL, 0)
+            sage: pari.deadline(-1)
+            Traceback (most recent call last):
+            ...
+            ValueError: time limits must be nonnegative
+        """
+        return Deadline(seconds, cpu)
+
+    def call_with_timeout(self, seconds, func, *args, cpu=None, **kwargs):
+        r"""
+        Return ``func(*args, **kwargs)``, interrupting it with
+        :class:`AlarmInterrupt` after ``seconds`` seconds of wall-clock
+        time or ``cpu`` seconds of CPU time.  See :meth:`deadline`.
+
+        EXAMPLES::
+
+            sage: from cypari import AlarmInterrupt
+            sage: pari.call_with_timeout(10, pari.nextprime, 10**20)
+            100000000000000000039
+            sage: try:
+            ....:     pari.call_with_timeout(None, pari.factor, 2**512 + 1, cpu=0.5)
+            ....: except AlarmInterrupt:
+            ....:     print('timeout')
+            timeout
+        """
+        with Deadline(seconds, cpu):
+            return func(*args, **kwargs)
+
+    def map(self, f, seq, *args, bint python=False):
+        r"""
+        Return the ``t_VEC`` of the values of the PARI function ``f`` at
+        the entries of ``seq``, with the further arguments ``args``, or
+        a list of Python objects (see :func:`gen_to_python`) if
+        ``python`` is true.
+
+        INPUT:
+
+        - ``f`` -- the name of a PARI function, such as ``'isprime'``,
+          a GP expression evaluating to a closure, such as the name of
+          a user function or ``'x -> x^2 + 1'``, or a Gen of type
+          ``t_CLOSURE``
+
+        - ``seq`` -- a ``t_VEC``, ``t_COL`` or ``t_LIST``, or an
+          iterable of objects which can be converted to Gens
+
+        - ``args`` -- arguments following the entry of ``seq`` in each
+          call, converted to Gens once
+
+        For cheap functions, this is much faster than calling a method
+        of ``pari`` in a Python loop: the function is looked up once,
+        Python numbers are converted without creating Gens, and all the
+        calls run within a single ``sig_on()``, releasing the PARI stack
+        used by each of them, so that only the result is copied to the
+        PARI heap.
+
+        EXAMPLES::
+
+            sage: pari.map('isprime', range(10))
+            [0, 0, 1, 1, 0, 1, 0, 1, 0, 0]
+            sage: pari.map('isprime', [2**61 - 1, 2**64 + 1], python=True)
+            [1, 0]
+            sage: E = [pari.ellinit([a, 1]) for a in range(1, 4)]
+            sage: pari.map('ellap', E, 101)
+            [-3, 10, -12]
+            sage: pari.map('polisirreducible', pari('[x^2 + 1, x^2 - 1, x^4 + 4]'))
+            [1, 0, 0]
+            sage: pari.map('(x, n) -> x^n', pari('List([1, 2, 3])'), 3)
+            [1, 8, 27]
+            sage: _ = pari('sq(x) = x^2')
+            sage: pari.map('sq', (pari('1/2'), 3, 'y'))
+            [1/4, 9, y^2]
+            sage: pari.map(pari('x -> factor(x)'), [6], python=True)
+            [[[2, 1], [3, 1]]]
+            sage: pari.map('(a, b) -> a*x + b*y', [1, 2], 3, python=True)
+            [('t_POL', 'x', [('t_POL', 'y', [0, 3]), 1]), ('t_POL', 'x', [('t_POL', 'y', [0, 3]), 2])]
+
+        TESTS::
+
+            sage: pari.map('isprime', [])
+            []
+            sage: pari.map('x', [1])
+            Traceback (most recent call last):
+            ...
+            TypeError: f must be the name of a PARI function or evaluate to a closure
+            sage: pari.map('nosuchfunction', [1])
+            Traceback (most recent call last):
+            ...
+            TypeError: f must be the name of a PARI function or evaluate to a closure
+            sage: pari.map('x -> 1/x', [1, 0])
+            Traceback (most recent call last):
+            ...
+            PariError: impossible inverse in gdiv: 0
+            sage: pari.map('x -> 1/x', [1, 2.0])
+            [1, 0.500000000000000]
+            sage: pari.map('isprime', pari(5))
+            Traceback (most recent call last):
+            ...
+            TypeError: seq must be a t_VEC, t_COL or t_LIST, not t_INT
+        """
+        cdef Gen C, x, r
+        cdef entree* ep
+        cdef list L = None
+        cdef GEN xs, extra, v
+        cdef long i, t
+        if isinstance(f, Gen):
+            C = <Gen>f
+        else:
+            name = to_bytes(f)
+            sig_on()
+            ep = is_entry(name) if f.isidentifier() else NULL
+            if ep is not NULL and ep.code is not NULL:
+                # A built-in or installed function
+                C = new_gen(strtofunction(name))
+            else:
+                C = new_gen(gp_read_str(name))
+        if typ(C.g) != t_CLOSURE:
+            raise TypeError("f must be the name of a PARI function or evaluate to a closure")
+
+        if isinstance(seq, Gen):
+            x = <Gen>seq
+            t = typ(x.g)
+            if t == t_LIST:
+                x = x.Vec()
+            elif t != t_VEC and t != t_COL:
+                raise TypeError("seq must be a t_VEC, t_COL or t_LIST, not "
+                                + type_name(t).decode('ascii'))
+        else:
+            # Python numbers are converted inside sig_on() below
+            L = list(seq)
+            for i in range(len(L)):
+                if not is_python_number(L[i]) and not isinstance(L[i], Gen):
+                    L[i] = objtogen(L[i])
+        cdef list A = [objtogen(a) for a in args]
+
+        sig_on()
+        if L is None:
+            xs = x.g
+        else:
+            xs = cgetg(len(L) + 1, t_VEC)
+            for i in range(len(L)):
+                if isinstance(L[i], Gen):
+                    set_gel(xs, i + 1, (<Gen>L[i]).g)
+                else:
+                    set_gel(xs, i + 1, python_number_to_GEN(L[i]))
+        extra = cgetg(len(A) + 1, t_VEC)
+        for i in range(len(A)):
+            set_gel(extra, i + 1, (<Gen>A[i]).g)
+        v = map_closure(C.g, xs, extra)
+        r = new_gen(v)
+        if not python:
+            return r
+        # Convert the copy on the PARI heap outside sig_on(): the
+        # conversion may use the PARI stack, to get the names of
+        # variables
+        return GEN_to_python(r.g, {})
+
+    def profile_report(self, raw=False, reset=False):
+        r"""
+        Return the data collected while profiling is turned on with
+        :meth:`set_profiling`, as a table with one row for each PARI
+        function, sorted by decreasing stack usage.
+
+        The columns are the number of calls, the total and mean wall
+        time, the largest part of the PARI stack used by one call (in
+        bytes), and the number of calls which made PARI enlarge its
+        stack.
+
+        INPUT:
+
+        - ``raw`` -- (default: ``False``) if ``True``, return instead a
+          dictionary mapping each function name to a dictionary with
+          keys ``calls``, ``seconds``, ``stack_peak`` and
+          ``stack_growths``
+
+        - ``reset`` -- (default: ``False``) if ``True``, discard the
+          data after reading it
+
+        EXAMPLES::
+
+            sage: old = pari.set_profiling(True)
+            sage: x = pari('x^4 + 1').polgalois()
+            sage: old = pari.set_profiling(old)
+            sage: print(pari.profile_report(reset=True))  # random
+            function       calls    total (s)     mean (s)   stack peak   growths
+            polgalois          1     0.000144     0.000144         4840         0
+            sage: pari.profile_report(raw=True)
+            {}
+        """
+        global profile_data
+        data = profile_data
+        if reset:
+            profile_data = {}
+        if raw:
+            return {name: {'calls': calls, 'seconds': seconds,
+                           'stack_peak': peak, 'stack_growths': growths}
+                    for name, (calls, seconds, peak, growths) in data.items()}
+        rows = ["{:<12} {:>8} {:>12} {:>12} {:>12} {:>9}".format(
+            "function", "calls", "total (s)", "mean (s)", "stack peak", "growths")]
+        for name, (calls, seconds, peak, growths) in sorted(
+                data.items(), key=lambda item: (-item[1][2], item[0])):
+            rows.append("{:<12} {:>8} {:>12.6f} {:>12.6f} {:>12} {:>9}".format(
+                name, calls, seconds, seconds / calls, peak, growths))
+        return "\n".join(rows)
+
     def __repr__(self):
         return "Interface to the PARI C library"
 
@@ -926,6 +1644,8 @@ cdef class Pari(Pari_auto):
 
             sage: pari.zero()
             0
+            sage: pari.zero() is pari(0)
+            True
         """
         return self.PARI_ZERO
 
@@ -935,9 +1655,184 @@ cdef class Pari(Pari_auto):
 
             sage: pari.one()
             1
+            sage: pari.one() is pari(1)
+            True
         """
         return self.PARI_ONE
 
+    def set_small_int_range(self, long low, long high):
+        """
+        Set the range of integers for which PARI integers are interned,
+        and return the previous range as a tuple ``(low, high)``.
+
+        Converting a Python integer in the range ``low <= n <= high``,
+        or computing a PARI ``t_INT`` in that range, returns a shared
+        Gen instead of allocating a new one, like CPython does for
+        small ``int`` objects. The default range is ``(-5, 256)``.
+        An empty range (``high < low``) disables the cache.
+
+        EXAMPLES::
+
+            sage: pari.get_small_int_range()
+            (-5, 256)
+            sage: pari(7) is pari(7)
+            True
+            sage: pari(3) + 4 is pari(7)
+            True
+            sage: pari(1000) is pari(1000)
+            False
+            sage: old = pari.set_small_int_range(-10, 1000); old
+            (-5, 256)
+            sage: pari(1000) is pari(1000)
+            True
+            sage: pari.set_small_int_range(0, -1)
+            (-10, 1000)
+            sage: pari(7) is pari(7)
+            False
+            sage: pari.set_small_int_range(*old)
+            (0, -1)
+            sage: pari.zero() is pari(0)
+            True
+        """
+        old = (small_int_min, small_int_max)
+        set_small_int_cache(low, high)
+        return old
+
+    def get_small_int_range(self):
+        """
+        Return the range ``(low, high)`` of the small integer cache.
+        See :meth:`set_small_int_range`.
+
+        EXAMPLES::
+
+            sage: pari.get_small_int_range()
+            (-5, 256)
+        """
+        return (small_int_min, small_int_max)
+
+    def cache_dir(self, path, max_size=2**30):
+        r"""
+        Store the results of ``nfinit``, ``bnfinit``, ``ellinit``,
+        ``lfuninit``, ``mfinit``, ``galoisinit`` and ``znstar`` in the
+        directory ``path``, and reuse them when these functions are
+        called again with the same arguments, also in later sessions
+        or other processes. Return the :class:`DiskCache`.
+
+        INPUT:
+
+        - ``path`` -- the directory of the cache, which is created if
+          needed; if ``None``, stop using the cache and return ``None``
+
+        - ``max_size`` -- (default: 1 GiB) the maximum total size in
+          bytes of the files in the cache; the least recently used
+          results are removed to stay below it
+
+        Results are found by a hash of the name of the function, its
+        arguments and the precision. PARI refers to variables by their
+        number, so the hash also covers the numbers and names of the
+        variables in the arguments. Results computed with other
+        variables than those of the arguments may therefore be stale
+        if variables were created in a different order.
+
+        EXAMPLES::
+
+            sage: import tempfile
+            sage: cache = pari.cache_dir(tempfile.mkdtemp())
+            sage: K = pari.bnfinit('y^3 - 2')
+            sage: L = pari.bnfinit('y^3 - 2')
+            sage: L == K
+            True
+            sage: cache.stats()['hits']
+            1
+            sage: E = pari.ellinit([0, 1]); E.ellglobalred()[0]
+            36
+            sage: pari.ellinit([0, 1]).ellglobalred()[0]
+            36
+            sage: cache.stats()['hits']
+            2
+            sage: pari.get_cache_dir() is cache
+            True
+            sage: cache.clear()
+            sage: pari.cache_dir(None)
+            sage: pari.get_cache_dir() is None
+            True
+        """
+        global disk_cache
+        disk_cache = None if path is None else DiskCache(path, max_size)
+        return disk_cache
+
+    def get_cache_dir(self):
+        """
+        Return the :class:`DiskCache` set by :meth:`cache_dir`, or
+        ``None``.
+        """
+        return disk_cache
+
+    def set_clone_pool_limit(self, size_t words):
+        """
+        Set the size in words below which the results of PARI
+        computations are stored in a pool of small clones, and return
+        the previous limit.
+
+        Each :class:`Gen` normally owns a clone of its PARI object,
+        which is allocated with ``malloc`` and freed when the Gen is
+        deleted.  Clones of at most ``words`` words are instead taken
+        from a pool holding slots of a few fixed sizes, which is much
+        faster for small objects such as integers, integers modulo
+        `n` or short vectors.  The default limit is 32 words, the
+        maximum is 64, and 0 disables the pool.  Memory taken by the
+        pool is never returned to the system, but freed slots are
+        reused; see :meth:`memory_stats`.
+
+        EXAMPLES::
+
+            sage: pari.get_clone_pool_limit()
+            32
+            sage: before = pari.memory_stats()['pool_used_bytes']
+            sage: x = pari(2)**100
+            sage: x._where()
+            'on heap'
+            sage: pari.memory_stats()['pool_used_bytes'] > before
+            True
+            sage: del x
+            sage: pari.memory_stats()['pool_used_bytes'] == before
+            True
+            sage: old = pari.set_clone_pool_limit(0)
+            sage: y = pari(2)**100
+            sage: pari.memory_stats()['pool_used_bytes'] == before
+            True
+            sage: pari.set_clone_pool_limit(old)
+            0
+            sage: del y
+
+        TESTS::
+
+            sage: pari.set_clone_pool_limit(1000)
+            Traceback (most recent call last):
+            ...
+            ValueError: clones of more than 64 words cannot be pooled
+            sage: v = pari('[1, 2, 3]') * 2
+            sage: w = v[1]
+            sage: del v
+            sage: w, w + 1
+            (4, 5)
+        """
+        old = clone_pool_limit
+        set_clone_pool_limit(words)
+        return old
+
+    def get_clone_pool_limit(self):
+        """
+        Return the size in words of the largest clones allocated in the
+        pool of small clones.  See :meth:`set_clone_pool_limit`.
+
+        EXAMPLES::
+
+            sage: pari.get_clone_pool_limit()
+            32
+        """
+        return clone_pool_limit
+
     def new_with_bits_prec(self, s, long precision):
         r"""
         pari.new_with_bits_prec(self, s, precision) creates s as a PARI
@@ -1010,8 +1905,9 @@ cdef class Pari(Pari_auto):
         by ``s``), but it will increase its stack if needed up to the
         maximum size which is set by ``sizemax``.
 
-        The PARI stack is never automatically shrunk.  You can use the
-        command ``pari.allocatemem(10**6)`` to reset the size to `10^6`,
+        The PARI stack is never automatically shrunk, unless a policy
+        has been installed with :meth:`set_stack_policy`.  You can use
+        the command ``pari.allocatemem(10**6)`` to reset the size to `10^6`,
         which is the default size at startup.  Note that the results of
         computations using Sage's PARI interface are copied to the
         Python heap, so they take up no space in the PARI stack.
@@ -1097,13 +1993,203 @@ cdef class Pari(Pari_auto):
                 sizemax = s
         elif sizemax < s:
             raise ValueError("the maximum size ({}) should be at least the stack size ({})".format(s, sizemax))
+        if stack_floor:
+            raise RuntimeError("the PARI stack cannot be resized inside a stack scope")
         sig_on()
         paristack_setsize(s, sizemax)
         sig_off()
+        # This is not a growth event for memory_stats(), and the new
+        # stack must be painted again (see stack.pyx)
+        global stack_size_seen, stack_peak, painted_top
+        stack_size_seen = pari_mainstack.size
+        stack_peak = 0
+        painted_top = 0
         if not silent:
             print("PARI stack size set to {} bytes, maximum size set to {}".
                 format(self.stacksize(), self.stacksizemax()))
 
+    def set_stack_policy(self, shrink_after=100, size_t min_size=0, size_t max_size=0):
+        r"""
+        Install a policy which shrinks the PARI stack after it has been
+        enlarged by a computation, and return it.
+
+        PARI enlarges its stack as needed, but never shrinks it, so a
+        single large computation can leave a long-running process
+        holding a huge stack forever.  Once ``shrink_after`` top-level
+        computations have passed since the stack last grew, the
+        returned :class:`StackPolicy` shrinks the stack to twice the
+        largest part of it used by these computations, but not below
+        ``min_size``.  The stack is resized between computations only,
+        never inside a :meth:`stack_scope`.
+
+        INPUT:
+
+        - ``shrink_after`` -- (default: 100) the number of computations
+          after which the stack may be shrunk; if ``None``, remove the
+          current policy and return ``None``
+
+        - ``min_size`` -- (default: 0) the smallest size in bytes to
+          which the stack is shrunk; ``0`` means the size requested
+          with :meth:`allocatemem` (or at startup)
+
+        - ``max_size`` -- (default: 0) the maximum size in bytes of the
+          PARI stack; ``0`` means the current maximum size (see
+          :meth:`stacksizemax`)
+
+        The method ``pregrow(s)`` of the policy enlarges the stack to
+        ``s`` bytes ahead of a computation known to need that much, and
+        its method ``stats()`` returns the counters of the policy.
+
+        EXAMPLES::
+
+            sage: pari.allocatemem(10**6, 2**26, silent=True)
+            sage: policy = pari.set_stack_policy(shrink_after=3)
+            sage: policy
+            StackPolicy(shrink_after=3, min_size=1000000, max_size=67108864)
+            sage: a = pari(2)**100000000
+            sage: pari.stacksize() > 10**7
+            True
+            sage: for i in range(3):
+            ....:     b = pari(10)**(100 + i)
+            sage: pari.stacksize()
+            1000000
+            sage: stats = policy.stats()
+            sage: stats['growths'], stats['shrinks'], stats['bytes_released'] > 10**7
+            (1, 1, True)
+            sage: policy.pregrow(10**7)
+            sage: pari.stacksize()
+            10000000
+
+        The stack used by a computation includes its scratch space, even
+        if the result is small::
+
+            sage: for i in range(3):
+            ....:     b = pari('3^20000000 % 7')
+            sage: b
+            2
+            sage: pari.stacksize() >= 10**7
+            True
+            sage: pari.get_stack_policy() is policy
+            True
+            sage: pari.set_stack_policy(None)
+            sage: pari.get_stack_policy() is None
+            True
+            sage: pari.allocatemem(10**6, silent=True)
+
+        TESTS::
+
+            sage: pari.set_stack_policy(0)
+            Traceback (most recent call last):
+            ...
+            ValueError: shrink_after must be positive
+            sage: pari.set_stack_policy(10, 10**7, 10**6)
+            Traceback (most recent call last):
+            ...
+            ValueError: the maximum size (1000000) should be at least the minimum size (10000000)
+        """
+        global stack_policy
+        cdef StackPolicy policy
+        if shrink_after is None:
+            stack_policy = None
+            return None
+        if min_size == 0:
+            min_size = pari_mainstack.rsize
+        if max_size == 0:
+            max_size = pari_mainstack.vsize
+        policy = StackPolicy(shrink_after, min_size, max_size)
+        if max_size != pari_mainstack.vsize:
+            if stack_floor:
+                raise RuntimeError("the PARI stack cannot be resized inside a stack scope")
+            policy.resize(max(min(pari_mainstack.size, max_size), policy.min_size))
+        stack_policy = policy
+        stack_watch()
+        return policy
+
+    def get_stack_policy(self):
+        """
+        Return the policy installed by :meth:`set_stack_policy`, or
+        ``None``.
+
+        EXAMPLES::
+
+            sage: pari.get_stack_policy() is None
+            True
+        """
+        return stack_policy
+
+    def stack_scope(self):
+        r"""
+        Return a context manager inside of which the results of PARI
+        computations are kept on the PARI stack.
+
+        Normally every new :class:`Gen` is cloned to the PARI heap and
+        the PARI stack is cleared after each computation.  Inside a
+        ``with pari.stack_scope():`` block, new Gens are instead left
+        on the PARI stack, which avoids a ``malloc``, a copy and a
+        ``free`` for each intermediate result.  When the block exits,
+        the Gens created inside it which are still referenced are
+        cloned to the heap, and the stack space is released.
+
+        Stack scopes can be nested. The PARI stack cannot be resized
+        with :meth:`allocatemem` while a scope is open.
+
+        EXAMPLES::
+
+            sage: a, b = pari(10**30), pari(3)
+            sage: with pari.stack_scope():
+            ....:     c = a*b + 1
+            ....:     inside = c._where()
+            sage: inside
+            'on stack'
+            sage: c, c._where()
+            (3000000000000000000000000000001, 'on heap')
+
+        References to components also survive the scope, and still
+        point into their parent::
+
+            sage: with pari.stack_scope():
+            ....:     v = pari('[1, [2, 3]]') * 2
+            ....:     w = v[1]
+            sage: w, w._where()
+            ([4, 6], 'on heap')
+            sage: w[0] = 5
+            sage: v
+            [2, [5, 6]]
+            sage: del v
+            sage: w
+            [5, 6]
+            sage: with pari.stack_scope():
+            ....:     M = pari('[1, 2; 3, 4]') * 10
+            ....:     e = M[1, 0]
+            sage: del M
+            sage: e, e._where()
+            (30, 'on heap')
+
+        TESTS::
+
+            sage: with pari.stack_scope():
+            ....:     pari.allocatemem(10**7)
+            Traceback (most recent call last):
+            ...
+            RuntimeError: the PARI stack cannot be resized inside a stack scope
+            sage: with pari.stack_scope():
+            ....:     x = pari(2)
+            ....:     with pari.stack_scope():
+            ....:         y = x**10
+            ....:         z = y + 1
+            ....:     t = z * 2
+            sage: x, y, z, t
+            (2, 1024, 1025, 2050)
+            sage: with pari.stack_scope():
+            ....:     pari(1) / 0
+            Traceback (most recent call last):
+            ...
+            PariError: impossible inverse in gdiv: 0
+            sage: pari(10).factor()
+            [2, 1; 5, 1]
+        """
+        return StackScope()
+
     def pari_version(self):
         return str(PARIVERSION)
 
@@ -1342,25 +2428,276 @@ cdef class Pari(Pari_auto):
 
             sage: pari.matrix(3,3,range(9))
             [0, 1, 2; 3, 4, 5; 6, 7, 8]
+            sage: A = pari.matrix(2, 2, [10**20, '1/2', 'x', 4]); A
+            [100000000000000000000, 1/2; x, 4]
+            sage: A[0,1] is A[0,1]
+            True
+            sage: A[1,0] = 7; A[1]
+            [1/2, 4]~
+            sage: A
+            [100000000000000000000, 1/2; 7, 4]
         """
         cdef long i, j, k
-        cdef Gen A
-        cdef Gen x
+        cdef GEN A
+        cdef list L
 
+        if entries is None:
+            sig_on()
+            return new_gen(zeromatcopy(m,n))
+        if len(entries) != m*n:
+            raise IndexError("len of entries (=%s) must be %s*%s=%s"%(len(entries),m,n,m*n))
+        L = [self(x) for x in entries]
+        # Build the matrix on the stack, pointing to the entries, and
+        # let new_gen() copy it, so the matrix does not need to keep
+        # the Gens for its entries alive.
         sig_on()
-        A = new_gen(zeromatcopy(m,n))
-        if entries is not None:
-            if len(entries) != m*n:
-                raise IndexError("len of entries (=%s) must be %s*%s=%s"%(len(entries),m,n,m*n))
-            k = 0
-            A.refers_to = {}
-            for i from 0 <= i < m:
-                for j from 0 <= j < n:
-                    x = self(entries[k])
-                    A.refers_to[(i,j)] = x
-                    (<GEN>(A.g)[j+1])[i+1] = <pari_longword>(x.g)
-                    k = k + 1
-        return A
+        A = zeromatcopy(m, n)
+        k = 0
+        for i in range(m):
+            for j in range(n):
+                set_gel(gel(A, j+1), i+1, (<Gen>L[k]).g)
+                k += 1
+        return new_gen(A)
+
+    def from_buffer(self, obj, type="vec", long precision=0):
+        """
+        Convert an object supporting the buffer protocol, such as a
+        NumPy array, an ``array.array`` or a ``memoryview``, to a PARI
+        vector or matrix.
+
+        The items of the buffer must be integers (signed or unsigned,
+        of at most 64 bits), floating point numbers or complex numbers.
+        They become ``t_INT``, ``t_REAL`` or ``t_COMPLEX`` entries,
+        except for a ``t_VECSMALL``, which only accepts integers
+        fitting in a signed PARI word (of 64 or 32 bits).
+        The PARI object is built in one pass on the PARI stack and then
+        copied to the heap as a whole, without creating a Gen for each
+        entry.
+
+        INPUT:
+
+        - ``obj`` -- a 1-dimensional buffer, or a 2-dimensional one if
+          ``type`` is ``"mat"``; any strides are accepted, so both C and
+          Fortran ordered arrays can be converted
+
+        - ``type`` -- (default: ``"vec"``) one of ``"vecsmall"``,
+          ``"vec"``, ``"col"`` or ``"mat"``
+
+        - ``precision`` -- (default: 0) the precision in bits of the
+          ``t_REAL`` entries; 0 means the default real precision
+
+        EXAMPLES::
+
+            sage: from array import array
+            sage: pari.from_buffer(array('q', [1, -2, 3]))
+            [1, -2, 3]
+            sage: pari.from_buffer(array('Q', [2**64 - 1]), 'col')
+            [18446744073709551615]~
+            sage: pari.from_buffer(array('q', [-2**40, 2**40]))
+            [-1099511627776, 1099511627776]
+            sage: v = pari.from_buffer(array('i', [5, 6]), 'vecsmall'); v, v.type()
+            (Vecsmall([5, 6]), 't_VECSMALL')
+            sage: pari.from_buffer(array('d', [0.5, 2.0]))
+            [0.500000000000000, 2.00000000000000]
+            sage: m = memoryview(array('q', range(6))).cast('B').cast('q', (2, 3))
+            sage: pari.from_buffer(m, 'mat')
+            [0, 1, 2; 3, 4, 5]
+            sage: import numpy  # optional - numpy
+            sage: a = numpy.arange(6, dtype=numpy.int64).reshape(2, 3)  # optional - numpy
+            sage: pari.from_buffer(a, 'mat') == pari.from_buffer(numpy.asfortranarray(a), 'mat')  # optional - numpy
+            True
+            sage: pari.from_buffer(a.T, 'mat')  # optional - numpy
+            [0, 3; 1, 4; 2, 5]
+
+        Floating point and complex arrays, such as the output of
+        :meth:`Gen.to_numpy`, can be converted back at any precision::
+
+            sage: r = pari('x^3 - 2').polroots()
+            sage: a = r.to_numpy('complex128')  # optional - numpy
+            sage: b = pari.from_buffer(a, 'col', precision=128)  # optional - numpy
+            sage: b[0].real().bitprecision()  # optional - numpy
+            128
+            sage: (b - r).normlp() < 1e-14  # optional - numpy
+            True
+            sage: pari.from_buffer(array('d', [0.5]), precision=256)[0].bitprecision()
+            256
+
+        TESTS::
+
+            sage: pari.from_buffer(array('Q', [2**63]), 'vecsmall')
+            Traceback (most recent call last):
+            ...
+            OverflowError: entry 0 does not fit in a PARI t_VECSMALL
+            sage: pari.from_buffer(array('d', [1.0]), 'vecsmall')
+            Traceback (most recent call last):
+            ...
+            TypeError: a PARI t_VECSMALL cannot hold floating point numbers
+            sage: pari.from_buffer(array('q', [1]), 'mat')
+            Traceback (most recent call last):
+            ...
+            ValueError: a PARI t_MAT needs a 2-dimensional buffer, not 1-dimensional
+            sage: pari.from_buffer(array('q', [1]), 'list')
+            Traceback (most recent call last):
+            ...
+            ValueError: type must be 'vecsmall', 'vec', 'col' or 'mat', not 'list'
+            sage: pari.from_buffer(memoryview(b'ab').cast('c'))
+            Traceback (most recent call last):
+            ...
+            TypeError: cannot convert a buffer of format 'c' to PARI
+            sage: pari.from_buffer(array('q'))
+            []
+        """
+        return buffer_to_gen(obj, type, precision)
+
+    def from_bytes(self, data):
+        """
+        Convert the output of :meth:`Gen.to_bytes`, given as ``bytes``
+        or any other object supporting the buffer protocol, back to a
+        Gen.
+
+        As with ``pickle``, only data from a trusted source should be
+        converted: the data is copied to the PARI stack as it is.
+
+        EXAMPLES::
+
+            sage: x = pari('[1/3, 2^100, Mod(2, 7)]')
+            sage: pari.from_bytes(x.to_bytes()) == x
+            True
+            sage: pari.from_bytes(memoryview(bytearray(x.to_bytes()))) == x
+            True
+
+        TESTS:
+
+        Only structures to which PARI attaches data later, such as the
+        result of ``nfinit``, are converted back to dynamic Gens::
+
+            sage: n = pari.memory_stats()['dynamic_clones']
+            sage: v = pari.from_bytes(pari('[1, [2, 3]]').to_bytes())
+            sage: pari.memory_stats()['dynamic_clones'] - n
+            0
+            sage: K = pari.from_bytes(pari.nfinit('y^2 + 1').to_bytes())
+            sage: pari.memory_stats()['dynamic_clones'] - n
+            1
+            sage: del K
+
+        ::
+
+            sage: pari.from_bytes(b'hello')
+            Traceback (most recent call last):
+            ...
+            ValueError: not a serialized PARI object
+            sage: pari.from_bytes(x.to_bytes()[:-1])
+            Traceback (most recent call last):
+            ...
+            ValueError: corrupt serialized PARI object
+        """
+        return bytes_to_gen(data)
+
+    def from_shared_memory(self, name):
+        """
+        Create a Gen from the shared memory block ``name`` written by
+        :meth:`Gen.to_shared_memory`, possibly in another process.
+
+        The data is copied from the shared memory to the PARI stack of
+        this process only once; the block is not modified and is closed
+        afterwards, but not unlinked.
+
+        EXAMPLES::
+
+            sage: x = pari('[Pi, 2^100, "abc"]')
+            sage: shm = x.to_shared_memory()
+            sage: y = pari.from_shared_memory(shm.name)
+            sage: y == x and y[0].bitprecision() == x[0].bitprecision()
+            True
+            sage: shm.close(); shm.unlink()
+
+        TESTS::
+
+            sage: from multiprocessing.shared_memory import SharedMemory
+            sage: shm = SharedMemory(create=True, size=100)
+            sage: pari.from_shared_memory(shm.name)
+            Traceback (most recent call last):
+            ...
+            ValueError: not a serialized PARI object
+            sage: shm.close(); shm.unlink()
+        """
+        return shared_memory_to_gen(name)
+
+    def vec_from_ints(self, seq):
+        """
+        Convert a sequence of Python integers to a PARI ``t_VEC``.
+
+        This is equivalent to ``pari(list(seq))`` for integers, but the
+        entries are converted in a single loop and the vector is copied
+        to the heap as a whole, without creating a Gen for each entry.
+
+        EXAMPLES::
+
+            sage: v = pari.vec_from_ints([1, -2, 3**50]); v
+            [1, -2, 717897987691852588770249]
+            sage: v == pari([1, -2, 3**50])
+            True
+            sage: pari.vec_from_ints(range(5))
+            [0, 1, 2, 3, 4]
+
+        TESTS::
+
+            sage: pari.vec_from_ints([1, 2.5])
+            Traceback (most recent call last):
+            ...
+            TypeError: entry 1 is of type float, not int
+            sage: pari.vec_from_ints(())
+            []
+        """
+        return sequence_to_gen(seq, SEQ_INTS, 0)
+
+    def vec_from_floats(self, seq, long bits=0):
+        """
+        Convert a sequence of Python floats to a PARI ``t_VEC`` of
+        ``t_REAL``.
+
+        INPUT:
+
+        - ``seq`` -- a sequence of ``float``
+
+        - ``bits`` -- (default: 0) the precision in bits of the entries;
+          0 means the default real precision
+
+        EXAMPLES::
+
+            sage: v = pari.vec_from_floats([0.5, -2.0, 0.0]); v
+            [0.500000000000000, -2.00000000000000, 0.E-15]
+            sage: pari.vec_from_floats([0.1], bits=128)[0].bitprecision()
+            128
+
+        TESTS::
+
+            sage: pari.vec_from_floats([0.5, 1])
+            Traceback (most recent call last):
+            ...
+            TypeError: entry 1 is of type int, not float
+        """
+        return sequence_to_gen(seq, SEQ_FLOATS, bits)
+
+    def vec_from_fractions(self, seq):
+        """
+        Convert a sequence of ``fractions.Fraction`` and Python integers
+        to a PARI ``t_VEC`` of ``t_FRAC`` and ``t_INT``.
+
+        EXAMPLES::
+
+            sage: from fractions import Fraction
+            sage: pari.vec_from_fractions([Fraction(1, 2), Fraction(-4, 6), 3, Fraction(5)])
+            [1/2, -2/3, 3, 5]
+
+        TESTS::
+
+            sage: pari.vec_from_fractions([Fraction(1, 2), 0.5])
+            Traceback (most recent call last):
+            ...
+            TypeError: entry 1 is of type float, not int or Fraction
+        """
+        return sequence_to_gen(seq, SEQ_FRACTIONS, 0)
 
     def genus2red(self, P, P0=None):
         """
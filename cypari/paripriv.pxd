@@ -27,6 +27,8 @@ cdef extern from "pari/paripriv.h":
 
     extern gp_data* GP_DATA
 
+    void evalstate_reset()
+
 # In older versions of PARI, this is declared in the private
 # non-installed PARI header file "anal.h". More recently, this is
 # declared in "paripriv.h". Since a double declaration does not hurt,
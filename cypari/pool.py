@@ -0,0 +1,215 @@
+r"""
+A pool of worker processes running PARI computations
+
+A :class:`PariPool` is a :class:`concurrent.futures.Executor` whose
+worker processes are set up for PARI once, when they start: stack size,
+table of primes, real precision and GP scripts. A task is the name of a
+PARI function, such as ``'bnfinit'``, or a GP expression, such as
+``'x -> factor(x^2 + 1)'``, together with its arguments. Gens are sent
+to the workers and back in the binary format of :meth:`Gen.to_bytes`,
+so they are never printed and parsed again.
+
+    >>> from cypari.pool import PariPool
+    >>> with PariPool(2, maxprime=10**6) as pool:
+    ...     f = pool.submit('factor', 2**64 + 1)
+    ...     print(f.result())
+    ...     print(list(pool.map('x -> x^2 + 1', range(6), chunksize=3)))
+    ...     print(pool.submit('sqrt(2)', precision=128).result().bitprecision())
+    [274177, 1; 67280421310721, 1]
+    [1, 2, 5, 10, 17, 26]
+    128
+
+Each task can be given a limit on the PARI stack of the worker which
+runs it, beyond which it fails with a stack overflow::
+
+    >>> from cypari import PariError
+    >>> with PariPool(1) as pool:
+    ...     f = pool.submit('x -> 2^x', 10**8, stack_max=2**22)
+    ...     try:
+    ...         f.result()
+    ...     except PariError as e:
+    ...         print('the PARI stack overflows' in e.errtext())
+    ...     print(pool.submit('x -> #Str(2^x)', 1000).result())
+    True
+    302
+"""
+
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from ._pari import Gen, pari
+
+__all__ = ['PariPool']
+
+# The stack size and maximum stack size of a worker after its setup,
+# restored after a task with a stack limit
+_worker_stack = None
+
+
+def _init_worker(size, sizemax, maxprime, precision, nbthreads, scripts, init):
+    """
+    Set up PARI in a new worker process.
+    """
+    global _worker_stack
+    if size or sizemax:
+        pari.allocatemem(size, sizemax, silent=True)
+    if maxprime:
+        pari.init_primes(maxprime)
+    if precision:
+        pari.set_real_precision_bits(precision)
+    if nbthreads:
+        pari.set_nbthreads(nbthreads)
+    for script in scripts:
+        pari.read(script)
+    if init is not None:
+        init()
+    _worker_stack = (pari.stacksize(), pari.stacksizemax())
+
+
+@functools.lru_cache(maxsize=256)
+def _closure(expr):
+    """
+    Return the GP closure ``expr``, parsed once per worker.
+    """
+    return pari(expr)
+
+
+def _call(task, args, kwargs):
+    """
+    Run one task in a worker.
+    """
+    if isinstance(task, str) and task.isidentifier():
+        function = getattr(pari, task, None)
+        if function is not None:
+            return function(*args, **kwargs)
+    # A closure or a GP expression, which only take a precision
+    precision = kwargs.pop('precision', 0)
+    if kwargs:
+        raise TypeError("unexpected keyword arguments for a GP expression: "
+                        + ", ".join(kwargs))
+    if precision:
+        old = pari.get_real_precision_bits()
+        pari.set_real_precision_bits(precision)
+    try:
+        if isinstance(task, Gen):
+            return task(*args)
+        if args:
+            return _closure(task)(*args)
+        return pari(task)
+    finally:
+        if precision:
+            pari.set_real_precision_bits(old)
+
+
+def _run(task, args, kwargs, stack_max):
+    """
+    Run one task in a worker, with the given limit on the PARI stack.
+    """
+    if not stack_max or stack_max == _worker_stack[1]:
+        return _call(task, args, kwargs)
+    pari.allocatemem(min(_worker_stack[0], stack_max), stack_max, silent=True)
+    try:
+        return _call(task, args, kwargs)
+    finally:
+        pari.allocatemem(_worker_stack[0], _worker_stack[1], silent=True)
+
+
+def _run_star(task, stack_max, *args):
+    return _run(task, args, {}, stack_max)
+
+
+class PariPool(Executor):
+    """
+    Executor running PARI tasks in ``n`` worker processes (by default,
+    one per processor), which are set up once when they start.
+
+    INPUT:
+
+    - ``n`` -- (default: the number of processors) the number of
+      worker processes
+
+    - ``init`` -- (default: ``None``) a function called without
+      arguments in each worker after the other settings
+
+    - ``size``, ``sizemax`` -- (default: 0) the size and maximum size in
+      bytes of the PARI stack of the workers, as for
+      :meth:`Pari.allocatemem`; 0 keeps the default
+
+    - ``maxprime`` -- (default: 0) if nonzero, the workers precompute
+      the primes up to ``maxprime`` with :meth:`Pari.init_primes`
+
+    - ``precision`` -- (default: 0) if nonzero, the real precision of
+      the workers in bits
+
+    - ``nbthreads`` -- (default: 1) the number of threads used by the
+      parallel GP functions in each worker (see
+      :meth:`Pari.set_nbthreads`); 0 keeps the default of PARI, which
+      uses all processors in every worker
+
+    - ``scripts`` -- (default: ``()``) GP scripts read by each worker
+      with ``pari.read``, for instance to define GP functions used by
+      the tasks
+
+    - ``stack_max`` -- (default: 0) the default limit in bytes on the
+      PARI stack of each task; 0 means the maximum stack size of the
+      workers
+
+    - ``mp_context`` -- (default: ``None``) the multiprocessing context
+      used to start the workers
+
+    The functions ``init`` and the arguments of the tasks are sent to
+    the workers with ``pickle``.  Tasks can be:
+
+    - the name of a method of ``pari``, called with the arguments and
+      keyword arguments of the task, like ``pari.bnfinit(pol)``
+
+    - a GP expression evaluating to a closure, such as
+      ``'x -> factor(x)'`` or the name of a function defined by one of
+      the ``scripts``, called with the arguments of the task; the
+      expression is parsed only once by each worker
+
+    - a GP expression without arguments, which is evaluated, with the
+      real precision given by the keyword ``precision`` in bits if any
+
+    - a Gen of type ``t_CLOSURE``
+    """
+    def __init__(self, n=None, init=None, size=0, sizemax=0, maxprime=0,
+                 precision=0, nbthreads=1, scripts=(), stack_max=0,
+                 mp_context=None):
+        if n is None:
+            n = os.cpu_count() or 1
+        self.stack_max = stack_max
+        self._executor = ProcessPoolExecutor(
+            n, mp_context=mp_context, initializer=_init_worker,
+            initargs=(size, sizemax, maxprime, precision, nbthreads,
+                      tuple(os.fspath(s) for s in scripts), init))
+
+    def submit(self, task, /, *args, stack_max=None, **kwargs):
+        """
+        Schedule ``task`` to be run with the given arguments and return
+        a :class:`concurrent.futures.Future`.
+
+        If ``stack_max`` is given, the PARI stack of the worker may
+        grow up to ``stack_max`` bytes during this task instead of the
+        default of the pool.
+        """
+        if stack_max is None:
+            stack_max = self.stack_max
+        return self._executor.submit(_run, task, args, kwargs, stack_max)
+
+    def map(self, task, *iterables, timeout=None, chunksize=1, stack_max=None):
+        """
+        Return an iterator over the results of ``task`` applied to the
+        elements of ``iterables``, like :func:`map`.
+
+        The arguments are sent to the workers by chunks of
+        ``chunksize`` tasks, which is much faster for small tasks.
+        """
+        if stack_max is None:
+            stack_max = self.stack_max
+        return self._executor.map(functools.partial(_run_star, task, stack_max),
+                                  *iterables, timeout=timeout, chunksize=chunksize)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -100,6 +100,54 @@ CyPari_DigitCount(PyLongObject *op)
 }
 #endif
 
+/*
+ * Conversion between Python integers and arrays of bytes, which lets
+ * CPython move whole machine words instead of 30-bit digits.  Python
+ * 3.13 made these functions public (PyLong_AsNativeBytes and
+ * PyLong_FromUnsignedNativeBytes) and changed the signature of the
+ * private functions which older versions provide.
+ *
+ * CyPari_FromBytes interprets the n bytes at b as an unsigned number.
+ * CyPari_AsBytes writes the two's complement representation of op to
+ * the n bytes at b, and returns -1 with an exception set if op does
+ * not fit.  In both functions, little_endian is 1 or 0.
+ */
+
+#if PY_VERSION_HEX >= 0x030D0000
+
+static inline PyObject*
+CyPari_FromBytes(const unsigned char *b, size_t n, int little_endian)
+{
+    return PyLong_FromUnsignedNativeBytes(b, n, little_endian);
+}
+static inline int
+CyPari_AsBytes(PyObject *op, unsigned char *b, size_t n, int little_endian)
+{
+    Py_ssize_t needed = PyLong_AsNativeBytes(op, b, (Py_ssize_t)n, little_endian);
+    if (needed < 0)
+        return -1;
+    if ((size_t)needed > n) {
+        PyErr_SetString(PyExc_OverflowError, "int too big to convert");
+        return -1;
+    }
+    return 0;
+}
+
+#else
+
+static inline PyObject*
+CyPari_FromBytes(const unsigned char *b, size_t n, int little_endian)
+{
+    return _PyLong_FromByteArray(b, n, little_endian, 0);
+}
+static inline int
+CyPari_AsBytes(PyObject *op, unsigned char *b, size_t n, int little_endian)
+{
+    return _PyLong_AsByteArray((PyLongObject*)op, b, n, little_endian, 1);
+}
+
+#endif
+
 /*
  * In Windows longs are 32 bits.
  */
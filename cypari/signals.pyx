@@ -33,6 +33,20 @@ cdef extern from "implementation.c":
     void _sig_on_interrupt_received() nogil
     void _sig_on_recover() nogil
     void _sig_off_warning(const char*, int) nogil
+    # The state of the signal handler for the current thread
+    cysigs_t cysigs
+    # See threads.h
+    int cypari_thread_kind
+    int CYPARI_THREAD_NEW
+    int CYPARI_THREAD_MAIN
+    int CYPARI_THREAD_OWN
+    bint cypari_threads_enabled
+    size_t cypari_thread_default_size
+    void cypari_threads_init()
+    void cypari_thread_setup()
+    void* cypari_interrupt_handle()
+    void cypari_thread_interrupt(void* handle) nogil
+    void cypari_interrupt_discard()
 
 
 class AlarmInterrupt(KeyboardInterrupt):
@@ -82,6 +96,7 @@ cdef extern from *:
     #define NO_SUCH_SIGNAL 256
     #define SIGHUP NO_SUCH_SIGNAL
     #define SIGALRM NO_SUCH_SIGNAL
+    #define SIGVTALRM NO_SUCH_SIGNAL
     #define SIGBUS NO_SUCH_SIGNAL
     #endif
     """
@@ -117,7 +132,7 @@ cdef public int sig_raise_exception "sig_raise_exception"(int sig, const char* m
     if sig == SIGHUP:
         _ = freopen("/dev/null", "r", stdin)
         raise SystemExit
-    if sig == SIGALRM:
+    if sig == SIGALRM or sig == SIGVTALRM:
         raise AlarmInterrupt
     if sig == SIGBUS:
         raise SignalError(s or "Bus error")
@@ -179,7 +194,6 @@ def sig_print_exception(sig, msg=None):
             # Python 2
             traceback.print_exception(typ, val, None, file=sys.stdout)
 
-cdef cysigs_t cysigs
 
 def init_cysignals():
     """
@@ -215,8 +229,9 @@ def init_cysignals():
 
 def sig_on_reset():
     """
-    Return the current value of ``cysigs.sig_on_count`` and set its
-    value to zero. This is used by the SageMath doctesting framework.
+    Return the current value of ``cysigs.sig_on_count`` in the current
+    thread and set its value to zero. This is used by the SageMath
+    doctesting framework.
 
     EXAMPLES::
 
@@ -233,6 +248,43 @@ def sig_on_reset():
     return s
 
 
+def thread_interrupt_handle():
+    """
+    Return a handle (an integer) with which :func:`interrupt_thread`
+    can interrupt the PARI computations of the current thread from
+    another thread.
+
+    The current thread must not be the main thread, and threads must
+    have PARI stacks of their own (see :meth:`Pari.set_threaded`).  The
+    handle is valid until the thread exits.
+    """
+    if cypari_thread_kind == CYPARI_THREAD_NEW:
+        cypari_thread_setup()
+    if cypari_thread_kind != CYPARI_THREAD_OWN:
+        raise RuntimeError("only threads with a PARI stack of their own can be interrupted")
+    return <size_t>cypari_interrupt_handle()
+
+def interrupt_thread(size_t handle):
+    """
+    Interrupt the PARI computation of the thread with the given
+    :func:`thread_interrupt_handle`, as ``SIGINT`` interrupts the main
+    thread: ``KeyboardInterrupt`` is raised in that thread, at once if
+    it is computing with PARI, or else at its next PARI call.  The
+    thread must still be running.
+
+    The thread must call :func:`discard_thread_interrupt` once it no
+    longer wants to be interrupted, in case the interrupt arrived
+    after its computation ended.
+    """
+    cypari_thread_interrupt(<void*>handle)
+
+def discard_thread_interrupt():
+    """
+    Discard an interrupt sent to the current thread by
+    :func:`interrupt_thread` which did not interrupt a computation.
+    """
+    cypari_interrupt_discard()
+
 def python_check_interrupt(sig, frame):
     """
     Python-level interrupt handler for interrupts raised in Python
@@ -23,15 +23,285 @@ Utility functions to handle the PARI stack and copy objects from it.
 
 # from .paridecl cimport pari_mainstack, avma, paristack_setsize, gsizebyte, gcopy_avma, gnil
 
+from cpython.ref cimport Py_REFCNT
+from time import perf_counter
+
+# While a stack_scope() is open, new_gen() does not clone its result to
+# the PARI heap.  Instead, the result is moved up the PARI stack to sit
+# just below ``stack_floor``, which is then lowered past it, and the
+# new Gen is appended to ``scoped_gens``.  Clearing the stack only
+# resets ``avma`` to ``stack_floor``.  Outside of any scope,
+# ``stack_floor`` is 0 and ``scoped_gens`` is None.
+cdef pari_sp stack_floor = 0
+cdef list scoped_gens = None
+
+# Interned Gens for the integers in [small_int_min, small_int_max], in
+# the spirit of CPython's small int cache.  They are shared by every
+# conversion and computation producing one of these integers, so they
+# must never be modified in place.  The cache is filled when PARI is
+# initialized and can be changed by Pari.set_small_int_range().
+cdef long small_int_min = 0
+cdef long small_int_max = -1
+cdef list small_int_cache = []
+
+# Accounting for Pari.memory_stats(): the number of clones on the PARI
+# heap which are owned by Gens, their total size in bytes and how many
+# of them are dynamic, the largest part of the PARI stack used during a
+# computation, and the number of times PARI had to enlarge its stack
+# during a computation.
+cdef size_t live_clones = 0
+cdef size_t live_clone_bytes = 0
+cdef size_t live_dynamic = 0
+cdef size_t stack_peak = 0
+cdef size_t stack_growths = 0
+cdef size_t stack_size_seen = 0
+
+# Clones of at most clone_pool_limit words are not allocated by gclone()
+# but in slots carved out of chunks of POOL_CHUNK_BYTES bytes, with one
+# free list per size class.  Class c holds clones of at most
+# (c + 1) * POOL_CLASS_WORDS words.  The word before a pooled clone
+# holds pool_magic | c, which tells unclone_gen() which free list to
+# return it to.  Pooled clones are not flagged with setisclone(): PARI
+# takes any object with the clone bit for a block allocated by gclone()
+# and updates the reference count and links in the header of the block,
+# which pooled clones do not have.  The same holds for the clones made
+# by heap_clone(), with the header pool_magic | HEAP_CLASS.  The Gens
+# owning them are flagged with is_clone instead.  Chunks are never freed.
+cdef enum:
+    POOL_CLASS_WORDS = 4
+    POOL_CLASSES = 16
+    POOL_CHUNK_BYTES = 16384
+    # The size class in the header of the clones made by heap_clone()
+    HEAP_CLASS = 0xFF
+cdef ulong pool_magic = (<ulong>0xC10E) << (8 * sizeof(long) - 16)
+cdef size_t clone_pool_limit = 32
+cdef GEN pool_free[POOL_CLASSES]
+cdef size_t pool_bytes = 0
+cdef size_t pool_used_bytes = 0
+
+# The StackPolicy installed by Pari.set_stack_policy(), which is told
+# about every top-level computation, or None.
+cdef StackPolicy stack_policy = None
+
+# The stack peak of a computation in the main thread, for the statistics,
+# the stack policy and the profiler, is found with a watermark: the free
+# part of the PARI stack is painted with stack_canary, and the lowest
+# address written by the computation is the top of the first run of
+# CANARY_RUN canary words found below its end.  Between computations,
+# [painted_bot, avma) is painted, and the stack below painted_bot has
+# not been written since it was allocated, so it is still zeroed.  After
+# each computation, the part of the stack it used is painted again, and
+# the painted part is extended below it by as much as the stack in use
+# (and at least PAINT_MARGIN bytes), so that only a computation using
+# twice as much stack as any before reaches the zeroed part.
+# painted_top is the top of the stack being watched, or 0; the first
+# computation after PARI reallocates its stack is measured by the part
+# of the stack it leaves in use.  Painting costs time proportional to
+# the stack used, so the stack is only watched while its peak is
+# needed: while stack_tracking is set by Pari.set_stack_tracking(),
+# while profiling, or while a stack policy is installed.  Otherwise,
+# a computation is measured by the part of the stack it leaves in use.
+cdef enum:
+    CANARY_RUN = 64
+    PAINT_MARGIN = 1 << 16
+cdef ulong stack_canary = (<ulong>-1) // 0xFF * 0xA5
+cdef pari_sp painted_bot = 0
+cdef pari_sp painted_top = 0
+cdef bint stack_tracking = False
+
+# Profiling of the auto-generated methods (see Pari.set_profiling()).
+# profile_name is the name of the PARI function being profiled, or
+# None, and profile_data maps function names to the lists
+# [calls, seconds, stack peak, stack growths].
+cdef bint profiling = False
+cdef object profile_name = None
+cdef double profile_time = 0
+cdef size_t profile_size = 0
+cdef dict profile_data = {}
+
+# In threaded mode (see Pari.set_threaded()), the auto-generated methods
+# release the GIL during the PARI call.  Threads other than the main
+# thread then compute on their own PARI stack (see threads.h); stack
+# scopes, profiling, the stack policy and the statistics of the stack
+# only concern the main thread.
+cdef bint release_gil = False
+
 cdef inline void clear_stack():
     """
     Call ``sig_off()``. If we are leaving the outermost
-    ``sig_on() ... sig_off()`` block, then clear the PARI stack.
+    ``sig_on() ... sig_off()`` block, then clear the PARI stack
+    (except for the part of it holding Gens of an open stack scope).
     """
-    global avma
-    if sig_on_count <= 1:
+    global avma, stack_peak, stack_growths, stack_size_seen, painted_top
+    cdef bint outermost = sig_on_count <= 1
+    cdef bint watched
+    cdef size_t used, peak = 0
+    cdef pari_sp low
+    if outermost and cypari_thread_kind == CYPARI_THREAD_OWN:
         avma = pari_mainstack.top
+        sig_off()
+        return
+    if outermost:
+        used = pari_mainstack.top - avma
+        watched = stack_watched()
+        if not watched:
+            # Only the stack left in use is measured
+            painted_top = 0
+            peak = used
+        elif painted_top != pari_mainstack.top:
+            # The stack was not watched during this computation
+            low = stack_watch_start()
+            peak = used
+        else:
+            low = stack_dirty_low(avma)
+            peak = pari_mainstack.top - low
+        if peak > stack_peak:
+            stack_peak = peak
+        if pari_mainstack.size != stack_size_seen:
+            if pari_mainstack.size > stack_size_seen and stack_size_seen:
+                stack_growths += 1
+            stack_size_seen = pari_mainstack.size
+        if profile_name is not None:
+            profile_stop(peak)
+        if stack_floor:
+            avma = stack_floor
+        else:
+            avma = pari_mainstack.top
+        if watched:
+            stack_repaint(low, avma)
     sig_off()
+    if outermost and stack_policy is not None and not stack_floor:
+        stack_policy.after_call(peak)
+
+cdef void paint_stack(pari_sp low, pari_sp high) noexcept:
+    """
+    Fill the PARI stack from `low` to `high` with ``stack_canary``.
+    """
+    cdef GEN p = <GEN>low
+    while <pari_sp>p < high:
+        p[0] = <long>stack_canary
+        p += 1
+
+cdef pari_sp stack_zeroed_low(pari_sp high) noexcept:
+    """
+    Return the lowest address of the PARI stack below `high` which is
+    not zero, or `high`: the stack below it was not written since it
+    was allocated, since every PARI object starts with a non-zero
+    codeword.
+    """
+    cdef GEN p = <GEN>pari_mainstack.bot
+    while <pari_sp>p < high:
+        if p[0]:
+            return <pari_sp>p
+        p += 1
+    return high
+
+cdef inline bint stack_watched() noexcept:
+    """
+    Return whether the peak of the computations is needed.
+    """
+    return stack_tracking or profiling or stack_policy is not None
+
+cdef void stack_watch() noexcept:
+    """
+    Paint the stack of the main thread if it is not watched yet, so
+    that the next computation is measured.
+    """
+    if (painted_top != pari_mainstack.top and not sig_on_count and
+            cypari_thread_kind == CYPARI_THREAD_MAIN):
+        stack_repaint(stack_watch_start(), avma)
+
+cdef pari_sp stack_watch_start() noexcept:
+    """
+    Start watching the stack of the main thread, after PARI was
+    initialized or its stack was reallocated, and return the lowest
+    address written so far.  It must then be painted up to ``avma``.
+    """
+    global painted_bot, painted_top
+    painted_top = pari_mainstack.top
+    painted_bot = stack_zeroed_low(avma)
+    return painted_bot
+
+cdef pari_sp stack_dirty_low(pari_sp start) noexcept:
+    """
+    Return the lowest address of the PARI stack below `start` which
+    was written since the stack was painted.
+    """
+    global painted_bot
+    cdef GEN p = <GEN>start
+    cdef size_t run = 0
+    cdef pari_sp low
+    if painted_bot < pari_mainstack.bot:
+        painted_bot = pari_mainstack.bot
+    while <pari_sp>p > painted_bot:
+        p -= 1
+        if <ulong>p[0] == stack_canary:
+            run += 1
+            if run == CANARY_RUN:
+                return <pari_sp>(p + run)
+        else:
+            run = 0
+    # The computation may have gone below the painted part, into the
+    # zeroed part, which includes a part added when PARI enlarged the
+    # stack.
+    low = stack_zeroed_low(painted_bot)
+    if low < painted_bot:
+        return low
+    return <pari_sp>(p + run)
+
+cdef void stack_repaint(pari_sp low, pari_sp high) noexcept:
+    """
+    Paint the stack from `low`, the lowest address written by the last
+    computation, to `high`, the new value of ``avma``, and extend the
+    painted part below `low` if needed.
+    """
+    global painted_bot
+    cdef size_t margin = pari_mainstack.top - low
+    cdef pari_sp bot
+    if margin < PAINT_MARGIN:
+        margin = PAINT_MARGIN
+    if low - pari_mainstack.bot > margin:
+        bot = low - margin
+    else:
+        bot = pari_mainstack.bot
+    if bot < painted_bot:
+        painted_bot = bot
+        low = bot
+    paint_stack(low, high)
+
+cdef profile_start(name):
+    """
+    Start profiling a call of the PARI function `name`, unless it is
+    called from within another computation.  Called by the
+    auto-generated methods, before ``sig_on()``, while profiling.
+    """
+    global profile_name, profile_time, profile_size
+    if sig_on_count or cypari_thread_kind != CYPARI_THREAD_MAIN:
+        return
+    # Paint the stack now, so that this call is measured
+    stack_watch()
+    profile_name = name
+    profile_size = pari_mainstack.size
+    profile_time = perf_counter()
+
+cdef void profile_stop(size_t peak) noexcept:
+    """
+    Record the time and the stack peak of the call being profiled.
+    Called by ``clear_stack()`` when leaving the outermost
+    ``sig_on() ... sig_off()`` block.
+    """
+    global profile_name
+    cdef double elapsed = perf_counter() - profile_time
+    entry = profile_data.get(profile_name)
+    if entry is None:
+        entry = profile_data[profile_name] = [0, 0.0, 0, 0]
+    entry[0] += 1
+    entry[1] += elapsed
+    if peak > entry[2]:
+        entry[2] = peak
+    if pari_mainstack.size > profile_size:
+        entry[3] += 1
+    profile_name = None
 
 cdef inline GEN deepcopy_to_python_heap(GEN x, pari_sp* address):
     cdef size_t s = <size_t> gsizebyte(x)
@@ -44,21 +314,48 @@ cdef inline Gen new_dynamic_gen(GEN x):
     """
     Create a new Gen with new_gen, but set a flag to indicate that gunclone_deep shoule
     be used in the __dealloc__ method.
+
+    The result is always cloned, even inside a stack scope, since the
+    data which PARI attaches to it later must be freed by obj_free().
+    If `x` does not have the shape of a structure created by PARI's
+    ``obj_init`` (a ``t_VEC`` ending with a ``t_VEC`` of cached data),
+    as happens for some flags of the functions returning such
+    structures, this is the same as :func:`new_gen`.
     """
-    cdef Gen g = new_gen(x)
+    global live_dynamic
+    if not is_lazy(x):
+        return new_gen(x)
+    cdef Gen g = new_gen_noclear(x)
+    clear_stack()
     g.is_dynamic = True
+    live_dynamic += 1
     return g
     
+cdef inline bint is_lazy(GEN x):
+    """
+    Return whether `x` can be a structure created by ``obj_init``,
+    to which ``obj_free`` may be applied.
+    """
+    return (typ(x) == t_VEC and lg(x) > 1 and
+            typ(gel(x, lg(x) - 1)) == t_VEC)
+
 cdef inline Gen new_gen(GEN x):
     """
     Create a new Gen wrapping `x`, then call ``clear_stack()``.
-    Except if `x` is ``gnil``, then we return ``None`` instead.
+    Except if `x` is ``gnil``, then we return ``None`` instead, and
+    if `x` is a small ``t_INT``, then we return the interned Gen.
     """
     cdef Gen g
     if x is gnil:
         g = None
     else:
-        g = new_gen_noclear(x)
+        g = small_int_gen(x)
+        if g is None:
+            if (stack_floor and sig_on_count <= 1 and
+                cypari_thread_kind != CYPARI_THREAD_OWN):
+                g = new_scoped_gen(x)
+            else:
+                g = new_gen_noclear(x)
     clear_stack()
     return g
 
@@ -68,5 +365,499 @@ cdef inline Gen new_gen_noclear(GEN x):
     call sig_off().
     """
     cdef Gen y = Gen.__new__(Gen)
-    y.g = gclone(x)
+    clone_into(y, x)
     return y
+
+cdef inline void clone_into(Gen_base y, GEN x):
+    """
+    Make `y` wrap a clone of `x` made by :func:`clone_gen`, which it
+    owns and frees when it is deallocated.
+    """
+    y.g = clone_gen(x)
+    y.is_clone = True
+    y.is_ref = False
+    y.owner = None
+
+cdef inline GEN clone_gen(GEN x):
+    """
+    Return a clone of `x`, counting it in the statistics of
+    :meth:`Pari.memory_stats`.  Small clones are allocated in the
+    clone pool, others by ``gclone``, or by :func:`heap_clone` if
+    PARI supports threads.  A Gen owning the clone must release it
+    with :func:`unclone_gen`; use :func:`clone_into` to give it one.
+    """
+    global live_clones, live_clone_bytes
+    cdef size_t n = gsizeword(x)
+    cdef GEN y = NULL
+    if n <= clone_pool_limit:
+        y = pool_clone(x, n)
+    if y is NULL:
+        if cypari_threads_enabled:
+            y = heap_clone(x, n)
+        else:
+            y = gclone(x)
+    live_clones += 1
+    live_clone_bytes += n * sizeof(long)
+    return y
+
+cdef inline void unclone_gen(GEN x, bint dynamic):
+    """
+    Free a clone made by :func:`clone_gen`, first freeing the data
+    attached to it by PARI if it is dynamic.
+    """
+    global live_clones, live_clone_bytes, live_dynamic
+    if dynamic:
+        obj_free(x)
+        live_dynamic -= 1
+    # For a dynamic clone, the size is the same as when it was created
+    # once obj_free() has been called.
+    live_clones -= 1
+    live_clone_bytes -= gsizebyte(x)
+    if isclone(x):
+        gunclone(x)
+    elif <ulong>x[-1] == pool_magic | HEAP_CLASS:
+        pari_free(x - 1)
+    else:
+        pool_release(x)
+
+cdef GEN heap_clone(GEN x, size_t n):
+    """
+    Return a copy of `x`, which has size `n` words, allocated by
+    ``pari_malloc`` after a header word ``pool_magic | HEAP_CLASS``.
+    Like a pooled clone, it does not have the clone bit.
+
+    When PARI supports threads, the blocks allocated by ``gclone`` are
+    linked in a list private to the thread which allocated them, so
+    they cannot be freed by another thread.  Such copies can.
+    """
+    cdef GEN slot = <GEN>pari_malloc((n + 1) * sizeof(long))
+    cdef pari_sp top = <pari_sp>(slot + 1 + n)
+    slot[0] = <long>(pool_magic | HEAP_CLASS)
+    return gcopy_avma(x, &top)
+
+cdef inline size_t pool_slot_words(size_t c):
+    """
+    Return the size in words of a slot of size class `c`, including
+    the header word.
+    """
+    return 1 + (c + 1) * POOL_CLASS_WORDS
+
+cdef GEN pool_refill(size_t c):
+    """
+    Allocate a new chunk for the size class `c` and thread its slots
+    onto the free list.  Return ``NULL`` if ``malloc`` fails.
+    """
+    global pool_bytes
+    cdef size_t words = pool_slot_words(c)
+    cdef size_t count = POOL_CHUNK_BYTES // (words * sizeof(long))
+    cdef GEN chunk = <GEN>sig_malloc(count * words * sizeof(long))
+    cdef size_t i
+    if chunk is NULL:
+        return NULL
+    for i in range(count - 1):
+        chunk[i * words] = <long>(chunk + (i + 1) * words)
+    chunk[(count - 1) * words] = <long>pool_free[c]
+    pool_free[c] = chunk
+    pool_bytes += count * words * sizeof(long)
+    return chunk
+
+cdef GEN pool_clone(GEN x, size_t n):
+    """
+    Return a copy of `x`, which has size `n` words, in a slot of the
+    clone pool.  Return ``NULL`` if no slot can be allocated.
+    """
+    global pool_used_bytes
+    cdef size_t c = (n - 1) // POOL_CLASS_WORDS if n else 0
+    cdef GEN slot = pool_free[c]
+    cdef pari_sp top
+    cdef GEN y
+    if slot is NULL:
+        slot = pool_refill(c)
+        if slot is NULL:
+            return NULL
+    pool_free[c] = <GEN>slot[0]
+    slot[0] = <long>(pool_magic | c)
+    top = <pari_sp>(slot + 1 + n)
+    y = gcopy_avma(x, &top)
+    pool_used_bytes += pool_slot_words(c) * sizeof(long)
+    return y
+
+cdef void pool_release(GEN x):
+    """
+    Return the slot of the pooled clone `x` to its free list.
+    """
+    global pool_used_bytes
+    cdef size_t c = (<ulong>x[-1]) & 0xFF
+    cdef GEN slot = x - 1
+    slot[0] = <long>pool_free[c]
+    pool_free[c] = slot
+    pool_used_bytes -= pool_slot_words(c) * sizeof(long)
+
+cdef set_clone_pool_limit(size_t words):
+    """
+    Pool the clones of at most `words` words from now on.  Clones
+    already allocated keep being freed by the allocator they came from.
+    """
+    global clone_pool_limit
+    if words > POOL_CLASSES * POOL_CLASS_WORDS:
+        raise ValueError("clones of more than {} words cannot be pooled".format(
+            POOL_CLASSES * POOL_CLASS_WORDS))
+    clone_pool_limit = words
+
+cdef inline Gen small_int_gen(GEN x):
+    """
+    Return the interned Gen equal to `x` if `x` is a ``t_INT`` in the
+    range of the small integer cache, or ``None`` otherwise.
+    """
+    cdef ulong u
+    cdef long n
+    if typ(x) != t_INT or lgefint(x) > 3:
+        return None
+    if lgefint(x) == 2:
+        n = 0
+    else:
+        u = <ulong>x[2]
+        if signe(x) > 0:
+            if small_int_max < 0 or u > <ulong>small_int_max:
+                return None
+            n = <long>u
+        else:
+            if small_int_min > 0 or u > <ulong>(-small_int_min):
+                return None
+            n = -<long>u
+    return small_int_from_long(n)
+
+cdef inline Gen small_int_from_long(long n):
+    """
+    Return the interned Gen for `n`, or ``None`` if `n` is not in the
+    range of the small integer cache.
+    """
+    if n < small_int_min or n > small_int_max:
+        return None
+    return <Gen>small_int_cache[n - small_int_min]
+
+cdef set_small_int_cache(long low, long high):
+    """
+    Make the small integer cache hold the integers from `low` to `high`
+    (inclusive).  Gens for integers which were already cached are kept,
+    so that their identity does not change.
+    """
+    global small_int_min, small_int_max, small_int_cache
+    cdef list cache = []
+    cdef long n
+    if high >= low:
+        sig_on()
+        for n in range(low, high + 1):
+            if small_int_min <= n <= small_int_max:
+                cache.append(small_int_cache[n - small_int_min])
+            else:
+                cache.append(new_gen_noclear(stoi(n)))
+        clear_stack()
+    small_int_cache = cache
+    small_int_min = low
+    small_int_max = high
+
+
+cdef Gen new_scoped_gen(GEN x):
+    """
+    Create a new Gen wrapping a copy of `x` which is kept on the PARI
+    stack until the innermost stack scope is closed.  The copy is made
+    with ``gerepile`` so that only `x` survives the next
+    ``clear_stack()``; nothing is allocated on the PARI heap.
+    """
+    global stack_floor
+    cdef pari_sp lbot = avma
+    cdef Gen y = Gen.__new__(Gen)
+    y.g = gerepile(stack_floor, lbot, gcopy(x))
+    stack_floor = avma
+    scoped_gens.append(y)
+    return y
+
+
+cdef dict count_components(list gens, set owned):
+    """
+    Add to `owned` the ids of the components, among the Gens of a
+    stack scope, which :func:`repoint_children` points into the clone
+    of their parent, and return the number of such components of each
+    parent, by id.
+    """
+    cdef dict counts = {}
+    cdef Gen_base y, p
+    for y in gens:
+        # The parents are the Gens of the scope and the owners of the
+        # components in it, which may belong to an enclosing scope
+        for p in (y, y.owner if y.is_ref else None):
+            if p is None or id(p) in counts:
+                continue
+            counts[id(p)] = 0
+            if p.refers_to is None or not is_on_stack(p.g):
+                continue
+            for c in p.refers_to:
+                if c is not None and (<Gen_base>c).owner is p:
+                    owned.add(id(c))
+                    counts[id(p)] += 1
+    return counts
+
+
+cdef repoint_children(Gen_base p):
+    """
+    Point the components of `p` which were handed out by
+    :meth:`Gen.__getitem__` into the clone of ``p.g``, after `p` was
+    cloned when its stack scope was closed, so that they keep sharing
+    its memory.
+    """
+    cdef Py_ssize_t n
+    cdef Gen_base c
+    if p.refers_to is None:
+        return
+    for n in range(len(p.refers_to)):
+        if p.refers_to[n] is None:
+            continue
+        c = <Gen_base>p.refers_to[n]
+        if not is_on_stack(c.g):
+            continue
+        if c.owner is p:
+            c.g = gel(p.g, n + 1)
+            repoint_children(c)
+        else:
+            # A Gen stored into p, which p.g now holds a copy of
+            p.refers_to[n] = None
+
+
+cdef class StackScope:
+    """
+    Context manager returned by :meth:`Pari.stack_scope`.
+
+    On entry, Gens created by PARI calls start to be kept on the PARI
+    stack instead of being cloned to the PARI heap.  On exit, the Gens
+    which are still referenced from outside of the scope are cloned to
+    the heap (each of them exactly once) and the part of the PARI stack
+    used by the scope is released.  Components obtained by indexing a
+    Gen which is cloned are pointed into its clone rather than cloned
+    themselves.  Scopes may be nested.
+    """
+    cdef pari_sp saved_floor
+    cdef list saved_gens
+    cdef list gens
+
+    def __enter__(self):
+        global avma, stack_floor, scoped_gens
+        if self.gens is not None:
+            raise RuntimeError("this stack scope has already been entered")
+        if cypari_thread_kind == CYPARI_THREAD_NEW:
+            cypari_thread_setup()
+        if cypari_thread_kind == CYPARI_THREAD_OWN:
+            raise RuntimeError("stack scopes can only be used in the main thread")
+        self.saved_floor = stack_floor
+        self.saved_gens = scoped_gens
+        self.gens = []
+        if not stack_floor:
+            stack_floor = pari_mainstack.top
+        avma = stack_floor
+        scoped_gens = self.gens
+        return self
+
+    def __exit__(self, *exc_info):
+        global avma, stack_floor, scoped_gens
+        cdef Gen y
+        cdef set owned = set(), needed = set(), scoped
+        cdef dict counts
+        cdef bint is_owned, outlives
+        try:
+            counts = count_components(self.gens, owned)
+            scoped = {id(g) for g in self.gens}
+            sig_on()
+            # Newest first, so that references held by discarded
+            # children (see new_ref) are dropped before their parent
+            # is examined, and components are examined before their
+            # parent.  The list holds the only other reference, which
+            # is transferred to y by pop().  Besides, a component
+            # returned by __getitem__ is held by the refers_to list of
+            # its parent, which it holds as its owner.
+            while self.gens:
+                y = self.gens.pop()
+                if not is_on_stack(y.g):
+                    continue
+                is_owned = id(y) in owned
+                outlives = (id(y) in needed or
+                            Py_REFCNT(y) > 1 + is_owned + counts.get(id(y), 0))
+                if is_owned:
+                    # Pointed into the clone of its parent, if the
+                    # parent has to be cloned
+                    if not outlives:
+                        pass
+                    elif id(y.owner) in scoped:
+                        needed.add(id(y.owner))
+                    elif self.saved_gens is not None:
+                        self.saved_gens.append(y)
+                elif outlives:
+                    clone_into(y, y.g)
+                    repoint_children(y)
+                else:
+                    # Break the cycles between y and its components
+                    y.refers_to = None
+            y = None
+            sig_off()
+        finally:
+            scoped_gens = self.saved_gens
+            stack_floor = self.saved_floor
+            if stack_floor:
+                avma = stack_floor
+            else:
+                avma = pari_mainstack.top
+        return False
+
+
+cdef class StackPolicy:
+    """
+    Policy returned by :meth:`Pari.set_stack_policy`, which resizes
+    the PARI stack between top-level computations.
+
+    PARI doubles its stack whenever a computation runs out of space,
+    but never gives the memory back.  After the stack has grown, the
+    policy records the largest part of the stack used during each of
+    the following computations.  Once ``shrink_after``
+    computations have passed without the stack growing again, the
+    stack is shrunk to twice that high-water mark, but not below
+    ``min_size``.  The stack is never made larger than ``max_size``.
+    """
+    cdef readonly long shrink_after
+    cdef readonly size_t min_size
+    cdef readonly size_t max_size
+    # Computations since the stack was last grown or resized, and the
+    # high-water mark of the stack during them.
+    cdef long quiet_calls
+    cdef size_t high_water
+    # The stack size seen at the end of the previous computation.
+    cdef size_t last_size
+    # Counters for stats()
+    cdef size_t calls
+    cdef size_t growths
+    cdef size_t shrinks
+    cdef size_t pregrows
+    cdef size_t bytes_released
+
+    def __init__(self, long shrink_after, size_t min_size, size_t max_size):
+        if shrink_after <= 0:
+            raise ValueError("shrink_after must be positive")
+        if min_size < 1024:
+            min_size = 1024  # as in Pari.allocatemem()
+        if max_size < min_size:
+            raise ValueError("the maximum size ({}) should be at least the minimum size ({})".format(max_size, min_size))
+        self.shrink_after = shrink_after
+        self.min_size = min_size
+        self.max_size = max_size
+        self.last_size = pari_mainstack.size
+
+    def __repr__(self):
+        return "StackPolicy(shrink_after={}, min_size={}, max_size={})".format(
+            self.shrink_after, self.min_size, self.max_size)
+
+    cdef int resize(self, size_t s) except -1:
+        """
+        Set the size of the PARI stack to `s`, with maximum size
+        ``max_size``, and start a new window of computations.
+        """
+        global stack_size_seen
+        sig_on()
+        paristack_setsize(s, self.max_size)
+        sig_off()
+        # This is not a growth event for memory_stats(), and the new
+        # stack must be painted for the next computation to be measured
+        stack_size_seen = pari_mainstack.size
+        stack_repaint(stack_watch_start(), avma)
+        self.last_size = pari_mainstack.size
+        self.quiet_calls = 0
+        self.high_water = 0
+        return 0
+
+    cdef void after_call(self, size_t peak) noexcept:
+        """
+        Called by ``clear_stack()`` at the end of every top-level
+        computation, with the largest number of bytes of the PARI stack
+        which it used.
+        """
+        cdef size_t size = pari_mainstack.size
+        cdef size_t target
+        self.calls += 1
+        if size > self.last_size:
+            # A spike: only the computations after it count towards
+            # shrinking the stack again.
+            self.growths += 1
+            self.last_size = size
+            self.quiet_calls = 0
+            self.high_water = 0
+            return
+        self.last_size = size
+        self.quiet_calls += 1
+        if peak > self.high_water:
+            self.high_water = peak
+        if self.quiet_calls < self.shrink_after:
+            return
+        target = 2 * self.high_water
+        if target < self.min_size:
+            target = self.min_size
+        if target >= size:
+            self.quiet_calls = 0
+            self.high_water = 0
+            return
+        try:
+            self.resize(target)
+        except Exception:
+            # Keep the current stack if it cannot be reallocated.
+            self.quiet_calls = 0
+            self.high_water = 0
+            return
+        self.shrinks += 1
+        if size > pari_mainstack.size:
+            self.bytes_released += size - pari_mainstack.size
+
+    def pregrow(self, size_t s):
+        """
+        Make sure that the PARI stack has at least `s` bytes (but no
+        more than ``max_size``) before the next computation.
+
+        Use this before a computation known to need a large stack, to
+        avoid letting PARI double its stack several times during it.
+        The stack will be shrunk again once ``shrink_after``
+        computations have passed.
+        """
+        if stack_floor:
+            raise RuntimeError("the PARI stack cannot be resized inside a stack scope")
+        if s > self.max_size:
+            s = self.max_size
+        if s <= pari_mainstack.size:
+            return
+        self.resize(s)
+        self.pregrows += 1
+
+    def stats(self):
+        """
+        Return a dictionary with the counters of this policy:
+
+        - ``calls`` -- the number of top-level computations seen
+
+        - ``growths`` -- how many of them made PARI enlarge its stack
+
+        - ``shrinks`` -- the number of times the stack was shrunk
+
+        - ``bytes_released`` -- the total number of bytes by which the
+          stack was shrunk
+
+        - ``pregrows`` -- the number of times :meth:`pregrow` enlarged
+          the stack
+
+        - ``quiet_calls`` -- the number of computations since the stack
+          was last grown or resized
+
+        - ``high_water`` -- the largest number of bytes of the stack
+          used during these computations
+        """
+        return {
+            'calls': self.calls,
+            'growths': self.growths,
+            'shrinks': self.shrinks,
+            'bytes_released': self.bytes_released,
+            'pregrows': self.pregrows,
+            'quiet_calls': self.quiet_calls,
+            'high_water': self.high_water}
@@ -42,6 +42,17 @@
 #endif /* __GNUC__ */
 
 
+/* The state of the signal handler is per thread, so that threads
+ * computing with PARI at the same time (see threads.h) each have their
+ * own sig_on() level and jump buffer.  On Windows, interrupts are
+ * handled in a separate thread, so the state is shared. */
+#if defined(__MINGW32__) || defined(_WIN32)
+  #define CYSIGS_THREAD
+#else
+  #define CYSIGS_THREAD __thread
+#endif
+
+
 #ifdef __cplusplus
 extern "C" {
 #endif
@@ -82,6 +93,14 @@ typedef struct
      */
     const char* s;
 
+    /* Nonzero while the thread computes without the GIL, between
+     * sig_on_nogil() and sig_on_after_nogil() (see macros.h).  The
+     * signal handlers must not take the GIL then: they only store the
+     * signal in deferred_sig and jump back to sig_on_nogil(), and the
+     * exception is raised by sig_on_after_nogil(). */
+    volatile sig_atomic_t nogil;
+    volatile sig_atomic_t deferred_sig;
+
     /* In Windows we use this to indicate that a signal has been
      * mapped to SIGFPE (to allow immediate processing with longjmp).
      */
@@ -2,6 +2,9 @@ from __future__ import print_function
 import doctest, re, getopt, sys
 from . import tests
 from . import _pari
+from . import io as gen_io
+from . import pool
+from . import aio
 from ._pari import Pari
 import sys
 if sys.version_info.major == 2:
@@ -11,6 +14,34 @@ else:
 
 cpu_width = '64bit' if sys.maxsize > 2**32 else '32bit'
 
+try:
+    import numpy
+    have_numpy = True
+except ImportError:
+    have_numpy = False
+
+try:
+    import gmpy2
+    have_gmpy2 = True
+except ImportError:
+    have_gmpy2 = False
+
+def remove_optional(string, feature):
+    """
+    Remove the examples marked ``# optional - feature``, and their output.
+    """
+    lines, skipping = [], False
+    for line in string.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith(('sage:', '>>>')):
+            skipping = '# optional - ' + feature in line
+        elif not stripped.startswith(('....:', '...')) and (
+                not stripped or not skipping):
+            skipping = False
+        if not skipping:
+            lines.append(line)
+    return '\n'.join(lines)
+
 class DocTestParser(doctest.DocTestParser):
 
     def parse(self, string, name='<string>'):
@@ -34,6 +65,12 @@ class DocTestParser(doctest.DocTestParser):
         else:
             string = regex_py2.sub('', string)
             string = regex_py3.sub(r'\g<1>\n', string)
+        # Remove tests needing NumPy if it is not installed
+        if not have_numpy:
+            string = remove_optional(string, 'numpy')
+        # Remove tests needing gmpy2 if it is not installed
+        if not have_gmpy2:
+            string = remove_optional(string, 'gmpy2')
         # Remove tests with random results
         regex_random = re.compile('\n[^#^\n]*# random.*\n[^\n]*[^\n]*',
                                   re.MULTILINE)
@@ -51,13 +88,16 @@ extra_globals = dict([('pari', _pari.pari)])
 modules_to_test = [
     (tests, extra_globals),
     (_pari, extra_globals),
+    (gen_io, extra_globals),
+    (pool, extra_globals),
+    (aio, extra_globals),
 ]
 
 # Cython adds a docstring to _pari.__test__ *only* if it contains '>>>'.
 # To enable running Sage doctests, with prompt 'sage:', we need to add
 # docstrings containing no '>>>' prompt to _pari.__test__ ourselves.
 # Unfortunately, line numbers are not readily available to us.
-for cls in (_pari.Gen, _pari.Pari):
+for cls in (_pari.Gen, _pari.Pari, _pari.DiskCache):
     for key, value in cls.__dict__.items():
         docstring = getattr(cls.__dict__[key], '__doc__')
         if isinstance(docstring, str):
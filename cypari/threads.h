@@ -0,0 +1,219 @@
+/*
+ * PARI stacks for threads other than the main thread.
+ *
+ * When libpari is built with the pthread multithread engine, the PARI
+ * stack and the other PARI globals are thread-local, so every thread
+ * which calls PARI needs a stack of its own.  The main thread uses the
+ * stack allocated by pari_init().  Any other thread gets a stack the
+ * first time it calls sig_on(), of the size given by PARI's threadsize
+ * and threadsizemax defaults (or of the size of the main stack if
+ * threadsize is 0), and frees it when it exits.
+ *
+ * With a single-threaded libpari, all threads share the main stack,
+ * which is safe because they only use PARI while holding the GIL.
+ *
+ * This file is included by implementation.c.
+ */
+
+/*****************************************************************************
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 2 of the License, or
+ * (at your option) any later version.
+ *                  http://www.gnu.org/licenses/
+ ****************************************************************************/
+
+#ifndef CYPARI_THREADS_H
+#define CYPARI_THREADS_H
+
+#include <pari/paripriv.h>
+
+/* How the current thread uses PARI */
+enum {
+    CYPARI_THREAD_NEW = 0,   /* it has not called sig_on() yet */
+    CYPARI_THREAD_MAIN = 1,  /* it uses the main PARI stack */
+    CYPARI_THREAD_OWN = 2    /* it has a PARI stack of its own */
+};
+static CYSIGS_THREAD int cypari_thread_kind;
+
+/* Nonzero if the PARI globals are thread-local, set by
+ * cypari_threads_init() */
+static int cypari_threads_enabled;
+
+/* The size of the stacks of new threads if threadsize is 0 */
+static size_t cypari_thread_default_size;
+
+#if !defined(__MINGW32__) && !defined(_WIN32)
+
+#include <pthread.h>
+
+static pthread_key_t cypari_thread_key;
+
+/* A thread with its own PARI stack, which other threads can interrupt
+ * with cypari_thread_interrupt() */
+struct cypari_interrupt_target
+{
+    pthread_t thread;
+    /* Set while a SIGINT sent by cypari_thread_interrupt() is pending */
+    volatile sig_atomic_t requested;
+};
+static CYSIGS_THREAD struct cypari_interrupt_target cypari_self;
+
+/* The thread which initialized PARI */
+static pthread_t cypari_main_thread;
+
+/* Destructor of cypari_thread_key, called when a thread with its own
+ * PARI stack exits */
+static void cypari_thread_exit(void* t)
+{
+    pari_thread_close();
+    pari_thread_free((struct pari_thread*)t);
+    free(t);
+}
+
+/* Give the current thread its own PARI stack if needed.  Called by
+ * sig_on() the first time the thread uses PARI. */
+static void cypari_thread_setup(void)
+{
+    struct pari_thread* t;
+    size_t size, sizemax;
+    sigset_t interrupts;
+
+    if (!cypari_threads_enabled)
+    {
+        cypari_thread_kind = CYPARI_THREAD_MAIN;
+        return;
+    }
+    size = GP_DATA->threadsize ? GP_DATA->threadsize : cypari_thread_default_size;
+    sizemax = GP_DATA->threadsizemax > size ? GP_DATA->threadsizemax : size;
+    t = (struct pari_thread*)malloc(sizeof(struct pari_thread));
+    if (t == NULL)
+    {
+        fprintf(stderr, "cannot allocate a PARI stack for this thread\n");
+        abort();
+    }
+    pari_thread_valloc(t, size, sizemax, NULL);
+    pari_thread_start(t);
+    pthread_setspecific(cypari_thread_key, t);
+
+    /* Interrupts from the terminal or from timers are handled by the
+     * main thread.  SIGINT stays unblocked, so that other threads can
+     * interrupt this one with cypari_thread_interrupt(); if it receives
+     * a SIGINT meant for the process, it sends it on to the main
+     * thread (see cypari_forward_interrupt()). */
+    sigemptyset(&interrupts);
+    sigaddset(&interrupts, SIGHUP);
+    sigaddset(&interrupts, SIGALRM);
+    sigaddset(&interrupts, SIGVTALRM);
+    pthread_sigmask(SIG_BLOCK, &interrupts, &default_sigmask);
+    sigaddset(&default_sigmask, SIGHUP);
+    sigaddset(&default_sigmask, SIGALRM);
+    sigaddset(&default_sigmask, SIGVTALRM);
+
+    cypari_self.thread = pthread_self();
+    cypari_self.requested = 0;
+    cypari_thread_kind = CYPARI_THREAD_OWN;
+}
+
+/* Called in the main thread once PARI is initialized */
+static void cypari_threads_init(void)
+{
+    cypari_thread_kind = CYPARI_THREAD_MAIN;
+    cypari_main_thread = pthread_self();
+    cypari_thread_default_size = pari_mainstack->rsize;
+    cypari_threads_enabled = (strcmp(paricfg_mt_engine, "pthread") == 0 &&
+                              pthread_key_create(&cypari_thread_key,
+                                                 cypari_thread_exit) == 0);
+}
+
+/* Called by the handler of SIGHUP, SIGINT, SIGALRM and SIGVTALRM.  Interrupts
+ * received by a thread other than the main thread, such as the threads
+ * started by the parallel GP functions, are sent on to the main thread,
+ * which can interrupt the computation, unless they were sent by
+ * cypari_thread_interrupt().  Return 1 if the interrupt was sent on. */
+static int cypari_forward_interrupt(int sig)
+{
+    if (!cypari_threads_enabled || cypari_thread_kind == CYPARI_THREAD_MAIN)
+        return 0;
+    if (cypari_thread_kind == CYPARI_THREAD_OWN && sig == SIGINT &&
+        cypari_self.requested)
+        return 0;
+    pthread_kill(cypari_main_thread, sig);
+    return 1;
+}
+
+/* Return a handle with which other threads can interrupt the PARI
+ * computations of the current thread, which must have its own PARI
+ * stack.  It is valid until the thread exits. */
+static void* cypari_interrupt_handle(void)
+{
+    return &cypari_self;
+}
+
+/* Interrupt the PARI computation of the thread with the given handle
+ * like SIGINT interrupts the main thread: it raises KeyboardInterrupt
+ * in that thread, now if it is inside sig_on(), or else at its next
+ * sig_on(). */
+static void cypari_thread_interrupt(void* handle)
+{
+    struct cypari_interrupt_target* t = (struct cypari_interrupt_target*)handle;
+    t->requested = 1;
+    pthread_kill(t->thread, SIGINT);
+}
+
+/* Discard an interrupt sent to the current thread by
+ * cypari_thread_interrupt() which was not acted upon, for instance
+ * because the computation ended first. */
+static void cypari_interrupt_discard(void)
+{
+    sigset_t pending;
+    /* A pending SIGINT is delivered when this system call returns */
+    sigpending(&pending);
+    cypari_self.requested = 0;
+    cysigs.interrupt_received = 0;
+    PARI_SIGINT_pending = 0;
+}
+
+/* Stop the threads of a parallel GP function (parapply, parvector...)
+ * after an error or an interrupt jumped back to sig_on(), as GP does
+ * when it recovers from an error.  PARI runs one parallel function at a
+ * time, and only the main thread may own it. */
+static void cypari_mt_recover(void)
+{
+    if (cypari_threads_enabled && cypari_thread_kind == CYPARI_THREAD_MAIN)
+        mt_err_recover(0);
+}
+
+#else /* Windows: PARI is built without thread support */
+
+static void cypari_thread_setup(void)
+{
+    cypari_thread_kind = CYPARI_THREAD_MAIN;
+}
+
+static void cypari_threads_init(void)
+{
+    cypari_thread_kind = CYPARI_THREAD_MAIN;
+    cypari_thread_default_size = pari_mainstack->rsize;
+}
+
+static void cypari_mt_recover(void)
+{
+}
+
+static void* cypari_interrupt_handle(void)
+{
+    return NULL;
+}
+
+static void cypari_thread_interrupt(void* handle)
+{
+}
+
+static void cypari_interrupt_discard(void)
+{
+}
+
+#endif
+
+#endif  /* ifndef CYPARI_THREADS_H */
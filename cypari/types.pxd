@@ -126,7 +126,11 @@ cdef extern from "pari/pari.h":
     struct pari_stack
     struct pari_thread
     struct pari_timer
-    struct GENbin
+    struct GENbin:
+        size_t len
+        GEN x
+        GEN base
+        void (*rebase)(GEN, long)
     struct hashentry
     struct hashtable
 
@@ -340,7 +340,8 @@ else:
 
 link_args += [pari_static_library, gmp_static_library]
 if sys.platform.startswith('linux'):
-    link_args += ['-Wl,-Bsymbolic-functions', '-Wl,-Bsymbolic']
+    # libpari is built with the pthread multithread engine.
+    link_args += ['-Wl,-Bsymbolic-functions', '-Wl,-Bsymbolic', '-pthread']
 
 include_dirs = [pari_include_dir]
 